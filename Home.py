@@ -1,5 +1,5 @@
 import streamlit as st
-from PIL import Image
+from utils.logo import caminho_logo
 
 st.set_page_config(
     page_title = 'Home',
@@ -7,9 +7,8 @@ st.set_page_config(
 )
 
 # Vamos colocar o nosso logotipo na barra lateral:
-image_path = 'logo.png'
-image = Image.open(image_path)
-st.sidebar.image( image, width = 300 )
+# (versão já redimensionada e guardada em cache, em vez de decodificar o 'logo.png' original a cada execução)
+st.sidebar.image( caminho_logo(), width = 300 )
 
 # Escrevendo o nome da empresa na barra lateral:
 st.sidebar.markdown( '# Tasty Trials' )
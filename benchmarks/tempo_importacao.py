@@ -0,0 +1,232 @@
+"""
+Relatório de tempo de importação e de execução das páginas do dashboard.
+
+Mede, em processos Python novos (sem nada em cache):
+- o tempo de importação de cada biblioteca pesada usada pelas páginas;
+- a partida a frio de cada página (importações + primeira execução do script) e o tempo de uma nova execução no
+  mesmo processo, que é o que o Streamlit faz a cada interação do usuário;
+- o custo de decodificar o 'logo.png' original comparado com a versão redimensionada em cache.
+
+Com '--antes', as páginas e o logo também são medidos em outra versão do projeto (qualquer referência do git:
+commit, branch ou tag), extraída com 'git archive' em uma pasta temporária, e o relatório mostra antes, depois e o
+ganho. O lado 'depois' é a cópia de trabalho, ou outra referência com '--depois'. Por exemplo, para comparar a
+versão de antes das importações adiadas com a cópia de trabalho, em que cada página só executa a visão escolhida
+(o resultado está em 'benchmarks/resultados/tempo_importacao.json'):
+    python benchmarks/tempo_importacao.py --antes 461d335^ --json benchmarks/resultados/tempo_importacao.json
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/tempo_importacao.py [--repeticoes 5] [--antes REF [--depois REF]] [--json relatorio.json]
+"""
+import io
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+from pathlib import Path
+
+RAIZ_PROJETO = Path( __file__ ).resolve().parent.parent
+
+BIBLIOTECAS = [ 'streamlit', 'pandas', 'numpy', 'plotly.express', 'plotly.graph_objects',
+                'folium', 'streamlit_folium', 'haversine', 'PIL.Image' ]
+
+def listar_paginas( raiz ):
+    return [ 'Home.py' ] + sorted( str( pagina.relative_to( raiz ) ) for pagina in ( raiz / 'pages' ).glob( '*.py' ) )
+
+
+CODIGO_IMPORTACAO = """
+import time
+inicio = time.perf_counter()
+import {modulo}
+print( time.perf_counter() - inicio )
+"""
+
+# A página é executada duas vezes no mesmo processo: a primeira inclui as importações (partida a frio) e a segunda
+# equivale a uma nova execução do script pelo Streamlit. Sem servidor, o Streamlit roda em 'bare mode' e os
+# comandos de layout não desenham nada.
+CODIGO_PAGINA = """
+import runpy, sys, time, warnings, logging
+warnings.simplefilter( 'ignore' )
+logging.disable( logging.WARNING )
+sys.path.insert( 0, {raiz!r} )
+tempos = []
+for _ in range( 2 ):
+    inicio = time.perf_counter()
+    runpy.run_path( {pagina!r}, run_name = '__main__' )
+    tempos.append( time.perf_counter() - inicio )
+print( tempos[ 0 ], tempos[ 1 ] )
+"""
+
+CODIGO_LOGO = """
+import sys, time
+sys.path.insert( 0, {raiz!r} )
+from PIL import Image
+inicio = time.perf_counter()
+Image.open( {logo!r} ).load()
+original = time.perf_counter() - inicio
+from utils.logo import caminho_logo
+caminho_logo()
+caminho_logo.cache_clear()
+inicio = time.perf_counter()
+Image.open( caminho_logo() ).load()
+reduzido = time.perf_counter() - inicio
+print( original, reduzido )
+"""
+
+
+def executar( codigo, raiz = RAIZ_PROJETO ):
+    """
+        Executa um trecho de código em um processo Python novo, a partir da raiz do projeto (ou de 'raiz').
+
+        Retorna:
+        - Lista de floats impressos pelo processo, ou None se ele falhar.
+    """
+    processo = subprocess.run( [ sys.executable, '-c', codigo ], cwd = raiz,
+                               capture_output = True, text = True )
+    if processo.returncode != 0:
+        return None
+    try:
+        return [ float( valor ) for valor in processo.stdout.strip().splitlines()[ -1 ].split() ]
+    except ( IndexError, ValueError ):
+        return None
+
+
+def mediana( codigo, repeticoes, raiz = RAIZ_PROJETO ):
+    # Mediana de cada valor medido, entre as execuções que deram certo.
+    resultados = [ executar( codigo, raiz ) for _ in range( repeticoes ) ]
+    resultados = [ r for r in resultados if r ]
+    if not resultados:
+        return None
+    return [ statistics.median( valores ) for valores in zip( *resultados ) ]
+
+
+def extrair_versao( referencia, destino ):
+    """
+        Extrai os arquivos de uma referência do git (commit, branch ou tag) em 'destino', sem mexer na cópia de
+        trabalho.
+    """
+    processo = subprocess.run( [ 'git', 'archive', '--format=tar', referencia ], cwd = RAIZ_PROJETO,
+                               capture_output = True, check = True )
+    with tarfile.open( fileobj = io.BytesIO( processo.stdout ) ) as arquivo:
+        arquivo.extractall( destino )
+
+
+def medir_paginas( raizes, repeticoes ):
+    """
+        Mede a partida a frio e a reexecução de cada página e a decodificação do logo de uma ou mais versões do
+        projeto. A cada repetição as versões são executadas uma após a outra, para que as variações de carga da
+        máquina durante a medição afetem todas igualmente.
+
+        Parâmetros:
+        - raizes: lista de pastas, cada uma com uma versão do projeto.
+        - repeticoes: execuções de cada medida por versão.
+
+        Retorna:
+        - Lista de tuplas (paginas, logo) no formato do relatório, uma por pasta.
+    """
+    def medir( codigos ):
+        # Mediana de cada valor por versão; a versão sem o código (por exemplo uma página que não existia) fica None.
+        resultados = [ [] for _ in raizes ]
+        for _ in range( repeticoes ):
+            for resultado, raiz, codigo in zip( resultados, raizes, codigos ):
+                valores = codigo and executar( codigo, raiz )
+                if valores:
+                    resultado.append( valores )
+        return [ [ statistics.median( valores ) for valores in zip( *resultado ) ] if resultado else None
+                 for resultado in resultados ]
+
+    paginas = [ {} for _ in raizes ]
+    for pagina in sorted( set().union( *( listar_paginas( raiz ) for raiz in raizes ) ) ):
+        codigos = [ ( raiz / pagina ).exists() and CODIGO_PAGINA.format( raiz = str( raiz ), pagina = pagina )
+                    for raiz in raizes ]
+        for paginas_raiz, tempos in zip( paginas, medir( codigos ) ):
+            paginas_raiz[ pagina ] = tempos and { 'partida_a_frio': tempos[ 0 ], 'reexecucao': tempos[ 1 ] }
+
+    logos = medir( [ CODIGO_LOGO.format( raiz = str( raiz ), logo = str( raiz / 'logo.png' ) ) for raiz in raizes ] )
+    logos = [ tempos and { 'original': tempos[ 0 ], 'reduzido': tempos[ 1 ] } for tempos in logos ]
+    return list( zip( paginas, logos ) )
+
+
+def formatar( tempo, largura ):
+    return f"{tempo * 1000:{largura}.1f}" if tempo is not None else f"{'falhou':>{largura}}"
+
+
+def ganho( antes, depois ):
+    # Redução percentual do tempo (positiva quando a versão atual é mais rápida).
+    if antes is None or depois is None or not antes:
+        return None
+    return 1 - depois / antes
+
+
+def imprimir_comparacao( referencia, antes, depois ):
+    print( f"Comparação com '{referencia}' (ms; ganho = redução do tempo)" )
+    print( f"{'Página':<36}{'medida':<16}{'antes':>10}{'depois':>10}{'ganho':>9}" )
+    for pagina in sorted( set( antes ) | set( depois ) ):
+        for medida in ( 'partida_a_frio', 'reexecucao' ):
+            valor_antes = ( antes.get( pagina ) or {} ).get( medida )
+            valor_depois = ( depois.get( pagina ) or {} ).get( medida )
+            reducao = ganho( valor_antes, valor_depois )
+            texto = f"{reducao:9.0%}" if reducao is not None else f"{'-':>9}"
+            print( f"{pagina:<36}{medida:<16}{formatar( valor_antes, 10 )}{formatar( valor_depois, 10 )}{texto}" )
+
+
+def main():
+    parser = argparse.ArgumentParser( description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter )
+    parser.add_argument( '--repeticoes', type = int, default = 5 )
+    parser.add_argument( '--antes', help = 'referência do git da versão de comparação (por exemplo um commit)' )
+    parser.add_argument( '--depois', help = 'referência do git do lado depois da comparação (padrão: cópia de trabalho)' )
+    parser.add_argument( '--json', help = 'arquivo onde salvar o relatório em JSON' )
+    args = parser.parse_args()
+
+    relatorio = { 'bibliotecas': {}, 'paginas': {}, 'logo': None }
+
+    print( f"{'Biblioteca':<28}{'importação (ms)':>18}" )
+    for modulo in BIBLIOTECAS:
+        tempo = mediana( CODIGO_IMPORTACAO.format( modulo = modulo ), args.repeticoes )
+        relatorio[ 'bibliotecas' ][ modulo ] = tempo and tempo[ 0 ]
+        texto = f"{tempo[ 0 ] * 1000:18.1f}" if tempo else f"{'indisponível':>18}"
+        print( f"{modulo:<28}{texto}" )
+
+    referencias = [ ( lado, referencia ) for lado, referencia in ( ( 'antes', args.antes ), ( 'depois', args.depois ) )
+                    if referencia is not None and args.antes ]
+    with tempfile.TemporaryDirectory() as pasta:
+        raizes = [ RAIZ_PROJETO ]
+        for lado, referencia in referencias:
+            raizes.append( Path( pasta ) / lado )
+            extrair_versao( referencia, raizes[ -1 ] )
+        medidas = medir_paginas( raizes, args.repeticoes )
+
+    relatorio[ 'paginas' ], relatorio[ 'logo' ] = medidas[ 0 ]
+    for ( lado, referencia ), ( paginas, logo ) in zip( referencias, medidas[ 1: ] ):
+        relatorio[ lado ] = { 'referencia': referencia, 'paginas': paginas, 'logo': logo }
+
+    print()
+    print( f"{'Página':<36}{'partida a frio (ms)':>22}{'reexecução (ms)':>18}" )
+    for pagina, tempos in relatorio[ 'paginas' ].items():
+        if tempos:
+            print( f"{pagina:<36}{tempos[ 'partida_a_frio' ] * 1000:22.1f}{tempos[ 'reexecucao' ] * 1000:18.1f}" )
+        else:
+            print( f"{pagina:<36}{'falhou':>22}" )
+
+    print()
+    logo = relatorio[ 'logo' ]
+    if logo:
+        print( f"Decodificação do logo: original {logo[ 'original' ] * 1000:.1f} ms, "
+               f"reduzido {logo[ 'reduzido' ] * 1000:.1f} ms" )
+
+    if args.antes:
+        depois = relatorio[ 'depois' ][ 'paginas' ] if args.depois else relatorio[ 'paginas' ]
+        print()
+        imprimir_comparacao( f"{args.antes}' -> '{args.depois or 'cópia de trabalho'}",
+                             relatorio[ 'antes' ][ 'paginas' ], depois )
+
+    if args.json:
+        Path( args.json ).parent.mkdir( parents = True, exist_ok = True )
+        with open( args.json, 'w', encoding = 'utf-8' ) as arquivo:
+            json.dump( relatorio, arquivo, indent = 2 )
+
+
+if __name__ == '__main__':
+    main()
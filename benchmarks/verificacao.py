@@ -0,0 +1,625 @@
+"""
+Verificação dos números do dashboard contra resultados de referência congelados (golden results).
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/verificacao.py --congelar [--conjuntos train sintetico_pequeno ...]
+    python benchmarks/verificacao.py [--conjuntos ...]
+
+Com '--congelar', as páginas do commit inicial ('REFERENCIA') são extraídas com 'git archive' em uma pasta
+temporária, com o CSV do conjunto no lugar do 'train.csv', e executadas pelo 'AppTest' do Streamlit em cada cenário
+(data do controle deslizante e tipos de tráfego). O que elas mostram (métricas, tabelas e os dados dos gráficos) é
+gravado em 'benchmarks/golden/<conjunto>.json', junto com os empates de tempo que o ranking de entregadores pode
+resolver de outra forma. Esses arquivos fazem parte do repositório e só devem ser congelados de novo quando o
+arquivo de origem mudar.
+
+Sem '--congelar', os mesmos painéis são calculados com as funções atuais das páginas, sobre todos os caminhos de
+carga atuais dos dados (limpeza direta, partições da atualização incremental e colunas da memória compartilhada),
+e comparados com os resultados congelados, com a tolerância de cada painel. O resumo do período (agregados diários
+acumulados) é comparado com os totais que as páginas originais mostram. O código de saída é 1 se alguma comparação
+falhar. Os testes ('tests/test_verificacao.py') fazem a mesma verificação.
+
+Os conjuntos são o 'train.csv' e bases sintéticas no mesmo formato, geradas com semente fixa e com os casos que o
+'train.csv' tem pouco: empates de tempo, latitudes negativas, coordenadas zeradas, poucos pedidos com festival.
+"""
+import os
+import sys
+import csv
+import json
+import math
+import logging
+import base64
+import hashlib
+import argparse
+import datetime
+import tempfile
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RAIZ_PROJETO = Path( __file__ ).resolve().parent.parent
+if str( RAIZ_PROJETO ) not in sys.path:
+    sys.path.insert( 0, str( RAIZ_PROJETO ) )
+
+from benchmarks.tempo_importacao import extrair_versao
+from utils import memoria_compartilhada
+from utils.fonte_dados import ler_particao
+from utils.limpeza import clear_dataframe
+from utils.atualizacao import AtualizadorDados, VersaoDados, VARIAVEL_RELATORIO
+from utils.periodos import PrefixosDiarios
+from utils.hierarquia_geo import HierarquiaGeografica
+from utils.exportar import filtrar, TRAFEGOS, INICIO_PADRAO, FIM_PADRAO
+from utils.visao_restaurantes import (mean_std_time_festival, distancia_media, distance_distribution, section_chart,
+                                      bar_chart, sunburst_chart)
+from utils.visao_entregadores import rapidez_entregadores, agrupar_media_std, ratings_per_delivers, buscar_extremo
+from utils.visao_empresa import (order_by_day, deliver_by_traffic, order_by_city_traffic, order_by_week,
+                                 order_share_by_week)
+
+#=====================================================================================================================
+
+# RESULTADOS DE REFERÊNCIA (GOLDEN) E VERIFICAÇÃO DAS IMPLEMENTAÇÕES
+
+#=====================================================================================================================
+
+PASTA_GOLDEN = RAIZ_PROJETO / 'benchmarks' / 'golden'
+
+# Commit com as páginas originais, que servem de referência.
+REFERENCIA = 'ca65c22'
+
+PAGINAS = { 'restaurantes': 'pages/1_Visão_Restaurantes.py',
+            'entregadores': 'pages/2_Visão_Entregadores.py',
+            'empresa': 'pages/3_Visão_Empresa.py' }
+
+# Bases sintéticas: nome -> (semente, quantidade de linhas).
+CONJUNTOS_SINTETICOS = { 'sintetico_pequeno': ( 1, 400 ),
+                         'sintetico_medio': ( 2, 20000 ) }
+
+# Cenários: data do controle deslizante (exclusiva) e tipos de tráfego selecionados. As páginas originais não têm
+# data inicial; as atuais começam no primeiro dia do controle, que é também o primeiro dia das bases.
+CENARIOS = { 'periodo_padrao': ( FIM_PADRAO, TRAFEGOS ),
+             'parcial': ( datetime.datetime( 2022, 3, 15 ), [ 'Low', 'Jam' ] ) }
+
+# Tolerância de cada painel: None para comparação exata; 'rel' e 'abs' como em math.isclose; 'float32' para os
+# gráficos que passam por 'compactar_figura', em que o valor obtido tem que ser o valor de referência convertido
+# para float32. As métricas são comparadas como o texto mostrado na página. A distância é calculada pela fórmula
+# vetorizada em vez da biblioteca 'haversine', e as médias e desvios dependem da ordem das linhas (as partições são
+# concatenadas por mês), o que muda só os últimos dígitos.
+SOMA = { 'rel': 1e-12, 'abs': 0 }
+TOLERANCIAS = { 'entregadores_unicos': None,
+                'distancia_media': None,
+                'festival': None,
+                'distancia_por_cidade': SOMA,
+                'tempo_por_cidade': SOMA,
+                'tempo_por_cidade_trafego': SOMA,
+                'tempo_por_cidade_pedido': SOMA,
+                'idades_condicoes': None,
+                'avaliacoes_por_entregador': SOMA,
+                'avaliacoes_por_trafego': SOMA,
+                'avaliacoes_por_clima': SOMA,
+                'mais_rapidos': 'ranking',
+                'mais_lentos': 'ranking',
+                'pedidos_por_dia': None,
+                'entregas_por_trafego': 'float32',
+                'entregas_por_cidade_trafego': None,
+                'pedidos_por_semana': None,
+                'pedidos_por_entregador_semana': 'float32' }
+
+# O resumo do período é comparado com totais derivados dos painéis congelados (somas e médias ponderadas).
+TOLERANCIA_RESUMO = { 'rel': 1e-12, 'abs': 0 }
+
+
+#---------------------------------------------------------------------------------------------------------------------
+# Painéis: as métricas, as tabelas e os gráficos de cada página, na ordem em que aparecem, viram dicionários simples.
+# A mesma conversão é usada para o que as páginas originais mostram no 'AppTest' e para as funções atuais.
+#---------------------------------------------------------------------------------------------------------------------
+
+def _valores( valores ):
+    # Arrays numéricos de figuras do plotly 6 vêm em base64 ('typed arrays'); o resto, como lista.
+    if isinstance( valores, dict ) and 'bdata' in valores:
+        return np.frombuffer( base64.b64decode( valores[ 'bdata' ] ), dtype = valores[ 'dtype' ] ).tolist()
+    return list( valores )
+
+
+def _numero( valor ):
+    return int( valor ) if isinstance( valor, ( int, np.integer ) ) else float( valor )
+
+
+def _tabela( df, chaves, colunas ):
+    # { 'chave1/chave2': valor ou [valores] } a partir das colunas de uma tabela.
+    resultado = {}
+    for linha in df[ chaves + colunas ].itertuples( index = False, name = None ):
+        valores = [ _numero( valor ) for valor in linha[ len( chaves ): ] ]
+        resultado[ '/'.join( str( chave ) for chave in linha[ :len( chaves ) ] ) ] = valores[ 0 ] if len( valores ) == 1 else valores
+    return resultado
+
+
+def _ranking( df ):
+    return [ [ str( cidade ), str( entregador ), int( tempo ) ]
+             for cidade, entregador, tempo in df[ [ 'City', 'Delivery_person_ID', 'Time_taken(min)' ] ].itertuples( index = False ) ]
+
+
+def paineis( pagina, metricas, tabelas, figuras ):
+    """
+        Converte o que uma página mostra em um dicionário de painéis que pode ser gravado em JSON.
+
+        Parâmetros:
+        - pagina: 'restaurantes', 'entregadores' ou 'empresa'.
+        - metricas: textos das métricas ('st.metric'), na ordem da página.
+        - tabelas: DataFrames das tabelas ('st.dataframe'), sem a tabela dos dados filtrados do topo da página.
+        - figuras: figuras plotly em dicionário (o JSON da figura), na ordem da página.
+
+        Retorna:
+        - { painel: valor }.
+    """
+    tracos = [ figura[ 'data' ] for figura in figuras ]
+    if pagina == 'restaurantes':
+        pizza, barras, sunburst = tracos[ 0 ][ 0 ], tracos[ 1 ][ 0 ], tracos[ 2 ][ 0 ]
+        folhas = [ ( i, ident ) for i, ident in enumerate( sunburst[ 'ids' ] ) if '/' in ident ]
+        valores, cores = _valores( sunburst[ 'values' ] ), _valores( sunburst[ 'marker' ][ 'colors' ] )
+        return {
+            'entregadores_unicos': metricas[ 0 ],
+            'distancia_media': metricas[ 1 ],
+            'festival': dict( zip( [ 'mean_com_festival', 'std_com_festival', 'mean_sem_festival', 'std_sem_festival' ],
+                                   metricas[ 2:6 ] ) ),
+            'distancia_por_cidade': dict( zip( _valores( pizza[ 'labels' ] ), _valores( pizza[ 'values' ] ) ) ),
+            'tempo_por_cidade': { cidade: [ media, desvio ] for cidade, media, desvio in
+                                  zip( _valores( barras[ 'x' ] ), _valores( barras[ 'y' ] ), _valores( barras[ 'error_y' ][ 'array' ] ) ) },
+            'tempo_por_cidade_trafego': { ident: [ valores[ i ], cores[ i ] ] for i, ident in folhas },
+            'tempo_por_cidade_pedido': _tabela( tabelas[ 0 ], [ 'City', 'Type_of_order' ], [ 'avg_time', 'std_time' ] ),
+        }
+    if pagina == 'entregadores':
+        return {
+            'idades_condicoes': dict( zip( [ 'maior_idade', 'menor_idade', 'melhor_condicao', 'pior_condicao' ], metricas ) ),
+            'avaliacoes_por_entregador': _tabela( tabelas[ 0 ], [ 'Delivery_person_ID' ], [ 'Delivery_person_Ratings' ] ),
+            'avaliacoes_por_trafego': _tabela( tabelas[ 1 ], [ 'Road_traffic_density' ], [ 'media', 'desvio_padrao' ] ),
+            'avaliacoes_por_clima': _tabela( tabelas[ 2 ], [ 'Weatherconditions' ], [ 'media', 'desvio_padrao' ] ),
+            'mais_rapidos': _ranking( tabelas[ 3 ] ),
+            'mais_lentos': _ranking( tabelas[ 4 ] ),
+        }
+    barras, pizza, semanas, razao = tracos[ 0 ][ 0 ], tracos[ 1 ][ 0 ], tracos[ 3 ][ 0 ], tracos[ 4 ][ 0 ]
+    return {
+        'pedidos_por_dia': { str( dia )[ :10 ]: int( n ) for dia, n in zip( _valores( barras[ 'x' ] ), _valores( barras[ 'y' ] ) ) },
+        'entregas_por_trafego': dict( zip( _valores( pizza[ 'labels' ] ), _valores( pizza[ 'values' ] ) ) ),
+        # Um traço por cidade no gráfico de dispersão:
+        'entregas_por_cidade_trafego': { f'{cidade}/{trafego}': int( n ) for traco in tracos[ 2 ]
+                                         for cidade, trafego, n in zip( _valores( traco[ 'x' ] ), _valores( traco[ 'y' ] ),
+                                                                        _valores( traco[ 'marker' ][ 'size' ] ) ) },
+        'pedidos_por_semana': { semana: int( n ) for semana, n in zip( _valores( semanas[ 'x' ] ), _valores( semanas[ 'y' ] ) ) },
+        'pedidos_por_entregador_semana': dict( zip( _valores( razao[ 'x' ] ), _valores( razao[ 'y' ] ) ) ),
+    }
+
+
+def empates_permitidos( df ):
+    """
+        Empates de tempo no corte do ranking de entregadores (o 10º de cada cidade): quando há mais entregadores com
+        o tempo do corte do que vagas no ranking, qualquer escolha entre eles mostra o mesmo ranking.
+
+        Parâmetros:
+        - df: DataFrame filtrado, como a página mostra no topo.
+
+        Retorna:
+        - { ranking: { cidade: { 'tempo', 'vagas', 'candidatos' } } }, só com as cidades que têm empate no corte.
+    """
+    resultado = {}
+    for nome, agregacao, crescente in ( ( 'mais_rapidos', 'min', True ), ( 'mais_lentos', 'max', False ) ):
+        tempos = df.groupby( [ 'City', 'Delivery_person_ID' ] )[ 'Time_taken(min)' ].agg( agregacao )
+        resultado[ nome ] = {}
+        for cidade in ( 'Metropolitian', 'Semi-Urban', 'Urban' ):
+            if cidade not in tempos.index.get_level_values( 0 ):
+                continue
+            da_cidade = tempos.loc[ cidade ].sort_values( ascending = crescente )
+            corte = da_cidade.iloc[ :10 ].iloc[ -1 ]
+            vagas = int( ( da_cidade.iloc[ :10 ] == corte ).sum() )
+            candidatos = sorted( da_cidade.index[ da_cidade == corte ] )
+            if len( candidatos ) > vagas:
+                resultado[ nome ][ cidade ] = { 'tempo': int( corte ), 'vagas': vagas, 'candidatos': candidatos }
+    return resultado
+
+
+#---------------------------------------------------------------------------------------------------------------------
+# Páginas originais, executadas pelo 'AppTest'
+#---------------------------------------------------------------------------------------------------------------------
+
+def _executar_original( raiz, pagina, fim, trafego ):
+    from streamlit.testing.v1 import AppTest
+
+    # As páginas originais leem 'train.csv' e 'logo.png' a partir da pasta atual.
+    pasta_atual = os.getcwd()
+    os.chdir( raiz )
+    try:
+        app = AppTest.from_file( str( Path( raiz ) / PAGINAS[ pagina ] ), default_timeout = 600 )
+        app.run()
+        app.sidebar.slider[ 0 ].set_value( fim )
+        app.sidebar.multiselect[ 0 ].set_value( list( trafego ) )
+        app.run()
+    finally:
+        os.chdir( pasta_atual )
+    if len( app.exception ):
+        raise RuntimeError( f'{PAGINAS[ pagina ]} ({fim:%Y-%m-%d}, {trafego}): {app.exception[ 0 ].value}' )
+
+    tabelas = [ elemento.value for elemento in app.dataframe ]
+    figuras = [ json.loads( elemento.proto.spec ) for elemento in app.get( 'plotly_chart' ) ]
+    return paineis( pagina, [ str( metrica.value ) for metrica in app.metric ], tabelas[ 1: ], figuras ), tabelas[ 0 ]
+
+
+def _congelar_cenarios( raiz ):
+    cenarios = {}
+    for cenario, ( fim, trafego ) in CENARIOS.items():
+        cenarios[ cenario ] = { 'fim': fim.date().isoformat(), 'trafego': list( trafego ), 'paineis': {} }
+        for pagina in PAGINAS:
+            resultado, df1 = _executar_original( raiz, pagina, fim, trafego )
+            cenarios[ cenario ][ 'paineis' ].update( resultado )
+            if pagina == 'entregadores':
+                cenarios[ cenario ][ 'empates' ] = empates_permitidos( df1 )
+    return cenarios
+
+
+#---------------------------------------------------------------------------------------------------------------------
+# Páginas atuais: as mesmas funções que as páginas chamam, sobre os dados já filtrados.
+#---------------------------------------------------------------------------------------------------------------------
+
+def _figura( fig ):
+    return json.loads( fig.to_json() )
+
+
+def paineis_atuais( df1 ):
+    """
+        Calcula os painéis das três páginas com as funções atuais, a partir dos dados filtrados.
+    """
+    festival = [ str( mean_std_time_festival( df1.copy(), funcao = funcao, Festival = festival ) )
+                 for festival in ( True, False ) for funcao in ( 'mean', 'std' ) ]
+    resultado = paineis( 'restaurantes',
+                         [ str( df1[ 'Delivery_person_ID' ].nunique() ), f"{distancia_media( df1.copy() ):.2f} km" ] + festival,
+                         [ distance_distribution( df1 ) ],
+                         [ _figura( section_chart( df1.copy() ) ), _figura( bar_chart( df1 ) ), _figura( sunburst_chart( df1 ) ) ] )
+    resultado.update( paineis( 'entregadores',
+                               [ str( buscar_extremo( df1, 'Delivery_person_Age', max ) ),
+                                 str( buscar_extremo( df1, 'Delivery_person_Age', min ) ),
+                                 str( buscar_extremo( df1, 'Vehicle_condition', max ) ),
+                                 str( buscar_extremo( df1, 'Vehicle_condition', min ) ) ],
+                               [ ratings_per_delivers( df1 ),
+                                 agrupar_media_std( df1, 'Delivery_person_Ratings', 'Road_traffic_density' ),
+                                 agrupar_media_std( df1, 'Delivery_person_Ratings', 'Weatherconditions' ),
+                                 rapidez_entregadores( df1, high_speed = True ),
+                                 rapidez_entregadores( df1, high_speed = False ) ],
+                               [] ) )
+    df_empresa = df1.copy()
+    resultado.update( paineis( 'empresa', [], [],
+                               [ _figura( order_by_day( df_empresa ) ), _figura( deliver_by_traffic( df_empresa ) ),
+                                 _figura( order_by_city_traffic( df_empresa ) ), _figura( order_by_week( df_empresa ) ),
+                                 _figura( order_share_by_week( df_empresa ) ) ] ) )
+    return resultado
+
+
+def resumo_esperado( paineis_congelados ):
+    """
+        Totais do período derivados do que as páginas originais mostram: pedidos (soma das barras por dia),
+        entregadores únicos (métrica) e média e desvio padrão do tempo, combinados a partir da média e do desvio de
+        cada cidade e tráfego ('sunburst') ponderados pela quantidade de pedidos de cada um (gráfico de dispersão).
+    """
+    celulas = paineis_congelados[ 'tempo_por_cidade_trafego' ]
+    contagens = paineis_congelados[ 'entregas_por_cidade_trafego' ]
+    n = np.array( [ contagens[ chave ] for chave in celulas ], dtype = float )
+    media = np.array( [ celulas[ chave ][ 0 ] for chave in celulas ] )
+    desvio = np.nan_to_num( np.array( [ celulas[ chave ][ 1 ] for chave in celulas ], dtype = float ) )
+    total = n.sum()
+    media_total = ( n * media ).sum() / total
+    soma_quadrados = ( ( n - 1 ) * desvio ** 2 ).sum() + ( n * ( media - media_total ) ** 2 ).sum()
+    return { 'pedidos': sum( paineis_congelados[ 'pedidos_por_dia' ].values() ),
+             'tempo_medio': float( media_total ),
+             'tempo_std': float( math.sqrt( soma_quadrados / ( total - 1 ) ) ) if total > 1 else float( 'nan' ),
+             'entregadores': int( paineis_congelados[ 'entregadores_unicos' ] ) }
+
+
+#---------------------------------------------------------------------------------------------------------------------
+# Caminhos de carga: cada um recebe o CSV bruto e uma pasta temporária e retorna uma 'VersaoDados'.
+#---------------------------------------------------------------------------------------------------------------------
+
+def _carga_limpeza( caminho, pasta ):
+    df = clear_dataframe( ler_particao( caminho ) )
+    return VersaoDados( 0, (), df, None, prefixos = PrefixosDiarios( df ) )
+
+
+def _carga_particoes( caminho, pasta ):
+    # Divide o CSV em um arquivo por mês, sem reescrever os valores, e carrega pela atualização incremental.
+    destino = Path( pasta ) / 'particoes'
+    destino.mkdir()
+    with open( caminho, newline = '', encoding = 'utf-8' ) as arquivo:
+        leitor = csv.reader( arquivo )
+        cabecalho = next( leitor )
+        coluna_data = cabecalho.index( 'Order_Date' )
+        meses = {}
+        for linha in leitor:
+            dia, mes, ano = ( linha[ coluna_data ].strip().split( '-' ) + [ '', '', '' ] )[ :3 ]
+            meses.setdefault( f'{ano}-{mes}' if ano and mes else 'sem_data', [] ).append( linha )
+    for mes, linhas in meses.items():
+        with open( destino / f'pedidos_{mes}.csv', 'w', newline = '', encoding = 'utf-8' ) as arquivo:
+            escritor = csv.writer( arquivo )
+            escritor.writerow( cabecalho )
+            escritor.writerows( linhas )
+    return AtualizadorDados( config = { 'caminho': destino, 'padrao': '*.csv' } ).atual()
+
+
+def _carga_compartilhada( caminho, pasta ):
+    # Publica a versão das partições em uma pasta compartilhada e lê de volta as colunas e os agregados mapeados em
+    # memória, como um processo que se anexa à versão publicada.
+    versao = _carga_particoes( caminho, pasta )
+    destino = Path( pasta ) / 'compartilhado'
+    destino.mkdir()
+    memoria_compartilhada.publicar( versao, destino )
+    meta, df, df_restaurantes, estruturas = memoria_compartilhada.anexar( destino, memoria_compartilhada.versao_publicada( destino ) )
+    return VersaoDados( meta[ 'versao' ], meta[ 'assinatura' ], df, df_restaurantes, meta[ 'particoes' ],
+                        tuple( meta[ 'fins' ] ), meta[ 'qualidade' ], PrefixosDiarios.de_estado( estruturas[ 'prefixos' ] ),
+                        meta[ 'criada_em' ], HierarquiaGeografica.de_estado( estruturas[ 'hierarquia' ] ) )
+
+
+CAMINHOS = { 'limpeza': _carga_limpeza,
+             'particoes': _carga_particoes,
+             'compartilhado': _carga_compartilhada }
+
+
+#---------------------------------------------------------------------------------------------------------------------
+# Bases sintéticas
+#---------------------------------------------------------------------------------------------------------------------
+
+# Regiões das bases sintéticas (prefixo do ID e centro aproximado).
+_REGIOES = { 'INDO': ( 22.72, 75.88 ), 'BANG': ( 12.97, 77.62 ), 'MUM': ( 19.08, 72.88 ),
+             'COIMB': ( 11.00, 76.97 ), 'KOC': ( 10.00, 76.31 ) }
+
+
+def gerar_sintetico( semente, linhas ):
+    """
+        Gera uma base no formato bruto do 'train.csv' (com os espaços, os 'NaN ' e o '(min) 24'), com semente fixa.
+
+        Parâmetros:
+        - semente: semente do gerador.
+        - linhas: quantidade de linhas.
+
+        Retorna:
+        - DataFrame bruto, para ser gravado em CSV.
+    """
+    rng = np.random.default_rng( semente )
+    prefixos = list( _REGIOES )
+    regiao = rng.integers( 0, len( prefixos ), linhas )
+    restaurante = rng.integers( 1, 21, linhas )
+    entregador = rng.integers( 1, 4, linhas )
+    centro = np.array( [ _REGIOES[ p ] for p in prefixos ] )[ regiao ]
+
+    # Cada restaurante tem uma coordenada fixa; algumas linhas vêm com o sinal trocado ou zeradas, como na base real.
+    deslocamento = np.random.default_rng( semente + 1000 ).uniform( -0.08, 0.08, ( len( prefixos ), 21, 2 ) )
+    rest_lat = centro[ :, 0 ] + deslocamento[ regiao, restaurante, 0 ]
+    rest_lon = centro[ :, 1 ] + deslocamento[ regiao, restaurante, 1 ]
+    sorteio = rng.random( linhas )
+    rest_lat = np.where( sorteio < 0.04, -rest_lat, rest_lat )
+    zeradas = ( sorteio >= 0.04 ) & ( sorteio < 0.06 )
+    rest_lat, rest_lon = np.where( zeradas, 0.0, rest_lat ), np.where( zeradas, 0.0, rest_lon )
+    entrega_lat = np.abs( rest_lat ) + rng.choice( [ 0.01, 0.02, 0.03, 0.04, 0.05 ], linhas ) * rng.choice( [ -1, 1 ], linhas )
+    entrega_lon = np.abs( rest_lon ) + rng.choice( [ 0.01, 0.02, 0.03, 0.04, 0.05 ], linhas ) * rng.choice( [ -1, 1 ], linhas )
+
+    dias = pd.Timestamp( '2022-02-11' ) + pd.to_timedelta( rng.integers( 0, 55, linhas ), unit = 'D' )
+    minuto_pedido = rng.integers( 8 * 60, 24 * 60, linhas ) // 5 * 5
+    minuto_coleta = ( minuto_pedido + rng.choice( [ 5, 10, 15 ], linhas ) ) % ( 24 * 60 )
+
+    def ausente( valores, fracao ):
+        # Troca uma fração dos valores pelo 'NaN ' da base original (sempre na primeira linha, para que a coluna
+        # seja lida como texto, como no 'train.csv', mesmo nas bases pequenas).
+        faltantes = rng.random( linhas ) < fracao
+        faltantes[ 0 ] = True
+        return np.where( faltantes, 'NaN ', np.asarray( valores, dtype = object ) )
+
+    def horario( minutos ):
+        return [ f'{m // 60:02d}:{m % 60:02d}:00' for m in minutos ]
+
+    return pd.DataFrame( {
+        'ID': [ f'0x{i:04x} ' for i in range( linhas ) ],
+        'Delivery_person_ID': [ f'{prefixos[ g ]}RES{r:02d}DEL{e:02d} ' for g, r, e in zip( regiao, restaurante, entregador ) ],
+        'Delivery_person_Age': ausente( rng.integers( 20, 40, linhas ).astype( str ), 0.03 ),
+        'Delivery_person_Ratings': np.round( rng.uniform( 3.5, 5.0, linhas ), 1 ),
+        'Restaurant_latitude': np.round( rest_lat, 6 ),
+        'Restaurant_longitude': np.round( rest_lon, 6 ),
+        'Delivery_location_latitude': np.round( entrega_lat, 6 ),
+        'Delivery_location_longitude': np.round( entrega_lon, 6 ),
+        'Order_Date': dias.strftime( '%d-%m-%Y' ),
+        'Time_Orderd': ausente( horario( minuto_pedido ), 0.03 ),
+        'Time_Order_picked': horario( minuto_coleta ),
+        'Weatherconditions': 'conditions ' + pd.Series( rng.choice( [ 'Sunny', 'Stormy', 'Fog', 'NaN' ], linhas, p = [ 0.4, 0.3, 0.28, 0.02 ] ) ),
+        'Road_traffic_density': rng.choice( [ 'Low ', 'Medium ', 'High ', 'Jam ', 'NaN ' ], linhas, p = [ 0.3, 0.25, 0.2, 0.23, 0.02 ] ),
+        'Vehicle_condition': rng.integers( 0, 3, linhas ),
+        'Type_of_order': rng.choice( [ 'Snack ', 'Meal ', 'Drinks ', 'Buffet ' ], linhas ),
+        'Type_of_vehicle': rng.choice( [ 'motorcycle ', 'scooter ', 'electric_scooter ' ], linhas ),
+        'multiple_deliveries': ausente( rng.integers( 0, 3, linhas ).astype( str ), 0.02 ),
+        'Festival': rng.choice( [ 'No ', 'Yes ', 'NaN ' ], linhas, p = [ 0.95, 0.03, 0.02 ] ),
+        'City': rng.choice( [ 'Metropolitian ', 'Urban ', 'Semi-Urban ', 'NaN ' ], linhas, p = [ 0.6, 0.3, 0.08, 0.02 ] ),
+        # Tempos inteiros em uma faixa curta, para haver muitos empates no ranking de entregadores:
+        'Time_taken(min)': [ f'(min) {t}' for t in rng.integers( 10, 55, linhas ) ],
+    } )
+
+
+def _arquivo_conjunto( conjunto, pasta ):
+    # CSV bruto do conjunto e a identificação da origem gravada junto com os resultados congelados.
+    if conjunto == 'train':
+        caminho = RAIZ_PROJETO / 'train.csv'
+        with open( caminho, 'rb' ) as arquivo:
+            return caminho, { 'arquivo': 'train.csv', 'sha256': hashlib.sha256( arquivo.read() ).hexdigest() }
+    semente, linhas = CONJUNTOS_SINTETICOS[ conjunto ]
+    caminho = Path( pasta ) / f'{conjunto}.csv'
+    gerar_sintetico( semente, linhas ).to_csv( caminho, index = False )
+    return caminho, { 'semente': semente, 'linhas': linhas }
+
+
+#---------------------------------------------------------------------------------------------------------------------
+# Comparação
+#---------------------------------------------------------------------------------------------------------------------
+
+def _proximo( esperado, obtido, tolerancia ):
+    if isinstance( esperado, float ) and isinstance( obtido, float ) and math.isnan( esperado ):
+        return math.isnan( obtido )
+    if tolerancia is None or isinstance( esperado, ( str, bool ) ) or isinstance( obtido, ( str, bool ) ):
+        return type( esperado ) is type( obtido ) and esperado == obtido
+    if tolerancia == 'float32':
+        return np.float32( esperado ) == np.float32( obtido ) and obtido == float( np.float32( obtido ) )
+    return math.isclose( esperado, obtido, rel_tol = tolerancia[ 'rel' ], abs_tol = tolerancia[ 'abs' ] )
+
+
+def comparar( esperado, obtido, tolerancia, caminho = '' ):
+    """
+        Compara dois resultados (dicionários, listas, números e textos, como no JSON) e retorna a lista de
+        diferenças. Números são comparados com a tolerância do painel; o resto, de forma exata.
+    """
+    if isinstance( esperado, dict ) and isinstance( obtido, dict ):
+        diferencas = [ f'{caminho}/{chave}: ausente' for chave in esperado if chave not in obtido ]
+        diferencas += [ f'{caminho}/{chave}: inesperada' for chave in obtido if chave not in esperado ]
+        for chave in esperado:
+            if chave in obtido:
+                diferencas += comparar( esperado[ chave ], obtido[ chave ], tolerancia, f'{caminho}/{chave}' )
+        return diferencas
+    if isinstance( esperado, list ) and isinstance( obtido, list ):
+        if len( esperado ) != len( obtido ):
+            return [ f'{caminho}: {len( obtido )} itens, esperado {len( esperado )}' ]
+        diferencas = []
+        for i, ( a, b ) in enumerate( zip( esperado, obtido ) ):
+            diferencas += comparar( a, b, tolerancia, f'{caminho}[{i}]' )
+        return diferencas
+    if _proximo( esperado, obtido, tolerancia ):
+        return []
+    return [ f'{caminho}: {obtido!r}, esperado {esperado!r}' ]
+
+
+def comparar_ranking( esperado, obtido, empates ):
+    """
+        Compara um ranking de entregadores, linha a linha. A única diferença aceita é a escolha entre os
+        entregadores empatados no tempo do corte de uma cidade, quando o resultado congelado registra esse empate
+        (ver 'empates_permitidos'): as linhas com o tempo do corte têm que ser entregadores distintos da lista de
+        candidatos, em qualquer ordem.
+    """
+    diferencas = []
+    for cidade in dict.fromkeys( linha[ 0 ] for linha in esperado + obtido ):
+        a = [ linha for linha in esperado if linha[ 0 ] == cidade ]
+        b = [ linha for linha in obtido if linha[ 0 ] == cidade ]
+        if [ linha[ 2 ] for linha in a ] != [ linha[ 2 ] for linha in b ]:
+            diferencas.append( f'/{cidade}: tempos {[ linha[ 2 ] for linha in b ]}, esperado {[ linha[ 2 ] for linha in a ]}' )
+            continue
+        empate = empates.get( cidade )
+        corte = empate[ 'tempo' ] if empate else None
+        if [ linha for linha in a if linha[ 2 ] != corte ] != [ linha for linha in b if linha[ 2 ] != corte ]:
+            diferencas.append( f'/{cidade}: entregadores {[ linha[ 1 ] for linha in b ]}, esperado {[ linha[ 1 ] for linha in a ]}' )
+        elif empate:
+            escolhidos = [ linha[ 1 ] for linha in b if linha[ 2 ] == corte ]
+            if len( set( escolhidos ) ) != empate[ 'vagas' ] or not set( escolhidos ) <= set( empate[ 'candidatos' ] ):
+                diferencas.append( f'/{cidade}: empatados {escolhidos}, esperado {empate[ "vagas" ]} de {empate[ "candidatos" ]}' )
+    return diferencas
+
+
+#---------------------------------------------------------------------------------------------------------------------
+# Congelamento e verificação
+#---------------------------------------------------------------------------------------------------------------------
+
+def congelar( conjuntos ):
+    """
+        Executa as páginas do commit de referência sobre cada conjunto, em todos os cenários, e grava o que elas
+        mostram em 'benchmarks/golden/<conjunto>.json'.
+
+        Retorna:
+        - Lista com os arquivos gravados.
+    """
+    gravados = []
+    with tempfile.TemporaryDirectory() as pasta:
+        raiz = Path( pasta ) / 'referencia'
+        extrair_versao( REFERENCIA, raiz )
+        for conjunto in conjuntos:
+            caminho, origem = _arquivo_conjunto( conjunto, pasta )
+            ( raiz / 'train.csv' ).write_bytes( Path( caminho ).read_bytes() )
+            golden = { 'conjunto': conjunto,
+                       'origem': origem,
+                       'referencia': REFERENCIA,
+                       'congelado_em': datetime.date.today().isoformat(),
+                       'cenarios': _congelar_cenarios( raiz ) }
+            PASTA_GOLDEN.mkdir( parents = True, exist_ok = True )
+            destino = PASTA_GOLDEN / f'{conjunto}.json'
+            with open( destino, 'w', encoding = 'utf-8' ) as arquivo:
+                json.dump( golden, arquivo, indent = 2, ensure_ascii = False )
+            gravados.append( destino )
+    return gravados
+
+
+def verificar( conjunto ):
+    """
+        Calcula os painéis atuais em todos os caminhos de carga e cenários e compara com os resultados congelados do
+        conjunto.
+
+        Retorna:
+        - Lista de tuplas (cenário, painel, caminho, diferenças).
+    """
+    with open( PASTA_GOLDEN / f'{conjunto}.json', encoding = 'utf-8' ) as arquivo:
+        golden = json.load( arquivo )
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho, origem = _arquivo_conjunto( conjunto, pasta )
+        if origem != golden[ 'origem' ]:
+            # O arquivo mudou desde o congelamento: os resultados não são mais comparáveis.
+            return [ ( '-', '-', '-', [ f"origem {origem}, congelada {golden['origem']}" ] ) ]
+
+        for nome_caminho, carga in CAMINHOS.items():
+            with tempfile.TemporaryDirectory( dir = pasta ) as pasta_caminho:
+                versao = carga( caminho, pasta_caminho )
+                for cenario, ( fim, trafego ) in CENARIOS.items():
+                    esperado = golden[ 'cenarios' ][ cenario ]
+                    df1 = filtrar( versao, INICIO_PADRAO, fim, trafego )
+                    # O JSON não distingue tuplas de listas: os valores obtidos passam pelo mesmo caminho.
+                    obtido = json.loads( json.dumps( paineis_atuais( df1 ) ) )
+                    for painel, valor in esperado[ 'paineis' ].items():
+                        if TOLERANCIAS[ painel ] == 'ranking':
+                            diferencas = comparar_ranking( valor, obtido[ painel ], esperado[ 'empates' ][ painel ] )
+                        else:
+                            diferencas = comparar( valor, obtido[ painel ], TOLERANCIAS[ painel ] )
+                        resultados.append( ( cenario, painel, nome_caminho, diferencas ) )
+
+                    resumo = versao.prefixos.resumo( INICIO_PADRAO, fim, trafego )
+                    diferencas = comparar( resumo_esperado( esperado[ 'paineis' ] ),
+                                           { chave: resumo[ chave ] for chave in ( 'pedidos', 'tempo_medio', 'tempo_std', 'entregadores' ) },
+                                           TOLERANCIA_RESUMO )
+                    resultados.append( ( cenario, 'resumo_periodo', nome_caminho, diferencas ) )
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser( description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter )
+    conjuntos = [ 'train' ] + list( CONJUNTOS_SINTETICOS )
+    parser.add_argument( '--conjuntos', nargs = '+', choices = conjuntos, default = conjuntos,
+                         help = 'conjuntos de dados (padrão: todos)' )
+    parser.add_argument( '--congelar', action = 'store_true',
+                         help = f'grava o que as páginas de {REFERENCIA} mostram como referência, em vez de verificar' )
+    args = parser.parse_args()
+
+    warnings.simplefilter( "ignore" )
+    # O 'AppTest' roda as páginas sem servidor e o Streamlit registra um aviso para cada comando de layout:
+    logging.disable( logging.WARNING )
+    # A verificação carrega os dados por conta própria, sem se anexar à pasta compartilhada do dashboard e sem
+    # sobrescrever o relatório de qualidade do monitoramento com o das bases sintéticas:
+    os.environ.pop( memoria_compartilhada.VARIAVEL_PASTA, None )
+    os.environ.pop( VARIAVEL_RELATORIO, None )
+
+    if args.congelar:
+        for destino in congelar( args.conjuntos ):
+            sys.stdout.write( f'{destino}\n' )
+        return
+
+    falhas = 0
+    for conjunto in args.conjuntos:
+        if not ( PASTA_GOLDEN / f'{conjunto}.json' ).exists():
+            sys.stdout.write( f'{conjunto}: sem resultados congelados (rode com --congelar)\n' )
+            falhas += 1
+            continue
+        for cenario, painel, caminho, diferencas in verificar( conjunto ):
+            situacao = 'OK' if not diferencas else 'FALHA'
+            sys.stdout.write( f'{conjunto:<18} {cenario:<15} {painel:<30} {caminho:<14} {situacao}\n' )
+            for diferenca in diferencas[ :5 ]:
+                sys.stdout.write( f'    {diferenca}\n' )
+            falhas += bool( diferencas )
+    sys.exit( 1 if falhas else 0 )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,19 @@
 import streamlit as st
-import folium
-from streamlit_folium import folium_static
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import folium as fl
 import warnings
 import datetime
-from haversine import haversine, Unit
-from PIL import Image
-import plotly.graph_objects as go
+from utils.logo import caminho_logo
+from utils.atualizacao import dados_atuais
+from utils.periodos import MODOS_COMPARACAO, periodo_comparacao, delta
+from utils.agregacoes import tempos_por_hora_cidade
+from utils.visao_restaurantes import ( distance_distribution, sunburst_chart, bar_chart, section_chart,
+                                       mean_std_time_festival, distancia_media, prep_time_heatmap, time_by_hour_chart,
+                                       geo_sunburst_chart )
+from utils.restaurantes import posicoes_por_restaurante, pedidos_do_restaurante
+
+# As bibliotecas de visualização (plotly) são importadas dentro das funções que desenham os gráficos, para que
+# a página não pague o custo de importação delas antes de precisar de um gráfico.
 
 # Desabilita todos os avisos
 warnings.simplefilter("ignore")
@@ -26,230 +30,58 @@ st.set_page_config(
 
 #=====================================================================================================================
 
-def distance_distribution( df ):
+@st.cache_data
+def hour_city_times( _df, versao, periodo, trafego ):
     """
-    Esta função constrói um novo DataFrame com o tempo médio de entrega e o desvio padrão deste tempo, agrupados por cidade e por tipo de pedido.
+    Esta função guarda em cache a agregação por hora do dia e cidade, para que ela não seja refeita a cada interação
+    quando os filtros não mudam. O DataFrame não entra na chave do cache (o Streamlit teria que calcular o hash de
+    todos os pedidos a cada execução): a chave são a versão dos dados e os filtros.
 
     Parâmetros:
-    - df: DataFrame com as colunas 'City', 'Time_taken(min)' e 'Type_of_order'.
+    - _df: DataFrame limpo e filtrado.
+    - versao, periodo, trafego: chave do cache (versão dos dados, período e tipos de tráfego selecionados).
 
     Retorno:
-    _ df_aux: um novo DataFrame com o tempo médio e o desvio padrão do tempo das entregas.
+    - DataFrame com as colunas 'order_hour', 'City', 'pedidos', 'avg_prep_min' e 'avg_time'.
     """
-    df_aux = (df1.loc[:, ['City', 'Time_taken(min)', 'Type_of_order']]
-                 .groupby(['City', 'Type_of_order'])
-                 .agg({'Time_taken(min)':['mean', 'std']}))
-    
-    df_aux.columns = ['avg_time', 'std_time']
-    df_aux = df_aux.reset_index()
-    return( df_aux )
-    
-def sunburst_chart( df ):
-    """
-    Esta função retorna um gráfico ao estilo 'sunburst' com a distribuição do tempo de entrega por cidade e densidade
-    de tráfego.
-
-    Parâmetros:
-    - df: DataFrame com as colunas 'City', 'Time_taken(min)' e 'Road_traffic_density'.
+    return( tempos_por_hora_cidade( _df ) )
 
-    Retorno:
-    - Um gráfico ao estilo 'sunburst' com a distribuição do tempo de entrega por cidade e densidade de tráfego.
+@st.cache_data
+def restaurant_positions( _restaurant_id, versao, periodo, trafego ):
     """
-    df_aux = ( df1.loc[:, ['City', 'Time_taken(min)', 'Road_traffic_density']]
-                  .groupby(['City', 'Road_traffic_density'])
-                  .agg({'Time_taken(min)' : ['mean', 'std']}) )
-
-    df_aux.columns = ['avg_time', 'std_time']
-    df_aux = df_aux.reset_index()
-
-    fig = px.sunburst(df_aux, path = ['City', 'Road_traffic_density'], 
-                      values = 'avg_time', color = 'std_time', 
-                      color_continuous_scale = 'RdBu', 
-                      color_continuous_midpoint = np.average(df_aux['std_time']))
-    return( fig )
-    
-def bar_chart( df ):
-    """
-    Esta função retorna um gráfico de barras com a distribuição do tempo, por cidade.
+    Esta função guarda em cache as posições dos pedidos de cada restaurante para os filtros atuais, permitindo o
+    detalhamento de um restaurante sem percorrer todos os pedidos a cada interação.
 
     Parâmetros:
-    - df: DataFrame com as colunas 'City' e 'Time_taken(min)'.
+    - _restaurant_id: array com o ID do restaurante de cada pedido filtrado.
+    - versao, periodo, trafego: chave do cache (versão dos dados, período e tipos de tráfego selecionados).
 
     Retorno:
-    - Um gráfico de barras com a distribuição do tempo de entrega por cidade.
-    """
-    df_aux = (df1.loc[:, ['City', 'Time_taken(min)']]
-                 .groupby('City')
-                 .agg({'Time_taken(min)':['mean', 'std']}))
-    df_aux.columns = ['avg_time', 'std_time']
-    df_aux = df_aux.reset_index()
-
-    fig = go.Figure()
-    fig.add_trace(go.Bar(name = 'control', 
-                         x = df_aux['City'], y = df_aux['avg_time'], 
-                         error_y = dict(type = 'data', 
-                                        array = df_aux['std_time'])))
-    fig.update_layout(barmode = 'group')
-    return( fig )
-            
-def section_chart( df ):
+    - Tupla (ordem, limites) retornada por 'posicoes_por_restaurante'.
     """
-    Esta função retorna um gráfico de seção com o tempo médio de entrega por cidade.
+    return( posicoes_por_restaurante( _restaurant_id ) )
 
-    Parâmetros:
-    - df: DataFrame com as colunas 'Restaurant_latitude', 'Restaurant_longitude', 'Delivery_location_latitude',      'Delivery_location_longitude'.
-
-    Retorno:
-    - Gráfico de seção com o tempo médio de entrega por cidade.
+@st.cache_data
+def geo_sums( _df, _hierarquia, versao, periodo, trafego ):
     """
-    
-    cols = ([ 'Restaurant_latitude', 
-              'Restaurant_longitude', 
-              'Delivery_location_latitude', 
-              'Delivery_location_longitude' ])
-
-    df1[ 'distance' ] = df1.loc[ :, cols].apply( lambda x :  haversine( (x['Restaurant_latitude'], 
-                                                                         x['Restaurant_longitude']), 
-                                                                        (x['Delivery_location_latitude'], 
-                                                                         x['Delivery_location_longitude']), 
-                                                                         unit = Unit.KILOMETERS), axis = 1)
-    avg_distance = df1.loc[:, ['City', 'distance']].groupby('City').mean().reset_index()
-    fig = go.Figure(data = [go.Pie(labels = avg_distance['City'], 
-                                   values = avg_distance['distance'], 
-                                   pull = [0, 0.1, 0])])
-    return( fig )
-
-
-def mean_std_time_festival(df, funcao='mean', Festival=True):
-    """
-    Função que calcula o tempo médio ou o desvio padrão do tempo das entregas,
-    durante ou fora do período de festival.
+    Esta função guarda em cache as somas por restaurante dos pedidos filtrados, das quais saem todos os níveis da
+    hierarquia geográfica: descer ou subir de nível não passa de novo pelos pedidos.
 
     Parâmetros:
-    - df: DataFrame com as colunas 'Time_taken(min)' e 'Festival'
-    - funcao: 'mean' para média ou 'std' para desvio padrão
-    - Festival: True para entregas durante o festival, False para fora dele
+    - _df: DataFrame limpo e filtrado (fora da chave do cache).
+    - _hierarquia: hierarquia geográfica da versão dos dados.
+    - versao, periodo, trafego: chave do cache (versão dos dados, período e tipos de tráfego selecionados).
 
     Retorno:
-    - Valor float com 2 casas decimais, de acordo com a função e condição escolhidas
-    """
-    
-    df_aux = (df.loc[:, ['Time_taken(min)', 'Festival']]
-                .groupby('Festival')
-                .agg({'Time_taken(min)': ['mean', 'std']}))
-
-    df_aux.columns = ['avg_time', 'std_time']
-    df_aux = df_aux.reset_index()
-
-    # Define a linha do DataFrame com base na escolha do festival
-    if Festival:
-        condicao = 'Yes'
-    else:
-        condicao = 'No'
-
-    # Aplica a função escolhida
-    if funcao == 'mean':
-        resultado = np.round(df_aux.loc[df_aux['Festival'] == condicao, 'avg_time'], 2)
-    elif funcao == 'std':
-        resultado = np.round(df_aux.loc[df_aux['Festival'] == condicao, 'std_time'], 2)
-    else:
-        raise ValueError("A função deve ser 'mean' ou 'std'.")
-
-    return resultado.values[0]  # retorna apenas o número, não uma Series
-
-
-def distancia_media( df ):
-    """
-        Função que calcula a distância média das entregas tomando como referência a localização dos restaurantes e das entregas.
-
-        Parâmetros:
-        - df: DataFrame.
-
-        Retorna:
-        - A distância média das entregas em relação à localização dos restaurantes.
-    """
-    cols = ([ 'Restaurant_latitude', 
-             'Restaurant_longitude', 
-             'Delivery_location_latitude', 
-             'Delivery_location_longitude' ])
-    
-    df1[ 'distance' ] = df.loc[ :, cols].apply( lambda x :  haversine( (x['Restaurant_latitude'], 
-                                                                         x['Restaurant_longitude']), 
-                                                                        (x['Delivery_location_latitude'], 
-                                                                         x['Delivery_location_longitude']), 
-                                                                        unit = Unit.KILOMETERS), axis = 1)
-    
-    # Cálculo da média da distância das cidades
-    distancia_media = df['distance'].mean()
-    return ( distancia_media )
-
-def clear_dataframe( df1 ):
-    """
-        Função que provoca uma limpeza de nosso DataFrame: tirando espaços, mudando os tipos de variáveis e dropando as linhas em que não há dados.
-
-        Parâmetros:
-        - df: Nosso DataFrame bruto.
-
-        Retorna:
-        - df: Novo DataFrame com todas as limpezas necessárias.        
+    - Array retornado por 'HierarquiaGeografica.somas'.
     """
-    # Vamos retirar os espaços das strings:
-    df1.loc[:,'ID'] = df1.loc[:,'ID'].str.strip()
-    df1.loc[:,'Delivery_person_ID'] = df1.loc[:,'Delivery_person_ID'].str.strip()
-    df1.loc[:,'Road_traffic_density'] = df1.loc[:,'Road_traffic_density'].str.strip()
-    df1.loc[:,'Delivery_person_ID'] = df1.loc[:,'Delivery_person_ID'].str.strip()
-    df1.loc[:,'Type_of_order'] = df1.loc[:,'Type_of_order'].str.strip()
-    df1.loc[:,'Type_of_vehicle'] = df1.loc[:,'Type_of_vehicle'].str.strip()
-    df1.loc[:,'Festival'] = df1.loc[:,'Festival'].str.strip()
-    df1.loc[:,'City'] = df1.loc[:,'City'].str.strip()
-    df1.loc[:,'multiple_deliveries'] = df1.loc[:,'multiple_deliveries'].str.strip()
-    df1.loc[:,'Delivery_person_Age'] = df1.loc[:,'Delivery_person_Age'].str.strip()
-    
-    # Agora vamos retirar aquelas linhas em que não há informações, para isso vamos usar uma condição nas linhas de todas as colunas e verificar em quantas linhas não há informações
-    linhas_selecionadas = df1.loc[ :, 'Delivery_person_Ratings' ] != 'NaN'
-    df1 = df1.loc[ linhas_selecionadas, : ]
-    linhas_selecionadas = df1[ 'multiple_deliveries' ] != 'NaN'
-    df1 = df1.loc[ linhas_selecionadas, : ]
-    linhas_selecionadas = df1[ 'Weatherconditions' ] != 'conditions NaN'
-    df1 = df1.loc[ linhas_selecionadas, : ]
-    linhas_selecionadas = df1[ 'Road_traffic_density' ] != 'NaN'
-    df1 = df1.loc[ linhas_selecionadas, : ]
-    linhas_selecionadas = df1[ 'City' ] != 'NaN'
-    df1 = df1.loc[ linhas_selecionadas, : ]
-    linhas_selecionadas = df1[ 'Festival' ] != 'NaN'
-    df1 = df1.loc[ linhas_selecionadas, : ]
-    linhas_selecionadas = df1[ 'Delivery_person_Age' ] != 'NaN'
-    df1 = df1.loc[ linhas_selecionadas, : ]
-    
-     # Corrigir a coluna Time_taken(min):
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].astype(str).str.extract(r'(\d+)')  # extrai o número
-    df1 = df1.dropna(subset=['Time_taken(min)'])  # remove linhas sem número
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].astype(int)
-
-    df1 = df1.reset_index( drop = True )
-    
-    # Vamos mudar os tipos de variáveis de algumas features que estão como 'object' e mudar a configuração da data da coluna 'Order_Date'
-    df1[ 'Delivery_person_Age' ] = df1[ 'Delivery_person_Age' ].astype( int )
-    df1[ 'Delivery_person_Ratings' ] = df1[ 'Delivery_person_Ratings' ].astype( float )
-    df1[ 'multiple_deliveries' ] = df1[ 'multiple_deliveries' ].astype( int )
-    df1[ 'Order_Date' ] = pd.to_datetime( df1[ 'Order_Date' ], format = '%d-%m-%Y' )
-    
-    return( df1 )
+    return( _hierarquia.somas( _df ) )
 
 #-----------------------------------INÍCIO DA ESTRUTURA DO CÓDIGO----------------------------------------
 #--------------------------------------------------------------------------------------------------------
 # O erro que estava ocorrendo e que me tomou um bom tempo, foi que eu não havia chamado a função 'clear_dataframe' # # para a limpeza, por isso o date_slider ainda estava com a estrutura de string, não podendo ser comparada com o si-
 # nal '>'.
 
-# Lendo o nosso Dataframe:
-df = pd.read_csv( 'train.csv' )
-# marco_ftc_python/dataset/train.csv
-
-# Primeiro fazemos a cópia de nosso Dataframe para preservar os dados iniciais, se algo fora de nosso escopo ocorrer:
-df1 = df.copy()
-
-df1 = clear_dataframe( df1 )
-
 #========================================================================================================
 # LAYOUT DA BARRA LATERAL
 #========================================================================================================
@@ -258,29 +90,35 @@ df1 = clear_dataframe( df1 )
 st.header( 'Marketplace - Visão Restaurantes' )
 
 # Vamos colocar o nosso logotipo na barra lateral:
-#image_path = 'logo.png'
-#marco_ftc_python/projeto_ftc_dashboard/logo.png
-image = Image.open('logo.png')
-st.sidebar.image( image, width = 300 )
+# (versão já redimensionada e guardada em cache, em vez de decodificar o 'logo.png' original a cada execução)
+st.sidebar.image( caminho_logo(), width = 300 )
 
 # Escrevendo o nome da empresa na barra lateral:
 st.sidebar.markdown( '# Tasty Trials' )
 st.sidebar.markdown( '# Fastest Delivery in the Town' )
 st.sidebar.markdown( """___""" )
 
-# Fazendo a seleção de datas na barra lateral:
-st.sidebar.markdown( '## Selecione a data limite:' )
-date_slider = st.sidebar.slider("Qual é a data para a visualização?", 
-                                     value = datetime.datetime( 2022, 4, 13 ), 
+# Fazendo a seleção do período na barra lateral (a data final é exclusiva, como a antiga data limite):
+st.sidebar.markdown( '## Selecione o período:' )
+data_inicio, date_slider = st.sidebar.slider("Qual é o período para a visualização?", 
+                                     value = ( datetime.datetime( 2022, 2, 11 ), datetime.datetime( 2022, 4, 13 ) ), 
                                      min_value = datetime.datetime( 2022, 2, 11 ),
                                      max_value = datetime.datetime( 2022, 6, 4 ),
                                      format = 'DD-MM-YYYY')
 
-if date_slider is not None:
-    data_formatada = date_slider.strftime( "%d/%m/%Y" )
-    st.header( f"Data selecionada: {data_formatada}" )
-else:
-    st.header( "Nenhuma data selecionada" )
+data_formatada = f"{data_inicio.strftime( '%d/%m/%Y' )} a {date_slider.strftime( '%d/%m/%Y' )}"
+st.header( f"Período selecionado: {data_formatada}" )
+
+# Período de comparação para os indicadores (semana anterior, período anterior de mesma duração ou outro período):
+modo_comparacao = st.sidebar.selectbox( "Comparar com", MODOS_COMPARACAO )
+personalizado = None
+if modo_comparacao == 'Período personalizado':
+    personalizado = st.sidebar.slider("Qual é o período de comparação?", 
+                                      value = ( datetime.datetime( 2022, 2, 11 ), datetime.datetime( 2022, 3, 13 ) ), 
+                                      min_value = datetime.datetime( 2022, 2, 11 ),
+                                      max_value = datetime.datetime( 2022, 6, 4 ),
+                                      format = 'DD-MM-YYYY')
+periodo_base = periodo_comparacao( data_inicio, date_slider, modo_comparacao, personalizado )
 st.sidebar.markdown("""___""")
 
 # Criando uma choice box com as opções de tipo de tráfego, para filtrar ainda mais os nossos gráficos:
@@ -299,8 +137,24 @@ st.sidebar.markdown("""___""")
 # Escrevendo quem criou a página:
 st.sidebar.markdown( '## Criado pela Comunidade DS :heart:' )
 
+# Lendo o nosso Dataframe. Os dados (de 'FTC_FONTE_DADOS', 'fonte_dados.json' ou 'train.csv') são lidos e limpos
+# por uma thread em segundo plano, que publica uma versão nova sempre que os arquivos mudam. Pegamos a versão atual
+# uma única vez, para que toda a página use os mesmos dados, e só as partições que cobrem o período selecionado e o
+# de comparação:
+inicio_dados, fim_dados = data_inicio, date_slider
+if periodo_base:
+    inicio_dados, fim_dados = min( data_inicio, periodo_base[ 0 ] ), max( date_slider, periodo_base[ 1 ] )
+dados = dados_atuais( fim_dados, inicio_dados )
+if not dados.cobre( fim_dados, inicio_dados ):
+    # As partições que faltam são carregadas em segundo plano: a página não espera por elas.
+    st.info( "Parte do período ainda está sendo carregada; os pedidos aparecem na próxima interação com a página." )
+df1 = dados.ate( date_slider, data_inicio )
+
+# Índice de restaurantes, construído junto com cada versão dos dados (antes dos filtros):
+df_restaurantes = dados.df_restaurantes
+
 # Filtros de Datas
-linhas_selecionadas = df1['Order_Date'] < date_slider
+linhas_selecionadas = ( df1['Order_Date'] >= data_inicio ) & ( df1['Order_Date'] < date_slider )
 df1 = df1.loc[linhas_selecionadas, :]
 
 # Filtros de Tipo de Trânsito
@@ -309,16 +163,33 @@ df1 = df1.loc[linhas_selecionadas, :]
 
 st.dataframe( df1 )
 
+# Resumo do período selecionado e do período de comparação, calculados a partir dos agregados acumulados por dia
+# (cada período é a diferença entre dois prefixos, sem refazer os agrupamentos):
+resumo_atual = dados.prefixos.resumo( data_inicio, date_slider, selecionados )
+resumo_base = dados.prefixos.resumo( *periodo_base, selecionados ) if periodo_base else {}
+
+# Indicadores do período com a variação em relação ao período de comparação:
+with st.container():
+    col1, col2, col3 = st.columns( 3 )
+    col1.metric( 'Pedidos no período', resumo_atual[ 'pedidos' ],
+                 delta( resumo_atual[ 'pedidos' ], resumo_base.get( 'pedidos' ) ) )
+    col2.metric( 'Tempo médio de entrega (min)', f"{resumo_atual['tempo_medio']:.2f}",
+                 delta( resumo_atual[ 'tempo_medio' ], resumo_base.get( 'tempo_medio' ) ), delta_color = 'inverse' )
+    col3.metric( 'Desvio padrão do tempo (min)', f"{resumo_atual['tempo_std']:.2f}",
+                 delta( resumo_atual[ 'tempo_std' ], resumo_base.get( 'tempo_std' ) ), delta_color = 'inverse' )
+
 #===============================================================================
 # LAYOUT DO STREAMLIT
 #===============================================================================
 
 # Primeiro criamos as abas das diferentes visões possíveis de nossa análise
-abas = [ 'Visão Gerencial', '_', '_' ]
-tab1, tab2, tab3 = st.tabs(abas)
+abas = [ 'Visão Gerencial', 'Visão por Horário', 'Restaurantes', 'Hierarquia Geográfica' ]
+# Só a visão escolhida é executada: com 'st.tabs' o Streamlit roda o conteúdo de todas as abas a cada interação
+# (e importa plotly e folium mesmo para as que não são vistas).
+visao = st.radio( 'Visão', abas, horizontal = True, label_visibility = 'collapsed' )
 
 # Aqui começamos a construir a primeira aba
-with tab1:
+if visao == abas[ 0 ]:
     # Separamos um espaço que irá conter as nossas colunas e já definimos o título deste espaço:
     with st.container():
         st.title( 'Overall Metrics' )
@@ -383,5 +254,85 @@ with tab1:
     with st.container():
         st.markdown( """___""" )
         st.title( "Distribuição da Distância" )
-        df_aux = distance_distribution( df )        
+        df_aux = distance_distribution( df1 )        
         st.dataframe( df_aux )
+
+if visao == abas[ 1 ]:
+    # Agregação por hora do dia e cidade, calculada uma vez para os filtros atuais e reaproveitada pelos gráficos:
+    df_hora = hour_city_times( df1, dados.versao, ( data_inicio, date_slider ), tuple( selecionados ) )
+
+    with st.container():
+        st.title( "Tempo de Preparo por Hora e Cidade" )
+        fig = prep_time_heatmap( df_hora )
+        st.plotly_chart( fig, use_container_width = True )
+
+    with st.container():
+        st.markdown( """___""" )
+        st.title( "Tempo de Entrega por Hora do Pedido" )
+        fig = time_by_hour_chart( df_hora )
+        st.plotly_chart( fig, use_container_width = True )
+
+if visao == abas[ 2 ]:
+    with st.container():
+        st.title( "Ranking de Restaurantes" )
+
+        metricas = { 'Quantidade de pedidos': 'pedidos',
+                     'Tempo médio de entrega': 'avg_time',
+                     'Distância média': 'distancia_media',
+                     'Tempo médio de preparo': 'avg_prep_min' }
+        col1, col2 = st.columns( 2 )
+        with col1:
+            metrica = st.selectbox( "Ordenar por", list( metricas ) )
+        with col2:
+            crescente = st.checkbox( "Ordem crescente", value = False )
+
+        df_ranking = df_restaurantes.sort_values( metricas[ metrica ], ascending = crescente ).head( 20 )
+        st.dataframe( df_ranking )
+
+    with st.container():
+        st.markdown( """___""" )
+        st.title( "Detalhamento por Restaurante" )
+
+        restaurante = st.selectbox( "Qual restaurante?", df_restaurantes.index,
+                                    format_func = lambda rid: df_restaurantes.at[ rid, 'codigo' ] )
+        info = df_restaurantes.loc[ restaurante ]
+
+        col1, col2, col3, col4 = st.columns( 4 )
+        col1.metric( 'Pedidos', int( info[ 'pedidos' ] ) )
+        col2.metric( 'Entregadores', int( info[ 'entregadores' ] ) )
+        col3.metric( 'Distância média', f"{info['distancia_media']:.2f} km" )
+        col4.metric( 'Tempo médio', f"{info['avg_time']:.2f} min" )
+
+        # Pedidos do restaurante dentro dos filtros atuais, acessados pelas posições pré-calculadas:
+        ordem, limites = restaurant_positions( df1[ 'restaurant_id' ].to_numpy(), dados.versao,
+                                               ( data_inicio, date_slider ), tuple( selecionados ) )
+        if restaurante + 1 < len( limites ):
+            st.dataframe( pedidos_do_restaurante( df1, ordem, limites, restaurante ) )
+        else:
+            st.write( "Nenhum pedido deste restaurante nos filtros selecionados" )
+
+if visao == abas[ 3 ]:
+    # Região metropolitana (prefixo do ID) -> zona da grade -> restaurante. Só o nível escolhido é montado e enviado
+    # ao navegador, a partir das somas por restaurante guardadas em cache para os filtros atuais:
+    hierarquia = dados.hierarquia
+    somas_geo = geo_sums( df1, hierarquia, dados.versao, ( data_inicio, date_slider ), tuple( selecionados ) )
+
+    col1, col2 = st.columns( 2 )
+    with col1:
+        metro = st.selectbox( "Região metropolitana", [ None ] + list( hierarquia.metros ),
+                              format_func = lambda nome: 'Todas' if nome is None else nome )
+    zona = None
+    if metro is not None:
+        with col2:
+            zona = st.selectbox( "Zona", [ None ] + hierarquia.zonas_do_metro( metro ),
+                                 format_func = lambda nome: 'Todas' if nome is None else nome )
+    nivel = 'metro' if metro is None else 'zona' if zona is None else 'restaurante'
+    df_nivel = hierarquia.nivel( somas_geo, nivel, metro, zona )
+
+    with st.container():
+        st.title( "Tempo de Entrega por Região" )
+        if len( df_nivel ):
+            st.plotly_chart( geo_sunburst_chart( df_nivel ), use_container_width = True )
+            st.dataframe( df_nivel )
+        else:
+            st.write( "Nenhum pedido nos filtros selecionados" )
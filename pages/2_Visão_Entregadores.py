@@ -1,14 +1,17 @@
 import streamlit as st
-import folium
-from streamlit_folium import folium_static
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import folium as fl
 import warnings
 import datetime
-from haversine import haversine, Unit
-from PIL import Image
+from utils.logo import caminho_logo
+from utils.atualizacao import dados_atuais
+from utils.periodos import MODOS_COMPARACAO, periodo_comparacao, delta
+from utils.carga_entregadores import analisar_carga
+from utils.visao_entregadores import ( rapidez_entregadores, agrupar_media_std, ratings_per_delivers, buscar_extremo,
+                                       peak_concurrency_chart )
+
+# As bibliotecas de visualização (plotly) são importadas dentro das funções que desenham os gráficos, para que
+# a página não pague o custo de importação delas antes de precisar de um gráfico.
 
 # Desabilita todos os avisos
 warnings.simplefilter("ignore")
@@ -25,155 +28,25 @@ st.set_page_config(
 
 #=====================================================================================================================
 
-def rapidez_entregadores( df, high_speed = True ):
-    """
-        Agrupa os dados pelas colunas de agrupamento e ordena os entregadores mais rápidos por cidade.
-
-        Parâmetros:
-        - df: DataFrame de entrada
-        - high_speed (bool): Se 'True' calcula o tempo dos entregadores mais rápidos, por cidade. Se 'False' calcula o tempo dos entregadores mais lentos, por cidade 
-
-        Retorna: um DataFrame com os 10 entregadores mais rápidos agrupados por cidade ou com os 10 entregadores mais lentos, dependendo do valor do segundo parâmetro.
-        
-    """
-    if high_speed:
-        cols = ['Time_taken(min)', 'City', 'Delivery_person_ID']
-    
-        df2 = (df1.loc[:, cols]
-                  .groupby(['City', 'Delivery_person_ID'])
-                  .min()
-                  .sort_values( ['City', 'Time_taken(min)'] )
-                  .reset_index())
-        df_aux01 = df2.loc[df2['City'] == 'Metropolitian', :].head(10)
-        df_aux02 = df2.loc[df2['City'] == 'Semi-Urban', :].head(10)
-        df_aux03 = df2.loc[df2['City'] == 'Urban', :].head(10)
-        df_resultado = pd.concat( [df_aux01, df_aux02, df_aux03] ).reset_index()
-    
-    else:
-        cols = ['Time_taken(min)', 'City', 'Delivery_person_ID']
-
-        df2 = (df1.loc[:, cols].groupby(['City', 'Delivery_person_ID'])
-                  .max()
-                  .sort_values( ['City', 'Time_taken(min)'], ascending = False )
-                  .reset_index())
-        df_aux01 = df2.loc[df2['City'] == 'Metropolitian', :].head(10)
-        df_aux02 = df2.loc[df2['City'] == 'Semi-Urban', :].head(10)
-        df_aux03 = df2.loc[df2['City'] == 'Urban', :].head(10)
-        df_resultado = pd.concat( [df_aux01, df_aux02, df_aux03] ).reset_index()
-    return df_resultado
-
-def agrupar_media_std( df, col_ref, col_agrupamento ):
-    """
-        Agrupa os dados pela coluna de agrupamento e calcula a média e o desvio padrão
-        da coluna de referência.
-
-        Parâmetros:
-        - df: DataFrame de entrada
-        - col_ref: coluna de referência que terá a média e o desvio padrão calculados
-        - col_agrupamento: coluna para agrupar os dados
-
-        Retorna:
-        - DataFrame com índice col_agrupamento e colunas: 'media' e 'desvio_padrao'
-    """
-    df_resultado = ( df[[ col_ref, col_agrupamento]]
-                    .groupby( col_agrupamento )
-                    .agg( media = ( col_ref, 'mean' ), desvio_padrao = ( col_ref, 'std' ) )
-                    .reset_index()
-                   )
-    return df_resultado
-
-def ratings_per_delivers( df ):
-    """
-        Retorna um Dataframe com a média das avaliações de cada entregador.
-
-        Parâmetros:
-        - df: Dataframe
-
-        Retorna: 
-        - df_avg_ratings_per_deliver: um novo Dataframe com as médias de todos os entregadores.
-
-    """
-        
-    df_avg_ratings_per_deliver = ( df1.loc[:,['Delivery_person_Ratings', 'Delivery_person_ID']]
-                                      .groupby( ['Delivery_person_ID'] )
-                                      .mean()
-                                      .reset_index() )
-    return( df_avg_ratings_per_deliver )
-    
-def buscar_extremo( df, coluna, funcao ):
+@st.cache_data
+def workload_tables( _df, versao, periodo, trafego ):
     """
-        Retorna o valor mínimo ou máximo de uma coluna, conforme a
-        função passada.
+        Calcula e guarda em cache as tabelas de carga de trabalho (por entregador e por cidade) para os filtros atuais.
 
         Parâmetros:
-        - df: DataFrame
-        - coluna: nome da coluna (str)
-        - funcao: função a ser usada (ex: min ou max)
+        - _df: DataFrame limpo e filtrado (fora da chave do cache).
+        - versao, periodo, trafego: chave do cache (versão dos dados, período e tipos de tráfego selecionados).
 
         Retorna:
-        - Valor extremo da coluna.
+        - Tupla (df_entregadores, df_cidades) retornada por 'analisar_carga'.
     """
-    if coluna not in df.columns:
-        raise ValueError( f"A coluna '{coluna}' não existe no Dataframe" )
-    return funcao( df[ coluna ] )
-
-def clear_dataframe( df1 ):
-    # Vamos retirar os espaços das strings:
-    df1.loc[:,'ID'] = df1.loc[:,'ID'].str.strip()
-    df1.loc[:,'Delivery_person_ID'] = df1.loc[:,'Delivery_person_ID'].str.strip()
-    df1.loc[:,'Road_traffic_density'] = df1.loc[:,'Road_traffic_density'].str.strip()
-    df1.loc[:,'Delivery_person_ID'] = df1.loc[:,'Delivery_person_ID'].str.strip()
-    df1.loc[:,'Type_of_order'] = df1.loc[:,'Type_of_order'].str.strip()
-    df1.loc[:,'Type_of_vehicle'] = df1.loc[:,'Type_of_vehicle'].str.strip()
-    df1.loc[:,'Festival'] = df1.loc[:,'Festival'].str.strip()
-    df1.loc[:,'City'] = df1.loc[:,'City'].str.strip()
-    df1.loc[:,'multiple_deliveries'] = df1.loc[:,'multiple_deliveries'].str.strip()
-    df1.loc[:,'Delivery_person_Age'] = df1.loc[:,'Delivery_person_Age'].str.strip()
-    
-    # Agora vamos retirar aquelas linhas em que não há informações, para isso vamos usar uma condição nas linhas de todas as colunas e verificar em quantas linhas não há informações
-    linhas_selecionadas = df1.loc[ :, 'Delivery_person_Ratings' ] != 'NaN'
-    df1 = df1.loc[ linhas_selecionadas, : ]
-    linhas_selecionadas = df1[ 'multiple_deliveries' ] != 'NaN'
-    df1 = df1.loc[ linhas_selecionadas, : ]
-    linhas_selecionadas = df1[ 'Weatherconditions' ] != 'conditions NaN'
-    df1 = df1.loc[ linhas_selecionadas, : ]
-    linhas_selecionadas = df1[ 'Road_traffic_density' ] != 'NaN'
-    df1 = df1.loc[ linhas_selecionadas, : ]
-    linhas_selecionadas = df1[ 'City' ] != 'NaN'
-    df1 = df1.loc[ linhas_selecionadas, : ]
-    linhas_selecionadas = df1[ 'Festival' ] != 'NaN'
-    df1 = df1.loc[ linhas_selecionadas, : ]
-    linhas_selecionadas = df1[ 'Delivery_person_Age' ] != 'NaN'
-    df1 = df1.loc[ linhas_selecionadas, : ]
-    
-     # Corrigir a coluna Time_taken(min):
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].astype(str).str.extract(r'(\d+)')  # extrai o número
-    df1 = df1.dropna(subset=['Time_taken(min)'])  # remove linhas sem número
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].astype(int)
-    
-    df1 = df1.reset_index( drop = True )
-    
-    # Vamos mudar os tipos de variáveis de algumas features que estão como 'object' e mudar a configuração da data da coluna 'Order_Date'
-    df1[ 'Delivery_person_Age' ] = df1[ 'Delivery_person_Age' ].astype( int )
-    df1[ 'Delivery_person_Ratings' ] = df1[ 'Delivery_person_Ratings' ].astype( float )
-    df1[ 'multiple_deliveries' ] = df1[ 'multiple_deliveries' ].astype( int )
-    df1[ 'Order_Date' ] = pd.to_datetime( df1[ 'Order_Date' ], format = '%d-%m-%Y' )
-
-    return( df1 )
+    return analisar_carga( _df )
 
 #-----------------------------------INÍCIO DA ESTRUTURA DO CÓDIGO----------------------------------------
 #--------------------------------------------------------------------------------------------------------
 # O erro que estava ocorrendo e que me tomou um bom tempo, foi que eu não havia chamado a função 'clear_dataframe' # # para a limpeza, por isso o date_slider ainda estava com a estrutura de string, não podendo ser comparada com o si-
 # nal '>'.
 
-# Lendo o nosso Dataframe:
-df = pd.read_csv( 'train.csv' )
-
-# Primeiro fazemos a cópia de nosso Dataframe para preservar os dados iniciais, se algo fora de nosso escopo ocorrer:
-df1 = df.copy()
-
-df1 = clear_dataframe( df1 )
-
 #========================================================================================================
 # LAYOUT DA BARRA LATERAL
 #========================================================================================================
@@ -182,28 +55,35 @@ df1 = clear_dataframe( df1 )
 st.header( 'Marketplace - Visão Entregadores' )
 
 # Vamos colocar o nosso logotipo na barra lateral:
-#image_path = 'logo.png'
-image = Image.open('logo.png')
-st.sidebar.image( image, width = 300 )
+# (versão já redimensionada e guardada em cache, em vez de decodificar o 'logo.png' original a cada execução)
+st.sidebar.image( caminho_logo(), width = 300 )
 
 # Escrevendo o nome da empresa na barra lateral:
 st.sidebar.markdown( '# Tasty Trials' )
 st.sidebar.markdown( '# Fastest Delivery in the Town' )
 st.sidebar.markdown( """___""" )
 
-# Fazendo a seleção de datas na barra lateral:
-st.sidebar.markdown( '## Selecione a data limite:' )
-date_slider = st.sidebar.slider("Qual é a data para a visualização?", 
-                                     value = datetime.datetime( 2022, 4, 13 ), 
+# Fazendo a seleção do período na barra lateral (a data final é exclusiva, como a antiga data limite):
+st.sidebar.markdown( '## Selecione o período:' )
+data_inicio, date_slider = st.sidebar.slider("Qual é o período para a visualização?", 
+                                     value = ( datetime.datetime( 2022, 2, 11 ), datetime.datetime( 2022, 4, 13 ) ), 
                                      min_value = datetime.datetime( 2022, 2, 11 ),
                                      max_value = datetime.datetime( 2022, 6, 4 ),
                                      format = 'DD-MM-YYYY')
 
-if date_slider is not None:
-    data_formatada = date_slider.strftime( "%d/%m/%Y" )
-    st.header( f"Data selecionada: {data_formatada}" )
-else:
-    st.header( "Nenhuma data selecionada" )
+data_formatada = f"{data_inicio.strftime( '%d/%m/%Y' )} a {date_slider.strftime( '%d/%m/%Y' )}"
+st.header( f"Período selecionado: {data_formatada}" )
+
+# Período de comparação para os indicadores (semana anterior, período anterior de mesma duração ou outro período):
+modo_comparacao = st.sidebar.selectbox( "Comparar com", MODOS_COMPARACAO )
+personalizado = None
+if modo_comparacao == 'Período personalizado':
+    personalizado = st.sidebar.slider("Qual é o período de comparação?", 
+                                      value = ( datetime.datetime( 2022, 2, 11 ), datetime.datetime( 2022, 3, 13 ) ), 
+                                      min_value = datetime.datetime( 2022, 2, 11 ),
+                                      max_value = datetime.datetime( 2022, 6, 4 ),
+                                      format = 'DD-MM-YYYY')
+periodo_base = periodo_comparacao( data_inicio, date_slider, modo_comparacao, personalizado )
 st.sidebar.markdown("""___""")
 
 # Criando uma choice box com as opções de tipo de tráfego, para filtrar ainda mais os nossos gráficos:
@@ -222,8 +102,21 @@ st.sidebar.markdown("""___""")
 # Escrevendo quem criou a página:
 st.sidebar.markdown( '## Criado pela Comunidade DS :heart:' )
 
+# Lendo o nosso Dataframe. Os dados (de 'FTC_FONTE_DADOS', 'fonte_dados.json' ou 'train.csv') são lidos e limpos
+# por uma thread em segundo plano, que publica uma versão nova sempre que os arquivos mudam. Pegamos a versão atual
+# uma única vez, para que toda a página use os mesmos dados, e só as partições que cobrem o período selecionado e o
+# de comparação:
+inicio_dados, fim_dados = data_inicio, date_slider
+if periodo_base:
+    inicio_dados, fim_dados = min( data_inicio, periodo_base[ 0 ] ), max( date_slider, periodo_base[ 1 ] )
+dados = dados_atuais( fim_dados, inicio_dados )
+if not dados.cobre( fim_dados, inicio_dados ):
+    # As partições que faltam são carregadas em segundo plano: a página não espera por elas.
+    st.info( "Parte do período ainda está sendo carregada; os pedidos aparecem na próxima interação com a página." )
+df1 = dados.ate( date_slider, data_inicio )
+
 # Filtros de Datas
-linhas_selecionadas = df1['Order_Date'] < date_slider
+linhas_selecionadas = ( df1['Order_Date'] >= data_inicio ) & ( df1['Order_Date'] < date_slider )
 df1 = df1.loc[linhas_selecionadas, :]
 
 # Filtros de Tipo de Trânsito
@@ -232,14 +125,30 @@ df1 = df1.loc[linhas_selecionadas, :]
 
 st.dataframe( df1 )
 
+# Resumo do período selecionado e do período de comparação, calculados a partir dos agregados acumulados por dia
+# (cada período é a diferença entre dois prefixos, sem refazer os agrupamentos):
+resumo_atual = dados.prefixos.resumo( data_inicio, date_slider, selecionados )
+resumo_base = dados.prefixos.resumo( *periodo_base, selecionados ) if periodo_base else {}
+
+# Indicadores do período com a variação em relação ao período de comparação:
+with st.container():
+    col1, col2, col3 = st.columns( 3 )
+    col1.metric( 'Entregadores ativos', resumo_atual[ 'entregadores' ],
+                 delta( resumo_atual[ 'entregadores' ], resumo_base.get( 'entregadores' ) ) )
+    col2.metric( 'Pedidos por entregador', f"{resumo_atual['pedidos_por_entregador']:.2f}",
+                 delta( resumo_atual[ 'pedidos_por_entregador' ], resumo_base.get( 'pedidos_por_entregador' ) ) )
+    col3.metric( 'Tempo médio de entrega (min)', f"{resumo_atual['tempo_medio']:.2f}",
+                 delta( resumo_atual[ 'tempo_medio' ], resumo_base.get( 'tempo_medio' ) ), delta_color = 'inverse' )
+
 #=======================================================================================
 # LAYOUT DO STREAMLIT
 #=======================================================================================
 
-abas = ['Visão Gerencial', '_', '_']
-tab1, tab2, tab3 = st.tabs(abas)
+abas = ['Visão Gerencial', 'Carga de Trabalho', '_']
+# Uma visão por vez: a carga de trabalho só é calculada quando for escolhida.
+visao = st.radio( 'Visão', abas, horizontal = True, label_visibility = 'collapsed' )
 
-with tab1:
+if visao == abas[ 0 ]:
     st.write( "Conteúdo da aba 1" )
     with st.container():
         st.title( "Overall Metrics" )
@@ -307,8 +216,32 @@ with tab1:
             df3 = rapidez_entregadores( df1, high_speed = False )
             st.dataframe( df3 )
 
-with tab2:
-    st.write( "Conteúdo da aba 2" )
+if visao == abas[ 1 ]:
+    # Intervalos de cada entrega reconstruídos a partir da coleta e do tempo de entrega; a tabela fica em cache
+    # para os filtros atuais:
+    df_carga, df_carga_cidade = workload_tables( df1, dados.versao, ( data_inicio, date_slider ), tuple( selecionados ) )
+
+    with st.container():
+        st.title( "Carga de Trabalho por Cidade" )
+        st.dataframe( df_carga_cidade )
+
+    with st.container():
+        st.markdown( """___""" )
+        col1, col2 = st.columns( 2 )
+
+        with col1:
+            st.markdown( "### Pico de Entregas Simultâneas" )
+            if len( df_carga ):
+                st.plotly_chart( peak_concurrency_chart( df_carga ), use_container_width = True )
+
+        with col2:
+            st.markdown( "### Entregadores Mais Ocupados" )
+            st.dataframe( df_carga.sort_values( 'utilizacao', ascending = False ).head( 20 ) )
+
+    with st.container():
+        st.markdown( """___""" )
+        st.markdown( "### Maior Ociosidade entre Entregas" )
+        st.dataframe( df_carga.sort_values( 'ociosidade_media_min', ascending = False ).head( 20 ) )
 
-with tab3:
+if visao == abas[ 2 ]:
     st.write( "Conteúdo da aba 3" )
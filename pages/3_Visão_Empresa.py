@@ -1,14 +1,21 @@
 import streamlit as st
-import folium
-from streamlit_folium import folium_static
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import folium as fl
 import warnings
 import datetime
-from haversine import haversine, Unit
-from PIL import Image
+import json
+from utils.logo import caminho_logo
+from utils.atualizacao import dados_atuais
+from utils.periodos import MODOS_COMPARACAO, periodo_comparacao, delta
+from utils.qualidade import tabela_regras
+from utils.fonte_dados import ler_particao
+from utils.limpeza import clear_dataframe_previsao
+from utils.modelo import carregar_ou_treinar, prever, prever_variaveis, CATEGORICAS
+from utils.visao_empresa import ( geo_map, geo_drilldown, geo_level_map, order_share_by_week, order_by_week,
+                                   order_by_city_traffic, deliver_by_traffic, order_by_day, eta_by_city_traffic )
+
+# As bibliotecas de visualização (plotly e folium) são importadas dentro das funções que desenham os gráficos e o
+# mapa, para que a página não pague o custo de importação delas antes de precisar de cada painel.
 
 # Desabilita todos os avisos
 warnings.simplefilter("ignore")
@@ -27,135 +34,53 @@ st.set_page_config(
 
 def geo_vision( df1 ):
 
-    ### É uma função que recebe a nossa base de dados e retorna um mapa com as medianas das entregas feitas pelos restaurantes
+    ### É uma função que recebe a nossa base de dados e mostra o mapa com as medianas das entregas feitas pelos restaurantes
         
-        cols = ['Delivery_location_latitude', 'Delivery_location_longitude', 'City', 'Road_traffic_density']
-        df_aux = df1.loc[:, cols].groupby(['City', 'Road_traffic_density']).median().reset_index()
-        map = fl.Map()
-        for index, location_info in df_aux.iterrows():
-            latitude = location_info['Delivery_location_latitude']
-            longitude = location_info['Delivery_location_longitude']
-            fl.Marker([latitude, longitude]).add_to(map)
-        folium_static( map, width = 1024, height = 600 )
+        from streamlit_folium import folium_static
+
+        folium_static( geo_map( df1 ), width = 1024, height = 600 )
         return None
-    
-def order_share_by_week( df1 ):
-    ### É uma função que recebe a nossa base de dados e retorna um gráfico de linhas em que mostra a quantidade média de entregas por entregador por 
-    ### semana
-    
-    df_aux01 = (df1.loc[:,['ID','week_of_year']]
-                   .groupby('week_of_year')
-                   .count()
-                   .reset_index())
-    df_aux02 = (df1.loc[:, ['Delivery_person_ID', 'week_of_year']]
-                   .groupby('week_of_year')
-                   .nunique()
-                   .reset_index())
-    df_aux = pd.merge( df_aux01, df_aux02, how = 'inner')
-    df_aux['order_by_deliver'] = df_aux['ID']/df_aux['Delivery_person_ID']
-    fig = px.line( df_aux, x = 'week_of_year', y = 'order_by_deliver')
-    return fig
-
-def order_by_week( df1 ):
-    ### É uma função que recebe o nossa base de dados e retorna um gráfico de linhas em que mostra a quantidade de entregas por entregador por semana.
-    
-    df1['week_of_year'] = df1['Order_Date'].dt.strftime( '%U' )
-    df_aux = (df1.loc[:, ['ID','week_of_year']]
-                 .groupby('week_of_year')
-                 .count()
-                 .reset_index())
-    fig = px.line( df_aux, x = 'week_of_year', y = 'ID')
-    return fig
-
-def order_by_city_traffic( df1 ):
-    ### É uma função que recebe a nossa base de dados e retorna um gráfico de dispersão da quantidade de entregas por cidade e por tipo de tráfego.
-    
-    df_aux = (df1.loc[:, ['ID', 'City', 'Road_traffic_density']]
-                 .groupby(['City', 'Road_traffic_density'])
-                 .count()
-                 .reset_index())
-    df_aux = df_aux.loc[ df_aux['City'] != 'NaN', : ]
-    df_aux = df_aux.loc[ df_aux['Road_traffic_density'] != 'NaN', : ]
-    fig = px.scatter( df_aux, x = 'City', y = 'Road_traffic_density', size = 'ID', color = 'City')
-    return fig
-
-def deliver_by_traffic( df1 ):
-    ### Esta função recebe a nossa base de dados e retorna um gráfico de seção da quantidade de entregas por tipo de tráfego.
-    
-    df_aux = (df1.loc[:,['ID','Road_traffic_density']]
-                 .groupby('Road_traffic_density')
-                 .count()
-                 .reset_index())
-    df_aux['entregas_perc'] = df_aux['ID']/df_aux['ID'].sum()
-    fig = px.pie( df_aux, values = 'entregas_perc', names = 'Road_traffic_density' )
-    return fig
-    
-def order_by_day( df1 ):
-    ### Esta função recebe a nossa base de dados e retorna um gráfico de barras que tras a quantidade de entregas por dia da semana.
-    
-    df_aux = df1.loc[:, ['ID', 'Order_Date']].groupby(['Order_Date']).count().reset_index()
-    fig = px.bar(df_aux, x = 'Order_Date', y = 'ID')
-    return fig
-
-def clear_dataframe( df1 ):
-    ### Esta função é responsável pela limpeza de nosso Dataframe, seguindo os seguintes passos:
-        # 1. Retirando os espaços das strings.
-        # 2. Retirando as linhas em que não há informações.
-        # 3. Mudando os tipos de variáveis de algumas features que estão como 'object' 
-        # 4. Mudando a configuração da data da coluna 'Order_Date'
-    ### Temos como retorno o nosso Dataframe limpo para a nossa análise.
-
-    df1.loc[:,'ID'] = df1.loc[:,'ID'].str.strip()
-    df1.loc[:,'Delivery_person_ID'] = df1.loc[:,'Delivery_person_ID'].str.strip()
-    df1.loc[:,'Road_traffic_density'] = df1.loc[:,'Road_traffic_density'].str.strip()
-    df1.loc[:,'Delivery_person_ID'] = df1.loc[:,'Delivery_person_ID'].str.strip()
-    df1.loc[:,'Type_of_order'] = df1.loc[:,'Type_of_order'].str.strip()
-    df1.loc[:,'Type_of_vehicle'] = df1.loc[:,'Type_of_vehicle'].str.strip()
-    df1.loc[:,'Festival'] = df1.loc[:,'Festival'].str.strip()
-    df1.loc[:,'City'] = df1.loc[:,'City'].str.strip()
-    df1.loc[:,'multiple_deliveries'] = df1.loc[:,'multiple_deliveries'].str.strip()
-    df1.loc[:,'Delivery_person_Age'] = df1.loc[:,'Delivery_person_Age'].str.strip()
-    
-    linhas_selecionadas = df1.loc[ :, 'Delivery_person_Ratings' ] != 'NaN'
-    df1 = df1.loc[ linhas_selecionadas, : ]
-    linhas_selecionadas = df1[ 'multiple_deliveries' ] != 'NaN'
-    df1 = df1.loc[ linhas_selecionadas, : ]
-    linhas_selecionadas = df1[ 'Weatherconditions' ] != 'conditions NaN'
-    df1 = df1.loc[ linhas_selecionadas, : ]
-    linhas_selecionadas = df1[ 'Road_traffic_density' ] != 'NaN'
-    df1 = df1.loc[ linhas_selecionadas, : ]
-    linhas_selecionadas = df1[ 'City' ] != 'NaN'
-    df1 = df1.loc[ linhas_selecionadas, : ]
-    linhas_selecionadas = df1[ 'Festival' ] != 'NaN'
-    df1 = df1.loc[ linhas_selecionadas, : ]
-    linhas_selecionadas = df1[ 'Delivery_person_Age' ] != 'NaN'
-    df1 = df1.loc[ linhas_selecionadas, : ]
-    
-     # Corrigir a coluna Time_taken(min):
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].astype(str).str.extract(r'(\d+)')  # extrai o número
-    df1 = df1.dropna(subset=['Time_taken(min)'])  # remove linhas sem número
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].astype(int)
-    
-    df1 = df1.reset_index( drop = True )
-    
-    df1[ 'Delivery_person_Age' ] = df1[ 'Delivery_person_Age' ].astype( int )
-    df1[ 'Delivery_person_Ratings' ] = df1[ 'Delivery_person_Ratings' ].astype( float )
-    df1[ 'multiple_deliveries' ] = df1[ 'multiple_deliveries' ].astype( int )
-    df1[ 'Order_Date' ] = pd.to_datetime( df1[ 'Order_Date' ], format = '%d-%m-%Y' )
-
-    return( df1 )
+
+@st.cache_data
+def geo_sums( _df, _hierarquia, versao, periodo, trafego ):
+    ### Esta função guarda em cache as somas por restaurante dos pedidos filtrados, das quais saem todos os níveis do mapa
+    ### por região: descer ou subir de nível não passa de novo pelos pedidos.
+
+    return _hierarquia.somas( _df )
+
+def geo_drilldown_view( df1, dados, periodo, trafego ):
+    ### Esta função mostra o mapa de um nível da hierarquia geográfica (região metropolitana -> zona -> restaurante),
+    ### escolhido pelo usuário. Recebe a versão dos dados, o período e os tráfegos filtrados, que formam a chave do
+    ### cache das somas. Só os pontos do nível exibido vão para o navegador.
+
+        from streamlit_folium import folium_static
+
+        hierarquia = dados.hierarquia
+        somas_geo = geo_sums( df1, hierarquia, dados.versao, periodo, tuple( trafego ) )
+        col1, col2 = st.columns( 2 )
+        metro = col1.selectbox( "Região metropolitana", [ None ] + list( hierarquia.metros ),
+                                format_func = lambda nome: 'Todas' if nome is None else nome )
+        zona = None
+        if metro is not None:
+            zona = col2.selectbox( "Zona", [ None ] + hierarquia.zonas_do_metro( metro ),
+                                   format_func = lambda nome: 'Todas' if nome is None else nome )
+        df_nivel = geo_drilldown( hierarquia, somas_geo, metro, zona )
+        folium_static( geo_level_map( df_nivel ), width = 1024, height = 600 )
+        st.dataframe( df_nivel )
+        return None
+
+@st.cache_resource
+def eta_model( _df, assinatura ):
+    ### Esta função devolve o modelo de previsão do tempo de entrega da versão atual dos dados. O modelo é treinado uma única vez
+    ### por versão (e gravado em disco), e compartilhado por todas as sessões do processo.
+
+    return carregar_ou_treinar( _df, assinatura )
+
 #-----------------------------------INÍCIO DA ESTRUTURA DO CÓDIGO----------------------------------------
 #--------------------------------------------------------------------------------------------------------
 # O erro que estava ocorrendo e que me tomou um bom tempo, foi que eu não havia chamado a função 'clear_dataframe' # # para a limpeza, por isso o date_slider ainda estava com a estrutura de string, não podendo ser comparada com o si-
 # nal '>'.
 
-# Lendo o nosso Dataframe:
-df = pd.read_csv( 'train.csv' )
-
-# Primeiro fazemos a cópia de nosso Dataframe para preservar os dados iniciais, se algo fora de nosso escopo ocorrer:
-df1 = df.copy()
-
-df1 = clear_dataframe( df1 )
 #========================================================================================================
 # LAYOUT DA BARRA LATERAL
 #========================================================================================================
@@ -164,28 +89,35 @@ df1 = clear_dataframe( df1 )
 st.header( 'Marketplace - Visão Empresa' )
 
 # Vamos colocar o nosso logotipo na barra lateral:
-#image_path = 'logo.png'
-image = Image.open('logo.png')
-st.sidebar.image( image, width = 300 )
+# (versão já redimensionada e guardada em cache, em vez de decodificar o 'logo.png' original a cada execução)
+st.sidebar.image( caminho_logo(), width = 300 )
 
 # Escrevendo o nome da empresa na barra lateral:
 st.sidebar.markdown( '# Tasty Trials' )
 st.sidebar.markdown( '# Fastest Delivery in the Town' )
 st.sidebar.markdown( """___""" )
 
-# Fazendo a seleção de datas na barra lateral:
-st.sidebar.markdown( '## Selecione a data limite:' )
-date_slider = st.sidebar.slider("Qual é a data para a visualização?", 
-                                     value = datetime.datetime( 2022, 4, 13 ), 
+# Fazendo a seleção do período na barra lateral (a data final é exclusiva, como a antiga data limite):
+st.sidebar.markdown( '## Selecione o período:' )
+data_inicio, date_slider = st.sidebar.slider("Qual é o período para a visualização?", 
+                                     value = ( datetime.datetime( 2022, 2, 11 ), datetime.datetime( 2022, 4, 13 ) ), 
                                      min_value = datetime.datetime( 2022, 2, 11 ),
                                      max_value = datetime.datetime( 2022, 6, 4 ),
                                      format = 'DD-MM-YYYY')
 
-if date_slider is not None:
-    data_formatada = date_slider.strftime( "%d/%m/%Y" )
-    st.header( f"Data selecionada: {data_formatada}" )
-else:
-    st.header( "Nenhuma data selecionada" )
+data_formatada = f"{data_inicio.strftime( '%d/%m/%Y' )} a {date_slider.strftime( '%d/%m/%Y' )}"
+st.header( f"Período selecionado: {data_formatada}" )
+
+# Período de comparação para os indicadores (semana anterior, período anterior de mesma duração ou outro período):
+modo_comparacao = st.sidebar.selectbox( "Comparar com", MODOS_COMPARACAO )
+personalizado = None
+if modo_comparacao == 'Período personalizado':
+    personalizado = st.sidebar.slider("Qual é o período de comparação?", 
+                                      value = ( datetime.datetime( 2022, 2, 11 ), datetime.datetime( 2022, 3, 13 ) ), 
+                                      min_value = datetime.datetime( 2022, 2, 11 ),
+                                      max_value = datetime.datetime( 2022, 6, 4 ),
+                                      format = 'DD-MM-YYYY')
+periodo_base = periodo_comparacao( data_inicio, date_slider, modo_comparacao, personalizado )
 st.sidebar.markdown("""___""")
 
 # Criando uma choice box com as opções de tipo de tráfego, para filtrar ainda mais os nossos gráficos:
@@ -205,8 +137,21 @@ st.sidebar.markdown("""___""")
 st.sidebar.markdown( '## Criado pela Comunidade DS :heart:' )
 
 
+# Lendo o nosso Dataframe. Os dados (de 'FTC_FONTE_DADOS', 'fonte_dados.json' ou 'train.csv') são lidos e limpos
+# por uma thread em segundo plano, que publica uma versão nova sempre que os arquivos mudam. Pegamos a versão atual
+# uma única vez, para que toda a página use os mesmos dados, e só as partições que cobrem o período selecionado e o
+# de comparação:
+inicio_dados, fim_dados = data_inicio, date_slider
+if periodo_base:
+    inicio_dados, fim_dados = min( data_inicio, periodo_base[ 0 ] ), max( date_slider, periodo_base[ 1 ] )
+dados = dados_atuais( fim_dados, inicio_dados )
+if not dados.cobre( fim_dados, inicio_dados ):
+    # As partições que faltam são carregadas em segundo plano: a página não espera por elas.
+    st.info( "Parte do período ainda está sendo carregada; os pedidos aparecem na próxima interação com a página." )
+df1 = dados.ate( date_slider, data_inicio )
+
 # Filtros de Datas
-linhas_selecionadas = df1['Order_Date'] < date_slider
+linhas_selecionadas = ( df1['Order_Date'] >= data_inicio ) & ( df1['Order_Date'] < date_slider )
 df1 = df1.loc[linhas_selecionadas, :]
 
 # Filtros de Tipo de Trânsito
@@ -215,14 +160,32 @@ df1 = df1.loc[linhas_selecionadas, :]
 
 st.dataframe( df1 )
 
+# Resumo do período selecionado e do período de comparação, calculados a partir dos agregados acumulados por dia
+# (cada período é a diferença entre dois prefixos, sem refazer os agrupamentos):
+resumo_atual = dados.prefixos.resumo( data_inicio, date_slider, selecionados )
+resumo_base = dados.prefixos.resumo( *periodo_base, selecionados ) if periodo_base else {}
+
+# Indicadores do período com a variação em relação ao período de comparação:
+with st.container():
+    mix_base = resumo_base.get( 'mix_trafego', {} )
+    colunas = st.columns( 2 + len( resumo_atual[ 'mix_trafego' ] ) )
+    colunas[ 0 ].metric( 'Pedidos no período', resumo_atual[ 'pedidos' ],
+                         delta( resumo_atual[ 'pedidos' ], resumo_base.get( 'pedidos' ) ) )
+    colunas[ 1 ].metric( 'Tempo médio de entrega (min)', f"{resumo_atual['tempo_medio']:.2f}",
+                         delta( resumo_atual[ 'tempo_medio' ], resumo_base.get( 'tempo_medio' ) ), delta_color = 'inverse' )
+    for coluna, ( trafego, participacao ) in zip( colunas[ 2: ], resumo_atual[ 'mix_trafego' ].items() ):
+        coluna.metric( f'Tráfego {trafego}', f"{participacao:.1%}",
+                       delta( participacao, mix_base.get( trafego ), percentual = True ), delta_color = 'off' )
+
 #=======================================================================================
 # LAYOUT DO STREAMLIT
 #=======================================================================================
 
-abas = ['Visão Gerencial', 'Visão Tática', 'Visão Geográfica']
-tab1, tab2, tab3 = st.tabs(abas)
+abas = ['Visão Gerencial', 'Visão Tática', 'Visão Geográfica', 'Qualidade dos Dados', 'Previsão de Entrega']
+# Uma visão por vez: o folium e o modelo de previsão só entram quando as suas visões forem escolhidas.
+visao = st.radio( 'Visão', abas, horizontal = True, label_visibility = 'collapsed' )
 
-with tab1:
+if visao == abas[ 0 ]:
     with st.container():
         # Order Metric
         fig = order_by_day( df1 )
@@ -242,7 +205,7 @@ with tab1:
                 st.markdown("# Divisão das entregas por Cidade e Tráfego ")
                 st.plotly_chart(fig, use_container_width = True)
         
-with tab2:
+if visao == abas[ 1 ]:
     with st.container():
         fig = order_by_week( df1 )
         st.markdown("# Order by Week")
@@ -253,6 +216,80 @@ with tab2:
         st.markdown("# Order Share by Week")
         st.plotly_chart(fig, use_container_width = True)
         
-with tab3:
+if visao == abas[ 2 ]:
     st.markdown("# Visão Geográfica")
     geo_vision( df1 )
+
+    st.markdown("# Entregas por Região")
+    geo_drilldown_view( df1, dados, ( data_inicio, date_slider ), selecionados )
+
+if visao == abas[ 3 ]:
+    # O relatório é montado na própria limpeza e guardado junto com a versão dos dados, sem outra passada na base.
+    qualidade = dados.qualidade
+    st.markdown( f"# Qualidade dos Dados (versão {qualidade['versao']})" )
+
+    with st.container():
+        col1, col2, col3, col4 = st.columns( 4 )
+        col1.metric( 'Linhas lidas', qualidade[ 'linhas_lidas' ] )
+        col2.metric( 'Linhas válidas', qualidade[ 'linhas_validas' ] )
+        col3.metric( 'Linhas descartadas', qualidade[ 'linhas_descartadas' ] )
+        col4.metric( 'Restaurantes indexados', qualidade[ 'restaurantes_indexados' ] )
+
+    with st.container():
+        st.markdown( "## Descartes por Regra" )
+        st.dataframe( tabela_regras( qualidade ) )
+
+    with st.container():
+        col1, col2 = st.columns( 2 )
+        with col1:
+            st.markdown( "## Coordenadas Inválidas (linhas válidas)" )
+            st.dataframe( pd.Series( qualidade[ 'coordenadas_invalidas' ], name = 'linhas' ) )
+        with col2:
+            st.markdown( "## Horários Inválidos (linhas válidas)" )
+            st.dataframe( pd.Series( qualidade[ 'horarios_invalidos' ], name = 'linhas' ) )
+
+    st.download_button( "Baixar relatório (JSON)", json.dumps( qualidade, indent = 2 ),
+                        file_name = f"qualidade_dados_v{qualidade['versao']}.json", mime = 'application/json' )
+
+if visao == abas[ 4 ]:
+    st.markdown( "# Previsão do Tempo de Entrega" )
+    modelo = eta_model( dados.df, dados.assinatura )
+
+    with st.container():
+        metricas = modelo[ 'metricas' ]
+        col1, col2, col3, col4 = st.columns( 4 )
+        col1.metric( 'Erro médio absoluto (min)', f"{metricas['mae']:.2f}" )
+        col2.metric( 'RMSE (min)', f"{metricas['rmse']:.2f}" )
+        col3.metric( 'R²', f"{metricas['r2']:.3f}" if metricas[ 'r2' ] is not None else '-' )
+        col4.metric( 'Pedidos de treino', metricas[ 'pedidos_treino' ] )
+
+    with st.container():
+        st.markdown( "## Previsto x Realizado nos Filtros Atuais" )
+        if len( df1 ):
+            st.dataframe( eta_by_city_traffic( df1, prever( df1, modelo ) ) )
+        else:
+            st.write( "Nenhum pedido nos filtros selecionados" )
+
+    with st.container():
+        st.markdown( "## Simular um Pedido" )
+        with st.form( 'simulacao_eta' ):
+            colunas = st.columns( 4 )
+            escolhas = { coluna: colunas[ i % 4 ].selectbox( coluna, modelo[ 'categorias' ][ coluna ] )
+                         for i, coluna in enumerate( CATEGORICAS ) }
+            distancia = colunas[ 2 ].number_input( 'Distância (km)', min_value = 0.0, value = 10.0, step = 0.5 )
+            multiplas = colunas[ 3 ].number_input( 'Entregas múltiplas', min_value = 0, max_value = 3, value = 1 )
+            if st.form_submit_button( 'Prever' ):
+                pedido = pd.DataFrame( [ { **escolhas, 'distance': distancia, 'multiple_deliveries': multiplas } ] )
+                st.metric( 'Tempo previsto (min)', f"{prever_variaveis( pedido, modelo )[ 0 ]:.1f}" )
+
+    with st.container():
+        st.markdown( "## Previsão em Lote" )
+        arquivo = st.file_uploader( "Arquivo CSV no formato do train.csv", type = 'csv' )
+        if arquivo is not None:
+            # Pedidos novos ainda não têm 'Time_taken(min)': a limpeza da previsão não descarta nenhuma linha.
+            df_lote = clear_dataframe_previsao( ler_particao( arquivo ) )
+            df_lote[ 'ETA_prevista(min)' ] = prever( df_lote, modelo )
+            colunas = [ 'ID', 'City', 'Road_traffic_density', 'Time_taken(min)', 'ETA_prevista(min)' ]
+            st.dataframe( df_lote[ [ coluna for coluna in colunas if coluna in df_lote.columns ] ] )
+            st.download_button( "Baixar previsões (CSV)", df_lote.to_csv( index = False ),
+                                file_name = 'previsoes_eta.csv', mime = 'text/csv' )
@@ -0,0 +1,34 @@
+import sys
+import warnings
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Os módulos do projeto são importados como 'utils.x', como nas páginas do Streamlit (que rodam a partir da raiz).
+RAIZ_PROJETO = Path( __file__ ).resolve().parent.parent
+if str( RAIZ_PROJETO ) not in sys.path:
+    sys.path.insert( 0, str( RAIZ_PROJETO ) )
+
+
+@pytest.fixture( scope = 'session' )
+def versao_train():
+    """
+        Versão dos dados do 'train.csv', carregada uma única vez pelo mesmo caminho do dashboard.
+    """
+    from utils.atualizacao import AtualizadorDados
+
+    warnings.simplefilter( "ignore" )
+    return AtualizadorDados( config = { 'caminho': RAIZ_PROJETO / 'train.csv', 'padrao': '*.csv' } ).atual()
+
+
+def particionar_por_dia( destino, datas ):
+    """
+        Grava um arquivo por dia, com as linhas brutas do 'train.csv', como na fonte particionada por data.
+        Retorna as linhas brutas gravadas.
+    """
+    bruto = pd.read_csv( RAIZ_PROJETO / 'train.csv', dtype = str, keep_default_na = False )
+    for data in datas:
+        dia, mes, ano = data.split( '-' )
+        bruto[ bruto[ 'Order_Date' ] == data ].to_csv( destino / f'{ano}-{mes}-{dia}.csv', index = False )
+    return bruto[ bruto[ 'Order_Date' ].isin( datas ) ]
@@ -0,0 +1,98 @@
+import time
+import datetime
+import threading
+
+import pandas as pd
+
+from utils.atualizacao import AtualizadorDados
+from utils.fonte_dados import ler_particao
+from utils.limpeza import clear_dataframe
+
+from conftest import particionar_por_dia
+
+DATAS = [ '11-02-2022', '12-02-2022', '01-04-2022', '02-04-2022' ]
+
+
+def test_carga_das_particoes_diarias( tmp_path ):
+    bruto = particionar_por_dia( tmp_path, DATAS )
+    bruto.to_csv( tmp_path / 'unico.txt', index = False )
+
+    versao = AtualizadorDados( config = { 'caminho': tmp_path, 'padrao': '*.csv' } ).atual()
+
+    esperado = clear_dataframe( ler_particao( tmp_path / 'unico.txt' ) ).sort_values( 'ID', ignore_index = True )
+    df = versao.df.drop( columns = 'restaurant_id' ).sort_values( 'ID', ignore_index = True )
+    pd.testing.assert_frame_equal( df, esperado )
+    assert versao.fins[ -1 ] == len( versao.df )
+
+
+def test_carrega_apenas_ate_o_horizonte( tmp_path ):
+    particionar_por_dia( tmp_path, DATAS )
+    atualizador = AtualizadorDados( config = { 'caminho': tmp_path, 'padrao': '*.csv' } )
+
+    versao = atualizador.atual( datetime.datetime( 2022, 3, 1 ) )
+    assert [ caminho.name for caminho, _ in versao.particoes ] == [ '2022-02-11.csv', '2022-02-12.csv' ]
+    assert versao.df[ 'Order_Date' ].max() < pd.Timestamp( '2022-03-01' )
+    # Um período dentro do horizonte usa a mesma versão, sem recarregar:
+    assert atualizador.atual( datetime.datetime( 2022, 2, 12 ) ) is versao
+
+    # Um período que passa do horizonte carrega só as partições que faltam; as já limpas são reaproveitadas.
+    nova = atualizador.atual( datetime.datetime( 2022, 4, 2 ) )
+    assert nova.versao == versao.versao + 1
+    assert len( nova.particoes ) == 3
+    pd.testing.assert_frame_equal( nova.df.iloc[ :versao.fins[ -1 ] ].drop( columns = 'restaurant_id' ),
+                                   versao.df.drop( columns = 'restaurant_id' ) )
+
+    assert len( atualizador.atual().particoes ) == 4
+
+
+def test_carrega_apenas_a_partir_da_data_inicial( tmp_path ):
+    particionar_por_dia( tmp_path, DATAS )
+    atualizador = AtualizadorDados( config = { 'caminho': tmp_path, 'padrao': '*.csv' } )
+
+    versao = atualizador.atual( datetime.datetime( 2022, 4, 3 ), datetime.datetime( 2022, 4, 1 ) )
+    assert [ caminho.name for caminho, _ in versao.particoes ] == [ '2022-04-01.csv', '2022-04-02.csv' ]
+    assert versao.cobre( datetime.datetime( 2022, 4, 2 ), datetime.datetime( 2022, 4, 2 ) )
+    assert not versao.cobre( datetime.datetime( 2022, 4, 3 ), datetime.datetime( 2022, 2, 12 ) )
+    assert ( versao.ate( datetime.datetime( 2022, 4, 3 ), datetime.datetime( 2022, 4, 2 ) )[ 'Order_Date' ]
+             == pd.Timestamp( '2022-04-02' ) ).all()
+
+    # Um período que começa antes do horizonte carrega as partições anteriores que faltam:
+    nova = atualizador.atual( datetime.datetime( 2022, 4, 3 ), datetime.datetime( 2022, 2, 12 ) )
+    assert [ caminho.name for caminho, _ in nova.particoes ] == [ '2022-02-12.csv', '2022-04-01.csv', '2022-04-02.csv' ]
+    fatia = nova.ate( datetime.datetime( 2022, 4, 2 ), datetime.datetime( 2022, 2, 12 ) )
+    assert len( fatia ) == nova.fins[ 1 ]
+
+
+def test_thread_carrega_o_periodo_pedido_sem_a_pagina_esperar( tmp_path, monkeypatch ):
+    particionar_por_dia( tmp_path, DATAS )
+    atualizador = AtualizadorDados( intervalo = 60, config = { 'caminho': tmp_path, 'padrao': '*.csv' },
+                                    periodo = ( datetime.datetime( 2022, 2, 11 ), datetime.datetime( 2022, 2, 12 ) ) )
+    try:
+        # O período inicial é carregado quando a thread inicia, antes de qualquer pedido:
+        atualizador.iniciar()
+        assert atualizador._pronta.wait( 30 )
+        inicial = atualizador._atual
+        assert [ caminho.name for caminho, _ in inicial.particoes ] == [ '2022-02-11.csv' ]
+
+        # Um período fora do horizonte não recarrega na chamada: a versão atual volta na hora e a thread carrega o
+        # resto.
+        recarregar, liberar, chamadas = atualizador.recarregar, threading.Event(), []
+
+        def recarregar_depois_da_pagina():
+            chamadas.append( threading.current_thread().name )
+            liberar.wait( 30 )
+            return recarregar()
+
+        monkeypatch.setattr( atualizador, 'recarregar', recarregar_depois_da_pagina )
+        ate = datetime.datetime( 2022, 4, 3 )
+        assert atualizador.atual( ate ) is inicial
+        liberar.set()
+        for _ in range( 300 ):
+            if atualizador._atual.cobre( ate ):
+                break
+            time.sleep( 0.1 )
+        assert atualizador.atual( ate ).cobre( ate )
+        assert len( atualizador._atual.particoes ) == 4
+        assert chamadas and set( chamadas ) == { 'atualizador-dados' }
+    finally:
+        atualizador.parar()
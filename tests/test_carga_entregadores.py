@@ -0,0 +1,37 @@
+import pandas as pd
+
+from utils.carga_entregadores import carga_por_turno, intervalos_entrega
+from utils.limpeza import time_features
+
+
+def pedidos( linhas ):
+    # Pedidos já limpos de um mesmo entregador: (data, pedido, coleta, tempo de entrega em minutos).
+    df = pd.DataFrame( linhas, columns = [ 'Order_Date', 'Time_Orderd', 'Time_Order_picked', 'Time_taken(min)' ] )
+    df[ 'Order_Date' ] = pd.to_datetime( df[ 'Order_Date' ] )
+    df[ 'Delivery_person_ID' ] = 'AGRRES11DEL03'
+    df[ 'City' ] = 'Urban'
+    return time_features( df )
+
+
+def test_coleta_depois_da_meia_noite():
+    # O segundo pedido foi feito às 23:50 e coletado às 00:05 do dia seguinte.
+    df = pedidos( [ ( '2022-02-16', '23:20:00', '23:30:00', 20 ),
+                    ( '2022-02-16', '23:50:00', '00:05:00', 30 ) ] )
+
+    intervalos = intervalos_entrega( df )
+    dia = intervalos[ 'dia' ].iloc[ 0 ]
+    assert intervalos[ 'inicio' ].tolist() == [ dia + 23 * 3600 + 30 * 60, dia + 24 * 3600 + 5 * 60 ]
+
+    turno = carga_por_turno( df ).iloc[ 0 ]
+    # Turno das 23:30 às 00:35, com 15 minutos livres entre as duas entregas (e não quase um dia inteiro):
+    assert turno[ 'turno_s' ] == 65 * 60
+    assert turno[ 'maior_ociosidade_s' ] == 15 * 60
+
+
+def test_horario_do_pedido_invalido_usa_a_coleta():
+    df = pedidos( [ ( '2022-02-16', 'NaN', '10:15:00', 25 ),
+                    ( '2022-02-16', 'NaN', 'NaN', 25 ) ] )
+
+    intervalos = intervalos_entrega( df )
+    assert len( intervalos ) == 1
+    assert intervalos[ 'inicio' ].iloc[ 0 ] - intervalos[ 'dia' ].iloc[ 0 ] == 10 * 3600 + 15 * 60
@@ -0,0 +1,27 @@
+import pytest
+
+from utils.exportar import PAINEIS, _exportar_painel, _iniciar_processo, filtrar, TRAFEGOS, INICIO_PADRAO, FIM_PADRAO
+from utils.modelo import carregar_ou_treinar
+
+
+@pytest.fixture( scope = 'module' )
+def contexto( versao_train, tmp_path_factory ):
+    # Mesmo contexto que o exportador monta para o período padrão das páginas. O modelo é treinado em uma pasta
+    # temporária, sem ler nem gravar os artefatos de '.cache/modelos/' do dashboard.
+    return { 'df': filtrar( versao_train, INICIO_PADRAO, FIM_PADRAO, TRAFEGOS ),
+             'df_restaurantes': versao_train.df_restaurantes,
+             'hierarquia': versao_train.hierarquia,
+             'qualidade': versao_train.qualidade,
+             'resumo': versao_train.prefixos.resumo( INICIO_PADRAO, FIM_PADRAO, TRAFEGOS ),
+             'modelo': carregar_ou_treinar( versao_train.df, versao_train.assinatura,
+                                            pasta = tmp_path_factory.mktemp( 'modelos' ) ) }
+
+
+@pytest.mark.parametrize( 'indice', range( len( PAINEIS ) ),
+                          ids = [ f'{pagina}/{nome}' for pagina, nome, _, _ in PAINEIS ] )
+def test_painel_das_paginas( contexto, indice, tmp_path ):
+    # Cada figura, tabela e mapa das páginas é montado e gravado uma vez, como no dashboard e no exportador.
+    _iniciar_processo( contexto )
+    resultado = _exportar_painel( indice, str( tmp_path ), ( 'html', 'csv' ) )
+    assert resultado[ 'erro' ] is None, resultado[ 'erro' ]
+    assert resultado[ 'arquivos' ]
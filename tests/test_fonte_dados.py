@@ -0,0 +1,42 @@
+import pandas as pd
+
+from utils.fonte_dados import ler_particao, listar_particoes, podar_particoes
+from utils.limpeza import clear_dataframe
+
+from conftest import particionar_por_dia
+
+
+def test_particoes_diarias_limpas_como_arquivo_unico( tmp_path ):
+    # Partições pequenas sem nenhum 'NaN ' não podem ter colunas lidas como inteiros antes da limpeza.
+    bruto = particionar_por_dia( tmp_path, [ '01-04-2022', '02-04-2022', '03-04-2022', '11-02-2022' ] )
+    bruto.to_csv( tmp_path / 'unico.csv', index = False )
+
+    config = { 'caminho': tmp_path, 'padrao': '20*.csv' }
+    particoes = [ clear_dataframe( ler_particao( caminho ) ) for caminho, _ in listar_particoes( config ) ]
+    df = pd.concat( particoes, ignore_index = True ).sort_values( 'ID', ignore_index = True )
+    esperado = clear_dataframe( ler_particao( tmp_path / 'unico.csv' ) ).sort_values( 'ID', ignore_index = True )
+
+    pd.testing.assert_frame_equal( df, esperado )
+
+
+def test_poda_das_particoes( tmp_path ):
+    # O limite é exclusivo, como o filtro 'Order_Date < date_slider' das páginas.
+    particionar_por_dia( tmp_path, [ '11-02-2022', '01-04-2022', '02-04-2022' ] )
+    particoes = listar_particoes( { 'caminho': tmp_path, 'padrao': '*.csv' } )
+
+    mantidas = podar_particoes( particoes, pd.Timestamp( '2022-04-02' ) )
+
+    assert [ caminho.name for caminho, _ in mantidas ] == [ '2022-02-11.csv', '2022-04-01.csv' ]
+
+
+def test_poda_das_particoes_pela_data_inicial( tmp_path ):
+    # A data inicial é inclusiva, como o filtro 'Order_Date >= data_inicio' das páginas; o arquivo sem data é mantido.
+    particionar_por_dia( tmp_path, [ '11-02-2022', '01-04-2022', '02-04-2022' ] )
+    ( tmp_path / 'extra.csv' ).write_text( ( tmp_path / '2022-02-11.csv' ).read_text() )
+    particoes = listar_particoes( { 'caminho': tmp_path, 'padrao': '*.csv' } )
+
+    mantidas = podar_particoes( particoes, inicio = pd.Timestamp( '2022-04-01 08:00' ) )
+    assert [ caminho.name for caminho, _ in mantidas ] == [ '2022-04-01.csv', '2022-04-02.csv', 'extra.csv' ]
+
+    mantidas = podar_particoes( particoes, pd.Timestamp( '2022-04-02' ), pd.Timestamp( '2022-02-12' ) )
+    assert [ caminho.name for caminho, _ in mantidas ] == [ '2022-04-01.csv', 'extra.csv' ]
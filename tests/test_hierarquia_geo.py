@@ -0,0 +1,46 @@
+import numpy as np
+
+from utils.hierarquia_geo import metro_restaurante
+from utils.restaurantes import prefixo_restaurante
+from utils.visao_empresa import geo_drilldown
+
+
+def test_nivel_metro_igual_ao_agrupamento( versao_train ):
+    df = versao_train.df
+    hierarquia = versao_train.hierarquia
+    df_filtrado = df.loc[ df[ 'Road_traffic_density' ].isin( [ 'Low', 'Jam' ] ), : ]
+
+    df_nivel = hierarquia.nivel( hierarquia.somas( df_filtrado ), 'metro' ).set_index( 'nome' )
+
+    esperado = ( df_filtrado.assign( metro = metro_restaurante( prefixo_restaurante( df_filtrado[ 'Delivery_person_ID' ] ) ).to_numpy() )
+                            .groupby( 'metro' )
+                            .agg( pedidos = ( 'Time_taken(min)', 'size' ),
+                                  avg_time = ( 'Time_taken(min)', 'mean' ),
+                                  std_time = ( 'Time_taken(min)', 'std' ) ) )
+    assert sorted( df_nivel.index ) == sorted( esperado.index )
+    esperado = esperado.loc[ df_nivel.index ]
+    assert ( df_nivel[ 'pedidos' ].to_numpy() == esperado[ 'pedidos' ].to_numpy() ).all()
+    np.testing.assert_allclose( df_nivel[ 'avg_time' ], esperado[ 'avg_time' ], rtol = 1e-12 )
+    # Desvio a partir da soma dos quadrados: a diferença para o cálculo em duas passadas fica nos últimos dígitos.
+    np.testing.assert_allclose( df_nivel[ 'std_time' ], esperado[ 'std_time' ], rtol = 1e-9 )
+
+
+def test_drilldown_desce_da_regiao_ao_restaurante( versao_train ):
+    hierarquia = versao_train.hierarquia
+    somas = hierarquia.somas( versao_train.df )
+
+    regioes = geo_drilldown( hierarquia, somas )
+    assert ( regioes[ 'pai' ] == 'Todas' ).all()
+    assert regioes[ 'pedidos' ].sum() == len( versao_train.df )
+
+    metro = regioes.sort_values( 'pedidos' ).iloc[ -1 ]
+    zonas = geo_drilldown( hierarquia, somas, metro[ 'nome' ] )
+    assert ( zonas[ 'pai' ] == metro[ 'nome' ] ).all()
+    assert set( zonas[ 'nome' ] ) <= set( hierarquia.zonas_do_metro( metro[ 'nome' ] ) )
+    assert zonas[ 'pedidos' ].sum() == metro[ 'pedidos' ]
+
+    zona = zonas.sort_values( 'pedidos' ).iloc[ -1 ]
+    restaurantes = geo_drilldown( hierarquia, somas, metro[ 'nome' ], zona[ 'nome' ] )
+    assert ( restaurantes[ 'pai' ] == zona[ 'nome' ] ).all()
+    assert restaurantes[ 'pedidos' ].sum() == zona[ 'pedidos' ]
+    assert restaurantes[ 'restaurantes' ].eq( 1 ).all()
@@ -0,0 +1,94 @@
+import pandas as pd
+
+from utils.limpeza import horario_em_segundos, time_features, clear_dataframe_com_relatorio, REGRAS_DESCARTE, REGRA_TEMPO
+
+
+def horarios( pedido, coleta ):
+    return time_features( pd.DataFrame( { 'Time_Orderd': pedido, 'Time_Order_picked': coleta } ) )
+
+
+def test_horario_em_segundos():
+    serie = pd.Series( [ '00:00', '08:05', '23:59:59', ' 7:30:15 ', 'NaN', '', '25:70', '12:3', '10:15:00 PM', None ] )
+
+    segundos = horario_em_segundos( serie )
+
+    assert str( segundos.dtype ) == 'Int32'
+    assert segundos.iloc[ :4 ].tolist() == [ 0, 8 * 3600 + 5 * 60, 24 * 3600 - 1, 7 * 3600 + 30 * 60 + 15 ]
+    # 'NaN', vazio, horário impossível, minutos com um dígito, outro formato e None viram nulos:
+    assert segundos.iloc[ 4: ].isna().all()
+
+
+def test_preparo_depois_da_meia_noite():
+    df = horarios( [ '23:50:00', '23:55:00', '10:00:00' ], [ '00:05:00', '23:55:00', '10:15:00' ] )
+
+    # A coleta às 00:05 é do dia seguinte ao pedido das 23:50: 15 minutos, e não um valor negativo.
+    assert df[ 'prep_time_s' ].tolist() == [ 15 * 60, 0, 15 * 60 ]
+    assert df[ 'order_hour' ].tolist() == [ 23, 23, 10 ]
+
+
+def test_horarios_invalidos_ficam_nulos():
+    df = horarios( [ 'NaN', '09:10:00', 'NaN', '24:00:00' ], [ '09:20:00', 'NaN', 'NaN', '00:10:00' ] )
+
+    assert str( df[ 'order_time_s' ].dtype ) == 'Int32' and str( df[ 'picked_time_s' ].dtype ) == 'Int32'
+    assert str( df[ 'order_hour' ].dtype ) == 'Int8' and str( df[ 'prep_time_s' ].dtype ) == 'Int32'
+    assert df[ 'order_time_s' ].isna().tolist() == [ True, False, True, True ]
+    assert df[ 'picked_time_s' ].isna().tolist() == [ False, True, True, False ]
+    # Sem o horário do pedido não há hora do pedido nem tempo de preparo:
+    assert df[ 'order_hour' ].isna().tolist() == [ True, False, True, True ]
+    assert df[ 'prep_time_s' ].isna().all()
+
+
+def test_hora_do_pedido():
+    pedidos = [ '00:00:00', '00:59:59', '01:00:00', '11:30:00', '12:00:00', '23:59:59' ]
+
+    df = horarios( pedidos, pedidos )
+
+    assert df[ 'order_hour' ].tolist() == [ 0, 0, 1, 11, 12, 23 ]
+
+
+def linha_bruta( **valores ):
+    # Uma linha no formato bruto do 'train.csv', com os espaços sobrando; 'valores' troca as colunas indicadas.
+    linha = { 'ID': '0x4607 ', 'Delivery_person_ID': 'INDORES13DEL02 ', 'Delivery_person_Age': '37',
+              'Delivery_person_Ratings': '4.9', 'Restaurant_latitude': 22.745049, 'Restaurant_longitude': 75.892471,
+              'Delivery_location_latitude': 22.765049, 'Delivery_location_longitude': 75.912471,
+              'Order_Date': '19-03-2022', 'Time_Orderd': '11:30:00', 'Time_Order_picked': '11:45:00',
+              'Weatherconditions': 'conditions Sunny', 'Road_traffic_density': 'High ', 'Vehicle_condition': 2,
+              'Type_of_order': 'Snack ', 'Type_of_vehicle': 'motorcycle ', 'multiple_deliveries': '0',
+              'Festival': 'No ', 'City': 'Urban ', 'Time_taken(min)': '(min) 24' }
+    linha.update( valores )
+    return linha
+
+
+def test_relatorio_de_qualidade():
+    df = pd.DataFrame( [
+        linha_bruta(),
+        # Falha em duas regras: o descarte fica com a primeira, na ordem de REGRAS_DESCARTE.
+        linha_bruta( Delivery_person_Ratings = 'NaN', City = 'NaN ' ),
+        linha_bruta( multiple_deliveries = 'NaN ' ),
+        linha_bruta( Weatherconditions = 'conditions NaN', Road_traffic_density = 'NaN ' ),
+        linha_bruta( Road_traffic_density = 'NaN ' ),
+        linha_bruta( City = 'NaN ', Festival = 'NaN ' ),
+        linha_bruta( Festival = 'NaN ' ),
+        linha_bruta( Delivery_person_Age = 'NaN ', **{ 'Time_taken(min)': '(min) NaN' } ),
+        linha_bruta( **{ 'Time_taken(min)': '(min) NaN' } ),
+        # Linhas mantidas, com coordenadas suspeitas e horário do pedido ilegível:
+        linha_bruta( Restaurant_latitude = 0.0, Restaurant_longitude = 0.0 ),
+        linha_bruta( Restaurant_latitude = -22.745049, Delivery_location_longitude = 0.0 ),
+        linha_bruta( Time_Orderd = 'NaN ' ),
+    ] )
+
+    df_limpo, relatorio = clear_dataframe_com_relatorio( df )
+
+    assert list( relatorio[ 'regras' ] ) == [ regra for regra, _, _ in REGRAS_DESCARTE ] + [ REGRA_TEMPO ]
+    falhas = { regra: contagem[ 'falhas' ] for regra, contagem in relatorio[ 'regras' ].items() }
+    descartes = { regra: contagem[ 'descartes' ] for regra, contagem in relatorio[ 'regras' ].items() }
+    assert falhas == { 'Delivery_person_Ratings': 1, 'multiple_deliveries': 1, 'Weatherconditions': 1,
+                       'Road_traffic_density': 2, 'City': 2, 'Festival': 2, 'Delivery_person_Age': 1,
+                       'Time_taken(min)': 2 }
+    assert descartes == { regra: 1 for regra in falhas }
+    assert ( relatorio[ 'linhas_lidas' ], relatorio[ 'linhas_validas' ], relatorio[ 'linhas_descartadas' ] ) == ( 12, 4, 8 )
+    assert sum( descartes.values() ) == relatorio[ 'linhas_descartadas' ]
+    assert relatorio[ 'coordenadas_invalidas' ] == { 'restaurante_zeradas': 1, 'restaurante_negativas': 1,
+                                                     'entrega_zeradas': 1, 'entrega_negativas': 0 }
+    assert relatorio[ 'horarios_invalidos' ] == { 'Time_Orderd': 1, 'Time_Order_picked': 0 }
+    assert len( df_limpo ) == 4 and df_limpo[ 'Time_taken(min)' ].tolist() == [ 24 ] * 4
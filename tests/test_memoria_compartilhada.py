@@ -0,0 +1,127 @@
+import json
+import time
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import memoria_compartilhada
+from utils.atualizacao import AtualizadorDados, VersaoDados
+from utils.agregacoes import tempos_por_hora_cidade
+from utils.exportar import filtrar, INICIO_PADRAO, FIM_PADRAO
+from utils.visao_restaurantes import distance_distribution
+from utils.visao_entregadores import agrupar_media_std
+
+from conftest import RAIZ_PROJETO
+
+pytestmark = pytest.mark.skipif( memoria_compartilhada.fcntl is None, reason = 'sem trava entre processos' )
+
+CONFIG = { 'caminho': RAIZ_PROJETO / 'train.csv', 'padrao': '*.csv' }
+
+
+def mapeado( array ):
+    while array is not None:
+        if isinstance( array, np.memmap ):
+            return True
+        array = getattr( array, 'base', None )
+    return False
+
+
+def test_anexar_sem_copiar_os_textos( versao_train, tmp_path ):
+    nome = memoria_compartilhada.publicar( versao_train, tmp_path )
+    meta, df, _, _ = memoria_compartilhada.anexar( tmp_path, nome )
+
+    with open( tmp_path / nome / memoria_compartilhada.ARQUIVO_META, encoding = 'utf-8' ) as arquivo:
+        categorias_meta = { info[ 'nome' ]: info[ 'categorias' ] for info in json.load( arquivo )[ 'colunas' ]
+                            if info[ 'tipo' ] == 'dicionario' }
+    # Um 'ID' por pedido: as categorias ficam fora do 'meta.json'.
+    assert isinstance( categorias_meta[ 'ID' ], str )
+    assert isinstance( categorias_meta[ 'City' ], list )
+
+    for coluna in categorias_meta:
+        assert mapeado( df[ coluna ].array.codes ), coluna
+        pd.testing.assert_series_equal( df[ coluna ].astype( object ), versao_train.df[ coluna ].astype( object ) )
+
+
+def test_anexar_agregados_e_hierarquia_mapeados( versao_train, tmp_path, monkeypatch ):
+    monkeypatch.setenv( memoria_compartilhada.VARIAVEL_PASTA, str( tmp_path ) )
+    memoria_compartilhada.publicar( versao_train, tmp_path )
+    trava = memoria_compartilhada.tentar_ser_publicador( tmp_path )
+    try:
+        anexada = AtualizadorDados( config = CONFIG ).atual()
+    finally:
+        trava.close()
+
+    # Os arrays por pedido dos agregados acumulados e os da hierarquia não são refeitos em cada processo:
+    assert mapeado( anexada.prefixos._dia_idx ) and mapeado( anexada.prefixos.soma_tempo )
+    assert mapeado( anexada.hierarquia.zona_idx ) and mapeado( anexada.hierarquia.latitude )
+
+    periodo = ( pd.Timestamp( '2022-03-01' ), pd.Timestamp( '2022-03-15' ), [ 'Low', 'Jam' ] )
+    assert anexada.prefixos.resumo( *periodo ) == versao_train.prefixos.resumo( *periodo )
+    metro = versao_train.hierarquia.metros[ 0 ]
+    assert anexada.hierarquia.zonas_do_metro( metro ) == versao_train.hierarquia.zonas_do_metro( metro )
+    niveis = [ versao.hierarquia.nivel( versao.hierarquia.somas( versao.df ), 'zona', metro )
+               for versao in ( anexada, versao_train ) ]
+    pd.testing.assert_frame_equal( *niveis )
+
+
+def como_texto( df ):
+    # Colunas categóricas (modo compartilhado) e de texto (modo local) comparadas como objetos Python.
+    return df.astype( { coluna: object for coluna in df.columns
+                        if not pd.api.types.is_numeric_dtype( df[ coluna ].dtype ) } )
+
+
+def test_tabelas_das_paginas_iguais_ao_modo_local( versao_train, tmp_path ):
+    # Com as colunas de texto categóricas, os agrupamentos não podem ganhar as combinações sem pedidos ('observed').
+    nome = memoria_compartilhada.publicar( versao_train, tmp_path )
+    _, df, _, _ = memoria_compartilhada.anexar( tmp_path, nome )
+    anexada = VersaoDados( versao_train.versao, versao_train.assinatura, df, versao_train.df_restaurantes,
+                           versao_train.particoes, versao_train.fins )
+    filtrados = [ filtrar( versao, INICIO_PADRAO, FIM_PADRAO, [ 'Low', 'Jam' ] ) for versao in ( versao_train, anexada ) ]
+
+    for tabela in ( distance_distribution, tempos_por_hora_cidade,
+                    lambda d: agrupar_media_std( d, 'Delivery_person_Ratings', 'Road_traffic_density' ) ):
+        local, compartilhada = ( como_texto( tabela( d ) ) for d in filtrados )
+        pd.testing.assert_frame_equal( compartilhada, local )
+
+
+def esperar_em_thread( atualizador ):
+    resultado = {}
+    thread = threading.Thread( target = lambda: resultado.update( versao = atualizador.atual() ) )
+    thread.start()
+    return thread, resultado
+
+
+def test_processo_espera_o_publicador( versao_train, tmp_path, monkeypatch ):
+    monkeypatch.setenv( memoria_compartilhada.VARIAVEL_PASTA, str( tmp_path ) )
+    trava = memoria_compartilhada.tentar_ser_publicador( tmp_path )
+    try:
+        thread, resultado = esperar_em_thread( AtualizadorDados( config = CONFIG ) )
+        time.sleep( 1 )
+        # Sem a trava, o processo não carrega nem publica nada por conta própria:
+        assert thread.is_alive()
+        assert memoria_compartilhada.versao_publicada( tmp_path ) is None
+
+        nome = memoria_compartilhada.publicar( versao_train, tmp_path )
+        thread.join( 10 )
+    finally:
+        trava.close()
+
+    assert resultado[ 'versao' ].versao == versao_train.versao
+    assert isinstance( resultado[ 'versao' ].df[ 'City' ].dtype, pd.CategoricalDtype )
+    assert [ caminho.name for caminho in tmp_path.glob( 'v*' ) ] == [ nome ]
+
+
+def test_processo_assume_quando_o_publicador_termina( tmp_path, monkeypatch ):
+    monkeypatch.setenv( memoria_compartilhada.VARIAVEL_PASTA, str( tmp_path ) )
+    trava = memoria_compartilhada.tentar_ser_publicador( tmp_path )
+    atualizador = AtualizadorDados( config = CONFIG )
+    thread, resultado = esperar_em_thread( atualizador )
+    time.sleep( 1 )
+    trava.close()
+    thread.join( 60 )
+
+    assert atualizador._trava_publicador is not None
+    assert memoria_compartilhada.versao_publicada( tmp_path ) is not None
+    atualizador._trava_publicador.close()
@@ -0,0 +1,64 @@
+import io
+import json
+
+import numpy as np
+import pandas as pd
+
+from utils import modelo
+from utils.fonte_dados import ler_particao
+from utils.limpeza import clear_dataframe, clear_dataframe_previsao
+
+from conftest import RAIZ_PROJETO
+
+
+def test_previsao_em_lote_sem_tempo_de_entrega( versao_train, tmp_path ):
+    artefato = modelo.carregar_ou_treinar( versao_train.df, versao_train.assinatura, pasta = tmp_path )
+    bruto = ler_particao( RAIZ_PROJETO / 'train.csv' ).head( 500 )
+    # Pedidos novos: sem a coluna do tempo de entrega, no formato de um arquivo enviado pelo usuário.
+    arquivo = io.StringIO( bruto.drop( columns = 'Time_taken(min)' ).to_csv( index = False ) )
+
+    df_lote = clear_dataframe_previsao( ler_particao( arquivo ) )
+    previsao = pd.Series( modelo.prever( df_lote, artefato ), index = df_lote[ 'ID' ] )
+
+    assert len( df_lote ) == len( bruto )
+    assert not previsao.isna().any()
+    # Nos pedidos que a limpeza do treino mantém, a previsão é a mesma:
+    limpo = clear_dataframe( bruto.copy() )
+    np.testing.assert_allclose( previsao.loc[ limpo[ 'ID' ] ].to_numpy(), modelo.prever( limpo, artefato ) )
+
+
+def test_artefato_de_outro_esquema_nao_e_reaproveitado( versao_train, tmp_path, monkeypatch ):
+    chave = modelo.chave_modelo( versao_train.assinatura )
+    artefato = modelo.carregar_ou_treinar( versao_train.df, versao_train.assinatura, pasta = tmp_path )
+    assert artefato[ 'versao_variaveis' ] == modelo.VERSAO_VARIAVEIS
+
+    monkeypatch.setattr( modelo, 'VERSAO_VARIAVEIS', modelo.VERSAO_VARIAVEIS + 1 )
+    assert modelo.chave_modelo( versao_train.assinatura ) != chave
+    novo = modelo.carregar_ou_treinar( versao_train.df, versao_train.assinatura, pasta = tmp_path )
+    assert novo[ 'versao_variaveis' ] == modelo.VERSAO_VARIAVEIS
+    assert len( list( tmp_path.glob( 'modelo_*.json' ) ) ) == 2
+
+
+def test_artefato_antigo_com_a_mesma_chave_e_treinado_de_novo( versao_train, tmp_path ):
+    # Artefato gravado com um esquema de variáveis anterior, no mesmo arquivo da chave atual (como antes de a
+    # chave incluir o esquema).
+    caminho = tmp_path / f'modelo_{modelo.chave_modelo( versao_train.assinatura )}.json'
+    caminho.write_text( json.dumps( { 'versao_variaveis': modelo.VERSAO_VARIAVEIS - 1, 'intercepto': 0.0 } ), encoding = 'utf-8' )
+
+    artefato = modelo.carregar_ou_treinar( versao_train.df, versao_train.assinatura, pasta = tmp_path )
+
+    assert artefato[ 'versao_variaveis' ] == modelo.VERSAO_VARIAVEIS
+    assert artefato[ 'intercepto' ] != 0.0
+    assert json.loads( caminho.read_text( encoding = 'utf-8' ) ) == artefato
+    assert list( tmp_path.glob( 'modelo_*.json' ) ) == [ caminho ]
+
+
+def test_treino_por_blocos_igual_ao_treino_de_uma_vez( versao_train, monkeypatch ):
+    inteiro = modelo.treinar_modelo( versao_train.df )
+    monkeypatch.setattr( modelo, 'LINHAS_POR_BLOCO', 333 )
+    por_blocos = modelo.treinar_modelo( versao_train.df )
+
+    assert inteiro[ 'categorias' ] == por_blocos[ 'categorias' ]
+    np.testing.assert_allclose( por_blocos[ 'intercepto' ], inteiro[ 'intercepto' ], rtol = 1e-9 )
+    for coluna, coeficientes in inteiro[ 'coeficientes' ].items():
+        np.testing.assert_allclose( por_blocos[ 'coeficientes' ][ coluna ], coeficientes, rtol = 1e-7, atol = 1e-9 )
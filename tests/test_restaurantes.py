@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from utils.geo import haversine_km
+from utils.hierarquia_geo import HierarquiaGeografica
+from utils.restaurantes import indexar_restaurantes
+
+
+def pedidos():
+    # Pedidos já limpos; 'esperado' é o restaurante de cada linha, montado à mão.
+    linhas = [
+        # AGRRES01 em (27.1, 78.0), também com a latitude com o sinal trocado e com a coordenada zerada (que herda
+        # a coordenada mais frequente do código):
+        ( 'AGRRES01DEL01', 27.1, 78.0, 'Urban', 20, 600, 'AGRRES01 27.1' ),
+        ( 'AGRRES01DEL02', 27.1, 78.0, 'Urban', 30, 900, 'AGRRES01 27.1' ),
+        ( 'AGRRES01DEL01', -27.1, 78.0, 'Metropolitian', 25, None, 'AGRRES01 27.1' ),
+        ( 'AGRRES01DEL03', 0.0, 0.0, 'Urban', 40, 300, 'AGRRES01 27.1' ),
+        # Mesmo código em outra coordenada: outro restaurante.
+        ( 'AGRRES01DEL02', 27.3, 78.3, 'Urban', 15, 600, 'AGRRES01 27.3' ),
+        # 'AGRRES010' não é o 'AGRRES01' com mais um dígito no entregador:
+        ( 'AGRRES010DEL01', 27.2, 78.1, 'Semi-Urban', 35, 1200, 'AGRRES010' ),
+        ( 'AGRRES010DEL02', 27.2, 78.1, 'Semi-Urban', 45, 1200, 'AGRRES010' ),
+        # Código sem nenhuma coordenada conhecida:
+        ( 'BANGRES05DEL01', 0.0, 0.0, 'Metropolitian', 10, 300, 'BANGRES05' ),
+        ( 'BANGRES05DEL01', 0.0, 0.0, 'Metropolitian', 50, 900, 'BANGRES05' ),
+    ]
+    df = pd.DataFrame( linhas, columns = [ 'Delivery_person_ID', 'Restaurant_latitude', 'Restaurant_longitude', 'City',
+                                           'Time_taken(min)', 'prep_time_s', 'esperado' ] )
+    df[ 'Delivery_location_latitude' ] = df[ 'Restaurant_latitude' ].abs() + 0.02
+    df[ 'Delivery_location_longitude' ] = df[ 'Restaurant_longitude' ].abs() + 0.03
+    df[ 'prep_time_s' ] = df[ 'prep_time_s' ].astype( 'Int32' )
+    return df
+
+
+def test_ids_dos_restaurantes():
+    df = pedidos()
+
+    restaurant_id, df_restaurantes = indexar_restaurantes( df )
+
+    assert restaurant_id.dtype == np.int32
+    # Um ID por restaurante, na ordem do código e da coordenada:
+    assert restaurant_id.tolist() == [ 0, 0, 0, 0, 1, 2, 2, 3, 3 ]
+    assert df_restaurantes[ 'codigo' ].tolist() == [ 'AGRRES01', 'AGRRES01', 'AGRRES010', 'BANGRES05' ]
+    assert df_restaurantes[ 'latitude' ].iloc[ :3 ].tolist() == [ 27.1, 27.3, 27.2 ]
+    assert df_restaurantes.loc[ 3, [ 'latitude', 'longitude' ] ].isna().all()
+
+    # Os IDs não dependem da ordem das linhas:
+    ordem = np.random.default_rng( 0 ).permutation( len( df ) )
+    restaurant_id_2, df_restaurantes_2 = indexar_restaurantes( df.iloc[ ordem ].reset_index( drop = True ) )
+    assert restaurant_id_2.tolist() == restaurant_id[ ordem ].tolist()
+    pd.testing.assert_frame_equal( df_restaurantes_2, df_restaurantes )
+
+
+def test_estatisticas_iguais_ao_agrupamento():
+    df = pedidos()
+
+    restaurant_id, df_restaurantes = indexar_restaurantes( df )
+
+    distancia = haversine_km( df[ 'Restaurant_latitude' ].abs(), df[ 'Restaurant_longitude' ].abs(),
+                              df[ 'Delivery_location_latitude' ], df[ 'Delivery_location_longitude' ] )
+    esperado = ( df.assign( distance = distancia, prep_min = df[ 'prep_time_s' ].astype( float ) / 60 )
+                   .groupby( 'esperado' )
+                   .agg( pedidos = ( 'Time_taken(min)', 'size' ),
+                         entregadores = ( 'Delivery_person_ID', 'nunique' ),
+                         distancia_media = ( 'distance', 'mean' ),
+                         avg_time = ( 'Time_taken(min)', 'mean' ),
+                         std_time = ( 'Time_taken(min)', 'std' ),
+                         avg_prep_min = ( 'prep_min', 'mean' ) ) )
+    # Do nome escrito à mão para o ID de cada linha:
+    esperado.index = [ restaurant_id[ df[ 'esperado' ].to_numpy() == nome ][ 0 ] for nome in esperado.index ]
+    esperado = esperado.sort_index()
+
+    colunas = list( esperado.columns )
+    pd.testing.assert_frame_equal( df_restaurantes[ colunas ], esperado, check_names = False, check_dtype = False )
+    # Cidade mais frequente de cada restaurante:
+    assert df_restaurantes[ 'City' ].tolist() == [ 'Urban', 'Urban', 'Semi-Urban', 'Metropolitian' ]
+
+
+def test_restaurante_sem_coordenada_fica_em_zona_propria():
+    _, df_restaurantes = indexar_restaurantes( pedidos() )
+
+    hierarquia = HierarquiaGeografica( df_restaurantes )
+
+    assert hierarquia.metros.tolist() == [ 'AGR', 'BANG' ]
+    assert hierarquia.zonas_do_metro( 'BANG' ) == [ 'BANG sem coordenada' ]
+    assert 'AGR sem coordenada' not in hierarquia.zonas_do_metro( 'AGR' )
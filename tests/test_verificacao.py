@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from utils import memoria_compartilhada
+from utils.atualizacao import VARIAVEL_RELATORIO
+from benchmarks.verificacao import CONJUNTOS_SINTETICOS, verificar, comparar, comparar_ranking
+
+
+@pytest.mark.parametrize( 'conjunto', [ 'train' ] + list( CONJUNTOS_SINTETICOS ) )
+def test_paineis_iguais_aos_congelados( conjunto, monkeypatch ):
+    # Como no 'python benchmarks/verificacao.py': sem a pasta compartilhada e o relatório de qualidade do dashboard.
+    monkeypatch.delenv( memoria_compartilhada.VARIAVEL_PASTA, raising = False )
+    monkeypatch.delenv( VARIAVEL_RELATORIO, raising = False )
+
+    resultados = verificar( conjunto )
+
+    falhas = [ f'{cenario} {painel} {caminho}: {diferencas[ :3 ]}'
+               for cenario, painel, caminho, diferencas in resultados if diferencas ]
+    assert resultados and not falhas, '\n'.join( falhas )
+
+
+def test_metricas_comparadas_pelo_texto_mostrado():
+    # Um arredondamento diferente para o vizinho muda o que a página mostra e não é aceito.
+    assert comparar( { 'mean_com_festival': '44.96' }, { 'mean_com_festival': '44.96' }, None ) == []
+    assert comparar( { 'mean_com_festival': '44.96' }, { 'mean_com_festival': '44.97' }, None )
+    assert comparar( { 'x': 0.1 }, { 'x': float( np.float32( 0.1 ) ) }, 'float32' ) == []
+    assert comparar( { 'x': 0.1 }, { 'x': 0.1000001 }, 'float32' )
+
+
+def test_ranking_aceita_apenas_os_empates_registrados():
+    esperado = [ [ 'Urban', 'A', 10 ], [ 'Urban', 'B', 11 ], [ 'Urban', 'C', 12 ] ]
+    empates = { 'Urban': { 'tempo': 12, 'vagas': 1, 'candidatos': [ 'C', 'D' ] } }
+
+    # Outro entregador empatado no corte:
+    assert comparar_ranking( esperado, esperado[ :2 ] + [ [ 'Urban', 'D', 12 ] ], empates ) == []
+    # Entregador que não está entre os empatados:
+    assert comparar_ranking( esperado, esperado[ :2 ] + [ [ 'Urban', 'E', 12 ] ], empates )
+    # Sem empate registrado, a ordem tem que ser a mesma:
+    assert comparar_ranking( esperado, esperado[ :2 ] + [ [ 'Urban', 'D', 12 ] ], {} )
+    assert comparar_ranking( esperado, [ esperado[ 1 ], esperado[ 0 ], esperado[ 2 ] ], empates )
@@ -0,0 +1 @@
+# Módulos compartilhados pelas páginas do dashboard (leitura, limpeza e agregações dos dados).
@@ -0,0 +1,28 @@
+import pandas as pd
+
+#=====================================================================================================================
+
+# AGREGAÇÕES
+
+#=====================================================================================================================
+
+def tempos_por_hora_cidade( df ):
+    """
+        Agrega os pedidos por hora do dia e por cidade, com o tempo médio de preparo do restaurante e o tempo médio
+        de entrega. É uma tabela pequena (no máximo 24 x número de cidades linhas), feita para ser guardada em cache.
+
+        Parâmetros:
+        - df: DataFrame limpo, com as colunas 'order_hour', 'City', 'prep_time_s', 'Time_taken(min)' e 'ID'.
+
+        Retorna:
+        - DataFrame com as colunas 'order_hour', 'City', 'pedidos', 'avg_prep_min' e 'avg_time'.
+    """
+    df_aux = df.loc[ df[ 'order_hour' ].notna(), [ 'order_hour', 'City', 'prep_time_s', 'Time_taken(min)', 'ID' ] ]
+    df_aux = ( df_aux.groupby( [ 'order_hour', 'City' ], observed = True )
+                     .agg( pedidos = ( 'ID', 'count' ),
+                           avg_prep_s = ( 'prep_time_s', 'mean' ),
+                           avg_time = ( 'Time_taken(min)', 'mean' ) )
+                     .reset_index() )
+    df_aux[ 'order_hour' ] = df_aux[ 'order_hour' ].astype( int )
+    df_aux[ 'avg_prep_min' ] = df_aux.pop( 'avg_prep_s' ).astype( float ) / 60
+    return( df_aux )
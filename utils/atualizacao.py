@@ -0,0 +1,355 @@
+import os
+import json
+import time
+import logging
+import datetime
+import threading
+from dataclasses import dataclass, field, replace
+
+import pandas as pd
+
+from utils.fonte_dados import ( ler_configuracao, listar_particoes, podar_particoes, dia_limite, dia_inicial,
+                                 ler_particao )
+from utils.limpeza import clear_dataframe_com_relatorio, somar_relatorios
+from utils.restaurantes import indexar_restaurantes
+from utils.periodos import PrefixosDiarios
+from utils.hierarquia_geo import HierarquiaGeografica
+from utils import memoria_compartilhada
+
+#=====================================================================================================================
+
+# ATUALIZAÇÃO DOS DADOS EM SEGUNDO PLANO
+
+#=====================================================================================================================
+
+logger = logging.getLogger( __name__ )
+
+# Intervalo, em segundos, entre duas verificações da fonte de dados.
+VARIAVEL_INTERVALO = 'FTC_INTERVALO_ATUALIZACAO'
+INTERVALO_PADRAO = 30
+
+# Período carregado quando a thread do processo inicia, antes de qualquer página pedir os dados: o padrão do controle
+# deslizante das páginas.
+PERIODO_INICIAL = ( datetime.datetime( 2022, 2, 11 ), datetime.datetime( 2022, 4, 13 ) )
+
+# Arquivo onde o relatório de qualidade de cada versão nova é gravado em JSON, para o monitoramento (opcional).
+VARIAVEL_RELATORIO = 'FTC_RELATORIO_QUALIDADE'
+
+
+@dataclass( frozen = True )
+class VersaoDados:
+    """
+        Uma versão completa e imutável dos dados já processados. As páginas pegam a versão atual uma única vez no
+        início de cada execução e usam sempre a mesma, mesmo que uma versão nova seja publicada no meio do caminho.
+
+        Atributos:
+        - versao: número da versão, crescente a cada recarga.
+        - assinatura: assinatura dos arquivos que deram origem a esta versão.
+        - df: DataFrame limpo (saída de 'clear_dataframe') com a coluna 'restaurant_id'. Não deve ser alterado.
+        - df_restaurantes: estatísticas por restaurante (saída de 'indexar_restaurantes').
+        - particoes: partições (caminho, intervalo) na ordem em que foram concatenadas em df.
+        - fins: linha final (exclusiva) de cada partição em df.
+        - qualidade: relatório de qualidade da limpeza desta versão (ver 'clear_dataframe_com_relatorio').
+        - prefixos: agregados diários acumulados, para comparar períodos (ver 'PrefixosDiarios').
+        - criada_em: instante (time.time()) em que a versão foi publicada.
+        - hierarquia: hierarquia região -> zona -> restaurante, para o detalhamento geográfico (ver
+          'HierarquiaGeografica').
+        - horizonte: tupla (inicio, fim) com o primeiro dia carregado e o primeiro dia que não foi carregado (ver
+          'dia_inicial' e 'dia_limite'); None no lado em que todas as partições foram carregadas.
+    """
+    versao: int
+    assinatura: tuple
+    df: pd.DataFrame = field( repr = False )
+    df_restaurantes: pd.DataFrame = field( repr = False )
+    particoes: tuple = ()
+    fins: tuple = ()
+    qualidade: dict = field( default_factory = dict, repr = False )
+    prefixos: PrefixosDiarios = field( default = None, repr = False )
+    criada_em: float = 0.0
+    hierarquia: HierarquiaGeografica = field( default = None, repr = False )
+    horizonte: tuple = ( None, None )
+
+    def cobre( self, data, inicio = None ):
+        """
+            Indica se a versão tem todas as partições necessárias para o intervalo [inicio, data).
+        """
+        comeco, limite = self.horizonte
+        data, inicio = dia_limite( data ), dia_inicial( inicio )
+        return ( ( limite is None or ( data is not None and data <= limite ) )
+                 and ( comeco is None or ( inicio is not None and inicio >= comeco ) ) )
+
+    def ate( self, data, inicio = None ):
+        """
+            Retorna as linhas das partições que podem ter pedidos no intervalo [inicio, data), sem copiar os dados.
+            Como as partições são concatenadas em ordem de data, as necessárias formam uma fatia contínua de df. O
+            filtro exato de datas continua sendo feito pela página.
+
+            Parâmetros:
+            - data: data limite (exclusiva) do filtro de datas.
+            - inicio: data inicial (inclusiva) do filtro de datas. Se None, a fatia começa na primeira linha.
+
+            Retorna:
+            - DataFrame (fatia de df).
+        """
+        mantidas = podar_particoes( self.particoes, data, inicio )
+        if len( mantidas ) == len( self.particoes ):
+            return self.df
+        if not mantidas:
+            return self.df.iloc[ :0 ]
+        posicoes = [ i for i, particao in enumerate( self.particoes ) if particao in mantidas ]
+        primeira, ultima = posicoes[ 0 ], posicoes[ -1 ]
+        if ultima - primeira + 1 != len( posicoes ):
+            # Partições sem data no meio das datadas: não formam uma fatia, e a página filtra tudo.
+            return self.df
+        return self.df.iloc[ ( self.fins[ primeira - 1 ] if primeira else 0 ):self.fins[ ultima ] ]
+
+
+class AtualizadorDados:
+    """
+        Mantém a versão atual dos dados e uma thread que observa a fonte de dados. Quando algum arquivo muda, a
+        thread relê e limpa apenas as partições alteradas, reconstrói o índice de restaurantes e publica a versão
+        nova de uma vez só, sem que nenhum usuário espere pela recarga.
+
+        Só são carregadas as partições dentro do horizonte, da menor data inicial à maior data limite já pedidas em
+        'atual': partições fora dele não são abertas até que alguma página peça um período que chegue nelas. Com a
+        thread iniciada, o período inicial é carregado assim que ela começa, e um período maior é passado à thread,
+        enquanto a página segue com a versão atual. Sem a thread (exportador, testes), a carga é feita na própria
+        chamada de 'atual'.
+
+        Com 'FTC_DADOS_COMPARTILHADOS' definida, só um dos processos do Streamlit (o publicador) carrega os dados e
+        os grava na pasta compartilhada; os demais se anexam à versão publicada sem copiá-la (ver
+        'utils.memoria_compartilhada').
+    """
+
+    def __init__( self, intervalo = None, config = None, periodo = None ):
+        self.intervalo = intervalo or float( os.environ.get( VARIAVEL_INTERVALO, INTERVALO_PADRAO ) )
+        self.config = config
+        self._atual = None
+        self._trava = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+
+        # Avisos da thread: '_pedido' acorda a thread quando uma página pede um período fora do horizonte, e
+        # '_pronta' libera quem espera pela primeira versão (ou pelo erro da primeira carga, em '_erro').
+        self._pedido = threading.Event()
+        self._pronta = threading.Event()
+        self._erro = None
+
+        # Relatório de qualidade de cada partição já limpa, por (caminho, data de modificação). As linhas dessas
+        # partições são reaproveitadas da versão atual, e só as alteradas são lidas e limpas de novo.
+        self._relatorios = {}
+
+        # Intervalo de dias (inicio, fim) que precisa ser carregado (None em um lado: sem limite). Começa vazio (ou
+        # com 'periodo') e só aumenta. Tem uma trava própria, para que as páginas não esperem uma recarga em curso.
+        self._horizonte = ( datetime.date.max, datetime.date.min )
+        self._trava_horizonte = threading.Lock()
+        if periodo is not None:
+            self._ampliar_horizonte( periodo[ 1 ], periodo[ 0 ] )
+
+        # Trava de publicador, quando o modo de dados compartilhados está ligado e este processo é o publicador.
+        self._trava_publicador = None
+        self._anexada = None
+
+    def atual( self, ate = None, inicio = None ):
+        """
+            Retorna a versão atual dos dados. Quando o período passa do horizonte já carregado, as partições que
+            faltam são pedidas à thread, e a versão atual é retornada na hora: a página confere com 'cobre' se ela
+            já tem todo o período. Só a primeira versão, que a thread carrega ao iniciar, é esperada.
+
+            Sem a thread iniciada, as partições que faltam são carregadas na própria chamada.
+
+            Parâmetros:
+            - ate: data limite (exclusiva) do filtro de datas. Se None, todas as partições posteriores são carregadas.
+            - inicio: data inicial (inclusiva) do filtro de datas. Se None, todas as partições anteriores são
+              carregadas.
+        """
+        versao = self._atual
+        if versao is not None and versao.cobre( ate, inicio ):
+            return versao
+
+        with self._trava_horizonte:
+            self._ampliar_horizonte( ate, inicio )
+        if self._thread is None or not self._thread.is_alive():
+            self.recarregar()
+            return self._atual
+
+        self._pedido.set()
+        self._pronta.wait()
+        if self._atual is None:
+            raise self._erro
+        return self._atual
+
+    def _ampliar_horizonte( self, ate, inicio ):
+        comeco, limite = self._horizonte
+        ate, inicio = dia_limite( ate ), dia_inicial( inicio )
+        self._horizonte = ( None if comeco is None or inicio is None else min( comeco, inicio ),
+                            None if limite is None or ate is None else max( limite, ate ) )
+
+    def recarregar( self ):
+        """
+            Verifica a fonte de dados e, se ela mudou desde a última versão, processa e publica uma versão nova.
+
+            Retorna:
+            - True se uma versão nova foi publicada.
+        """
+        with self._trava:
+            pasta = memoria_compartilhada.pasta_compartilhada()
+            if pasta is not None and self._trava_publicador is None:
+                self._trava_publicador = memoria_compartilhada.tentar_ser_publicador( pasta )
+            if pasta is not None and self._trava_publicador is None:
+                if self._atual is None and memoria_compartilhada.versao_publicada( pasta ) is None:
+                    # Nada publicado ainda: espera o publicador em vez de carregar os dados também. Se ele terminar
+                    # antes de publicar, este processo pega a trava e carrega os dados no lugar dele.
+                    _, self._trava_publicador = memoria_compartilhada.esperar_publicacao( pasta )
+                if self._trava_publicador is None:
+                    return self._anexar( pasta )
+
+            # O publicador carrega tudo, porque serve os períodos pedidos por todos os processos.
+            publicador = self._trava_publicador is not None
+            with self._trava_horizonte:
+                horizonte = ( None, None ) if publicador else self._horizonte
+            config = self.config or ler_configuracao()
+            todas = listar_particoes( config )
+            # Pelo menos uma partição é carregada, para a versão ter as colunas e o índice de restaurantes mesmo
+            # quando o período pedido termina antes dos dados.
+            particoes = podar_particoes( todas, horizonte[ 1 ], horizonte[ 0 ] ) or todas[ :1 ]
+            assinatura = tuple( ( str( caminho ), caminho.stat().st_mtime_ns ) for caminho, _ in particoes )
+            if self._atual is not None and self._atual.assinatura == assinatura:
+                if self._atual.horizonte != horizonte:
+                    # Nenhuma partição nova dentro do horizonte maior: a mesma versão passa a cobri-lo.
+                    self._atual = replace( self._atual, horizonte = horizonte )
+                return False
+
+            if not assinatura:
+                raise FileNotFoundError( "Nenhum arquivo de dados encontrado na fonte configurada" )
+
+            # Linhas de cada partição na versão atual, para reaproveitar as que não mudaram sem guardar uma
+            # segunda cópia delas:
+            posicoes = {}
+            if self._atual is not None:
+                posicoes = dict( zip( self._atual.assinatura, zip( ( 0, ) + self._atual.fins, self._atual.fins ) ) )
+
+            frames = []
+            relatorios = {}
+            for chave in assinatura:
+                if chave in self._relatorios and chave in posicoes:
+                    inicio, fim = posicoes[ chave ]
+                    frames.append( self._atual.df.iloc[ inicio:fim ].drop( columns = 'restaurant_id' ) )
+                    relatorios[ chave ] = self._relatorios[ chave ]
+                else:
+                    frame, relatorios[ chave ] = clear_dataframe_com_relatorio( ler_particao( chave[ 0 ] ) )
+                    frames.append( frame )
+
+            df = pd.concat( frames, ignore_index = True ) if len( frames ) > 1 else frames[ 0 ]
+            df[ 'restaurant_id' ], df_restaurantes = indexar_restaurantes( df )
+            fins = tuple( int( fim ) for fim in pd.Series( [ len( frame ) for frame in frames ] ).cumsum() )
+
+            numero = self._atual.versao + 1 if self._atual is not None else 1
+            if publicador:
+                # Um publicador novo continua a numeração do anterior, para não repetir números de versão.
+                publicada = memoria_compartilhada.versao_publicada( pasta )
+                if publicada is not None:
+                    numero = max( numero, memoria_compartilhada.ler_meta( pasta, publicada )[ 'versao' ] + 1 )
+
+            qualidade = somar_relatorios( list( relatorios.values() ) )
+            qualidade[ 'versao' ] = numero
+            qualidade[ 'restaurantes_indexados' ] = len( df_restaurantes )
+
+            # A troca é uma única atribuição: quem já pegou a versão anterior continua com ela.
+            versao = VersaoDados( numero, assinatura, df, df_restaurantes, tuple( particoes ), fins,
+                                  qualidade, PrefixosDiarios( df ), time.time(),
+                                  HierarquiaGeografica( df_restaurantes ), horizonte )
+            if publicador:
+                memoria_compartilhada.publicar( versao, pasta )
+            gravar_relatorio_qualidade( qualidade )
+            self._atual = versao
+            self._relatorios = relatorios
+            logger.info( "Dados atualizados para a versão %s (%s pedidos)", numero, len( df ) )
+            return True
+
+    def _anexar( self, pasta ):
+        # Troca para a versão publicada por outro processo, se ela for diferente da atual.
+        nome = memoria_compartilhada.versao_publicada( pasta )
+        if nome is None or nome == self._anexada:
+            return False
+
+        # Os agregados acumulados e a hierarquia vêm prontos (e mapeados em memória) do publicador:
+        meta, df, df_restaurantes, estruturas = memoria_compartilhada.anexar( pasta, nome )
+        self._atual = VersaoDados( meta[ 'versao' ], meta[ 'assinatura' ], df, df_restaurantes,
+                                   meta[ 'particoes' ], tuple( meta[ 'fins' ] ), meta[ 'qualidade' ],
+                                   PrefixosDiarios.de_estado( estruturas[ 'prefixos' ] ), meta[ 'criada_em' ],
+                                   HierarquiaGeografica.de_estado( estruturas[ 'hierarquia' ] ) )
+        self._anexada = nome
+        self._relatorios = {}
+        logger.info( "Anexado à versão %s dos dados compartilhados (%s pedidos)", meta[ 'versao' ], len( df ) )
+        return True
+
+    def _executar( self ):
+        # A primeira carga é feita assim que a thread inicia; depois, a cada intervalo ou quando uma página pede um
+        # período fora do horizonte. Um pedido feito durante a recarga mantém '_pedido' ligado e é atendido em seguida.
+        while not self._parar.is_set():
+            self._pedido.clear()
+            try:
+                self.recarregar()
+                self._erro = None
+            except Exception as erro:
+                # Um arquivo pela metade ou inválido não derruba a thread: a versão atual continua valendo e a
+                # recarga é tentada de novo na próxima verificação.
+                self._erro = erro
+                logger.exception( "Falha ao atualizar os dados; mantendo a versão %s",
+                                  self._atual.versao if self._atual else None )
+            self._pronta.set()
+            self._pedido.wait( self.intervalo )
+
+    def iniciar( self ):
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread( target = self._executar, name = 'atualizador-dados', daemon = True )
+            self._thread.start()
+        return self
+
+    def parar( self ):
+        self._parar.set()
+        self._pedido.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def gravar_relatorio_qualidade( qualidade ):
+    """
+        Grava o relatório de qualidade em JSON no arquivo de 'FTC_RELATORIO_QUALIDADE', se a variável estiver
+        definida. A escrita é atômica (arquivo temporário + os.replace), para o monitoramento nunca ler um JSON
+        pela metade.
+    """
+    destino = os.environ.get( VARIAVEL_RELATORIO )
+    if not destino:
+        return
+    temporario = f"{destino}.tmp"
+    with open( temporario, 'w', encoding = 'utf-8' ) as arquivo:
+        json.dump( qualidade, arquivo, indent = 2 )
+    os.replace( temporario, destino )
+
+
+_atualizador = None
+_trava_atualizador = threading.Lock()
+
+
+def obter_atualizador():
+    """
+        Retorna o atualizador de dados do processo, criando e iniciando a thread na primeira chamada (que já começa a
+        carregar o 'PERIODO_INICIAL'). Todas as páginas e sessões do mesmo processo compartilham o mesmo atualizador.
+    """
+    global _atualizador
+    with _trava_atualizador:
+        if _atualizador is None:
+            _atualizador = AtualizadorDados( periodo = PERIODO_INICIAL ).iniciar()
+    return _atualizador
+
+
+def dados_atuais( ate = None, inicio = None ):
+    """
+        Atalho para a versão atual dos dados do processo (ver 'VersaoDados'), pedindo as partições necessárias para o
+        intervalo [inicio, ate) (None em um lado: sem limite). A versão retornada pode ainda não cobrir o intervalo
+        (ver 'VersaoDados.cobre'), enquanto a thread carrega as partições que faltam.
+    """
+    return obter_atualizador().atual( ate, inicio )
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+
+#=====================================================================================================================
+
+# CARGA DE TRABALHO E CONCORRÊNCIA DOS ENTREGADORES
+
+#=====================================================================================================================
+
+def intervalos_entrega( df ):
+    """
+        Reconstrói o intervalo em que cada pedido ocupou o entregador: da coleta até a coleta + 'Time_taken(min)'.
+        A coleta é o pedido ('Order_Date' + 'Time_Orderd') mais o tempo de preparo, que já soma um dia quando a
+        coleta passa da meia-noite; só quando o horário do pedido é inválido usa-se 'Order_Date' + 'Time_Order_picked'.
+        Pedidos sem nenhum dos dois horários ficam de fora.
+
+        Parâmetros:
+        - df: DataFrame limpo (saída de 'clear_dataframe').
+
+        Retorna:
+        - DataFrame com 'Delivery_person_ID', 'City', 'dia', 'inicio' e 'fim' (inteiros, em segundos desde 1970).
+    """
+    coleta = ( df[ 'order_time_s' ] + df[ 'prep_time_s' ] ).fillna( df[ 'picked_time_s' ] )
+    validos = coleta.notna()
+    df_aux = df.loc[ validos, [ 'Delivery_person_ID', 'City', 'Order_Date', 'Time_taken(min)' ] ]
+    dia = df_aux[ 'Order_Date' ].to_numpy().astype( 'datetime64[s]' ).astype( np.int64 )
+    inicio = dia + coleta[ validos ].to_numpy( dtype = np.int64 )
+    return pd.DataFrame( { 'Delivery_person_ID': df_aux[ 'Delivery_person_ID' ].to_numpy(),
+                           'City': df_aux[ 'City' ].to_numpy(),
+                           'dia': dia,
+                           'inicio': inicio,
+                           'fim': inicio + df_aux[ 'Time_taken(min)' ].to_numpy( dtype = np.int64 ) * 60 } )
+
+
+def carga_por_turno( df ):
+    """
+        Calcula a carga de cada turno (um entregador em um dia) com algoritmos de varredura sobre os intervalos
+        ordenados, sem comparar pedidos dois a dois (O(n log n) no total):
+
+        - pico de concorrência: maior quantidade de entregas simultâneas, pela soma acumulada dos eventos de início
+          (+1) e fim (-1) ordenados no tempo (fins antes de inícios no mesmo instante);
+        - tempo ocupado: comprimento da união dos intervalos, usando o maior fim visto até cada início;
+        - ociosidade: intervalos sem nenhuma entrega entre o primeiro início e o último fim do turno.
+
+        Todos os turnos são processados juntos: os instantes de cada turno são deslocados para faixas que não se
+        sobrepõem, de modo que uma única ordenação e somas acumuladas globais respeitam os limites dos turnos.
+
+        Parâmetros:
+        - df: DataFrame limpo (saída de 'clear_dataframe').
+
+        Retorna:
+        - DataFrame com uma linha por turno: 'Delivery_person_ID', 'City', 'dia', 'pedidos', 'pico_concorrencia',
+          'ocupado_s', 'turno_s', 'ociosidades', 'ociosidade_total_s' e 'maior_ociosidade_s'.
+    """
+    intervalos = intervalos_entrega( df )
+    colunas = [ 'Delivery_person_ID', 'City', 'dia', 'pedidos', 'pico_concorrencia', 'ocupado_s', 'turno_s',
+                'ociosidades', 'ociosidade_total_s', 'maior_ociosidade_s' ]
+    if intervalos.empty:
+        return pd.DataFrame( columns = colunas )
+
+    turno, turnos = pd.MultiIndex.from_arrays( [ intervalos[ 'Delivery_person_ID' ], intervalos[ 'dia' ] ] ).factorize()
+    n_turnos = len( turnos )
+
+    # Desloca cada turno para a sua própria faixa de tempo:
+    base = intervalos[ 'inicio' ].min()
+    faixa = int( intervalos[ 'fim' ].max() - base ) + 1
+    inicio = intervalos[ 'inicio' ].to_numpy() - base + turno * faixa
+    fim = intervalos[ 'fim' ].to_numpy() - base + turno * faixa
+
+    # Pico de concorrência: varredura dos eventos de início e fim.
+    instantes = np.concatenate( [ inicio, fim ] )
+    eventos = np.concatenate( [ np.ones( len( inicio ), dtype = np.int64 ), -np.ones( len( fim ), dtype = np.int64 ) ] )
+    ordem = np.lexsort( ( eventos, instantes ) )
+    simultaneas = np.cumsum( eventos[ ordem ] )
+    pico = np.zeros( n_turnos, dtype = np.int64 )
+    np.maximum.at( pico, np.concatenate( [ turno, turno ] )[ ordem ], simultaneas )
+
+    # União dos intervalos e ociosidade: intervalos ordenados pelo início e maior fim visto antes de cada um.
+    ordem = np.argsort( inicio, kind = 'stable' )
+    inicio, fim, turno_ordenado = inicio[ ordem ], fim[ ordem ], turno[ ordem ]
+    maior_fim = np.maximum.accumulate( fim )
+    mesmo_turno = np.r_[ False, turno_ordenado[ 1: ] == turno_ordenado[ :-1 ] ]
+    fim_anterior = np.where( mesmo_turno, np.r_[ 0, maior_fim[ :-1 ] ], inicio )
+
+    cobertura = np.maximum( fim - np.maximum( inicio, fim_anterior ), 0 )
+    lacuna = np.where( mesmo_turno, np.maximum( inicio - fim_anterior, 0 ), 0 )
+
+    primeiro_inicio = np.full( n_turnos, np.iinfo( np.int64 ).max )
+    np.minimum.at( primeiro_inicio, turno_ordenado, inicio )
+    ultimo_fim = np.zeros( n_turnos, dtype = np.int64 )
+    np.maximum.at( ultimo_fim, turno_ordenado, fim )
+    maior_lacuna = np.zeros( n_turnos, dtype = np.int64 )
+    np.maximum.at( maior_lacuna, turno_ordenado, lacuna )
+
+    # Cidade do turno: a do primeiro pedido.
+    primeiro = np.unique( turno, return_index = True )[ 1 ]
+    return pd.DataFrame( { 'Delivery_person_ID': turnos.get_level_values( 0 ),
+                           'City': intervalos[ 'City' ].to_numpy()[ primeiro ],
+                           'dia': pd.to_datetime( turnos.get_level_values( 1 ), unit = 's' ),
+                           'pedidos': np.bincount( turno, minlength = n_turnos ),
+                           'pico_concorrencia': pico,
+                           'ocupado_s': np.bincount( turno_ordenado, cobertura, minlength = n_turnos ).astype( np.int64 ),
+                           'turno_s': ultimo_fim - primeiro_inicio,
+                           'ociosidades': np.bincount( turno_ordenado, ( lacuna > 0 ).astype( float ), minlength = n_turnos ).astype( np.int64 ),
+                           'ociosidade_total_s': np.bincount( turno_ordenado, lacuna, minlength = n_turnos ).astype( np.int64 ),
+                           'maior_ociosidade_s': maior_lacuna } )
+
+
+def _resumir( turnos, chave ):
+    # Soma os turnos por chave e calcula as razões (utilização e ociosidade média) a partir das somas.
+    df_aux = ( turnos.groupby( chave, observed = True )
+                     .agg( entregadores = ( 'Delivery_person_ID', 'nunique' ),
+                           turnos = ( 'dia', 'size' ),
+                           pedidos = ( 'pedidos', 'sum' ),
+                           pico_concorrencia = ( 'pico_concorrencia', 'max' ),
+                           pico_medio = ( 'pico_concorrencia', 'mean' ),
+                           ocupado_s = ( 'ocupado_s', 'sum' ),
+                           turno_s = ( 'turno_s', 'sum' ),
+                           ociosidades = ( 'ociosidades', 'sum' ),
+                           ociosidade_total_s = ( 'ociosidade_total_s', 'sum' ),
+                           maior_ociosidade_s = ( 'maior_ociosidade_s', 'max' ) )
+                     .reset_index() )
+    df_aux[ 'utilizacao' ] = df_aux[ 'ocupado_s' ] / df_aux[ 'turno_s' ].where( df_aux[ 'turno_s' ] > 0 )
+    df_aux[ 'ociosidade_media_min' ] = df_aux[ 'ociosidade_total_s' ] / df_aux[ 'ociosidades' ].where( df_aux[ 'ociosidades' ] > 0 ) / 60
+    df_aux[ 'maior_ociosidade_min' ] = df_aux.pop( 'maior_ociosidade_s' ) / 60
+    df_aux[ 'horas_ocupadas' ] = df_aux.pop( 'ocupado_s' ) / 3600
+    df_aux = df_aux.drop( columns = [ 'turno_s', 'ociosidade_total_s' ] )
+    return df_aux
+
+
+def analisar_carga( df ):
+    """
+        Tabelas de carga de trabalho por entregador e por cidade, a partir dos turnos de 'carga_por_turno'.
+
+        Parâmetros:
+        - df: DataFrame limpo (e filtrado, se for o caso).
+
+        Retorna:
+        - Tupla (df_entregadores, df_cidades). Em ambas: 'pedidos', 'turnos', 'pico_concorrencia' (máximo),
+          'pico_medio' (média por turno), 'utilizacao' (tempo ocupado / duração dos turnos), 'ociosidades',
+          'ociosidade_media_min', 'maior_ociosidade_min' e 'horas_ocupadas'.
+    """
+    turnos = carga_por_turno( df )
+    df_entregadores = _resumir( turnos, 'Delivery_person_ID' ).drop( columns = [ 'entregadores' ] )
+    df_cidades = _resumir( turnos, 'City' )
+    return df_entregadores, df_cidades
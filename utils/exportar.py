@@ -0,0 +1,333 @@
+"""
+Exportação dos painéis do dashboard sem o Streamlit, para relatórios em lote.
+
+Uso (a partir da raiz do projeto):
+    python -m utils.exportar --saida relatorio [--inicio 2022-02-11] [--fim 2022-04-13]
+                             [--trafego Low Medium High Jam] [--formatos html,png,csv] [--processos N]
+
+Os painéis das três páginas ('Visão Restaurantes', 'Visão Entregadores' e 'Visão Empresa') são gerados em paralelo
+para o mesmo filtro de datas e de tráfego, com as mesmas funções usadas pelas páginas. Cada página ganha uma pasta
+dentro de '--saida', com os gráficos em HTML (e PNG, se o 'kaleido' estiver instalado), as tabelas em CSV, o mapa
+em HTML e os indicadores em JSON. O arquivo 'index.html' da pasta de saída lista tudo o que foi gerado.
+
+Os dados vêm do mesmo carregamento do dashboard: com 'FTC_DADOS_COMPARTILHADOS' definida, o exportador se anexa à
+versão já publicada pelo Streamlit, sem ler nem limpar os arquivos de novo; o modelo de previsão também é lido do
+cache em disco quando a versão dos dados não mudou.
+"""
+import os
+import sys
+import json
+import time
+import html
+import argparse
+import datetime
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from utils.atualizacao import AtualizadorDados
+from utils.agregacoes import tempos_por_hora_cidade
+from utils.carga_entregadores import analisar_carga
+from utils.modelo import carregar_ou_treinar, prever
+from utils.qualidade import tabela_regras
+from utils.visao_restaurantes import ( distance_distribution, sunburst_chart, bar_chart, section_chart,
+                                       mean_std_time_festival, distancia_media, prep_time_heatmap, time_by_hour_chart,
+                                       geo_sunburst_chart )
+from utils.visao_entregadores import ( rapidez_entregadores, agrupar_media_std, ratings_per_delivers, buscar_extremo,
+                                       peak_concurrency_chart )
+from utils.visao_empresa import ( geo_map, geo_drilldown, geo_level_map, order_share_by_week, order_by_week,
+                                  order_by_city_traffic, deliver_by_traffic, order_by_day, eta_by_city_traffic )
+
+#=====================================================================================================================
+
+# EXPORTAÇÃO DOS PAINÉIS
+
+#=====================================================================================================================
+
+TRAFEGOS = [ 'Low', 'Medium', 'High', 'Jam' ]
+FORMATOS = ( 'html', 'png', 'csv' )
+
+# Mesmo período padrão do controle deslizante das páginas.
+INICIO_PADRAO = datetime.datetime( 2022, 2, 11 )
+FIM_PADRAO = datetime.datetime( 2022, 4, 13 )
+
+# Contexto de cada processo de exportação (dados filtrados, restaurantes, hierarquia geográfica, relatório de
+# qualidade e modelo).
+_contexto = None
+
+
+def filtrar( dados, inicio, fim, trafego ):
+    """
+        Aplica à versão dos dados os mesmos filtros das páginas: datas de 'inicio' (inclusiva) a 'fim' (exclusiva)
+        e tipos de tráfego selecionados.
+
+        Parâmetros:
+        - dados: versão dos dados (ver 'VersaoDados').
+        - inicio, fim: período selecionado.
+        - trafego: lista de tipos de tráfego.
+
+        Retorna:
+        - DataFrame filtrado (cópia, que pode receber colunas novas sem alterar a versão).
+    """
+    df1 = dados.ate( fim, inicio )
+    linhas_selecionadas = ( df1['Order_Date'] >= inicio ) & ( df1['Order_Date'] < fim )
+    df1 = df1.loc[linhas_selecionadas, :]
+    linhas_selecionadas = df1['Road_traffic_density'].isin( trafego )
+    return df1.loc[linhas_selecionadas, :].copy()
+
+
+def _indicadores_restaurantes( c ):
+    df1 = c[ 'df' ]
+    indicadores = { 'entregadores_unicos': int( df1.loc[:, 'Delivery_person_ID'].nunique() ),
+                    'distancia_media_km': float( distancia_media( df1 ) ) }
+    for festival, sufixo in ( ( True, 'com_festival' ), ( False, 'sem_festival' ) ):
+        for funcao in ( 'mean', 'std' ):
+            try:
+                valor = float( mean_std_time_festival( df1, funcao = funcao, Festival = festival ) )
+            except IndexError:
+                # Nenhum pedido com (ou sem) festival nos filtros selecionados.
+                valor = None
+            indicadores[ f'tempo_{funcao}_{sufixo}' ] = valor
+    return indicadores
+
+
+def _indicadores_entregadores( c ):
+    df1 = c[ 'df' ]
+    return { 'maior_idade': buscar_extremo( df1, 'Delivery_person_Age', max ),
+             'menor_idade': buscar_extremo( df1, 'Delivery_person_Age', min ),
+             'melhor_condicao': buscar_extremo( df1, 'Vehicle_condition', max ),
+             'pior_condicao': buscar_extremo( df1, 'Vehicle_condition', min ) }
+
+
+def _indicadores_empresa( c ):
+    return { 'resumo': c[ 'resumo' ], 'qualidade': c[ 'qualidade' ] }
+
+
+def _regioes( c ):
+    # Primeiro nível da hierarquia geográfica (regiões metropolitanas) para os filtros do relatório.
+    hierarquia = c[ 'hierarquia' ]
+    return geo_drilldown( hierarquia, hierarquia.somas( c[ 'df' ] ) )
+
+
+def _carga( c, tabela ):
+    df_carga, df_carga_cidade = analisar_carga( c[ 'df' ] )
+    return df_carga_cidade if tabela == 'cidades' else df_carga
+
+
+# Painéis exportados: (página, nome do arquivo, título, função que recebe o contexto). A função pode retornar uma
+# figura do plotly, um mapa do folium, um DataFrame ou um dicionário (gravado em JSON).
+PAINEIS = [
+    ( 'restaurantes', 'indicadores', 'Overall Metrics', _indicadores_restaurantes ),
+    ( 'restaurantes', 'tempo_medio_por_cidade', 'Tempo Médio de Entrega por Cidade', lambda c: section_chart( c[ 'df' ] ) ),
+    ( 'restaurantes', 'distribuicao_tempo_cidade', 'Distribuição do Tempo por Cidade', lambda c: bar_chart( c[ 'df' ] ) ),
+    ( 'restaurantes', 'distribuicao_tempo_trafego', 'Distribuição do Tempo por Cidade e Densidade de Tráfego',
+      lambda c: sunburst_chart( c[ 'df' ] ) ),
+    ( 'restaurantes', 'distribuicao_distancia', 'Distribuição da Distância', lambda c: distance_distribution( c[ 'df' ] ) ),
+    ( 'restaurantes', 'preparo_por_hora', 'Tempo de Preparo por Hora e Cidade',
+      lambda c: prep_time_heatmap( tempos_por_hora_cidade( c[ 'df' ] ) ) ),
+    ( 'restaurantes', 'entrega_por_hora', 'Tempo de Entrega por Hora do Pedido',
+      lambda c: time_by_hour_chart( tempos_por_hora_cidade( c[ 'df' ] ) ) ),
+    ( 'restaurantes', 'regioes', 'Tempo de Entrega por Região', lambda c: geo_sunburst_chart( _regioes( c ) ) ),
+    ( 'restaurantes', 'ranking_restaurantes', 'Ranking de Restaurantes',
+      lambda c: c[ 'df_restaurantes' ].sort_values( 'pedidos', ascending = False ) ),
+
+    ( 'entregadores', 'indicadores', 'Overall Metrics', _indicadores_entregadores ),
+    ( 'entregadores', 'avaliacoes_por_entregador', 'Avaliações Médias por Entregador',
+      lambda c: ratings_per_delivers( c[ 'df' ] ) ),
+    ( 'entregadores', 'avaliacoes_por_transito', 'Avaliações Médias por Trânsito',
+      lambda c: agrupar_media_std( c[ 'df' ], 'Delivery_person_Ratings', 'Road_traffic_density' ) ),
+    ( 'entregadores', 'avaliacoes_por_clima', 'Avaliações Médias por Clima',
+      lambda c: agrupar_media_std( c[ 'df' ], 'Delivery_person_Ratings', 'Weatherconditions' ) ),
+    ( 'entregadores', 'mais_rapidos', 'Top Entregadores Mais Rápidos',
+      lambda c: rapidez_entregadores( c[ 'df' ], high_speed = True ) ),
+    ( 'entregadores', 'mais_lentos', 'Top Entregadores Mais Lentos',
+      lambda c: rapidez_entregadores( c[ 'df' ], high_speed = False ) ),
+    ( 'entregadores', 'carga_por_cidade', 'Carga de Trabalho por Cidade', lambda c: _carga( c, 'cidades' ) ),
+    ( 'entregadores', 'carga_por_entregador', 'Carga de Trabalho por Entregador', lambda c: _carga( c, 'entregadores' ) ),
+    ( 'entregadores', 'pico_concorrencia', 'Pico de Entregas Simultâneas',
+      lambda c: peak_concurrency_chart( _carga( c, 'entregadores' ) ) ),
+
+    ( 'empresa', 'indicadores', 'Indicadores e Qualidade dos Dados', _indicadores_empresa ),
+    ( 'empresa', 'pedidos_por_dia', 'Orders by Day', lambda c: order_by_day( c[ 'df' ] ) ),
+    ( 'empresa', 'entregas_por_trafego', 'Divisão das entregas por Tráfego', lambda c: deliver_by_traffic( c[ 'df' ] ) ),
+    ( 'empresa', 'entregas_por_cidade_trafego', 'Divisão das entregas por Cidade e Tráfego',
+      lambda c: order_by_city_traffic( c[ 'df' ] ) ),
+    ( 'empresa', 'pedidos_por_semana', 'Order by Week', lambda c: order_by_week( c[ 'df' ] ) ),
+    ( 'empresa', 'pedidos_por_entregador_semana', 'Order Share by Week', lambda c: order_share_by_week( c[ 'df' ] ) ),
+    ( 'empresa', 'mapa', 'Visão Geográfica', lambda c: geo_map( c[ 'df' ] ) ),
+    ( 'empresa', 'mapa_regioes', 'Entregas por Região', lambda c: geo_level_map( _regioes( c ) ) ),
+    ( 'empresa', 'descartes_por_regra', 'Descartes por Regra', lambda c: tabela_regras( c[ 'qualidade' ] ) ),
+    ( 'empresa', 'previsao_por_cidade_trafego', 'Previsto x Realizado nos Filtros Atuais',
+      lambda c: eta_by_city_traffic( c[ 'df' ], prever( c[ 'df' ], c[ 'modelo' ] ) ) ),
+]
+
+
+def _iniciar_processo( contexto ):
+    global _contexto
+    warnings.simplefilter( "ignore" )
+    _contexto = contexto
+
+
+def _nativo( valor ):
+    # Escalares do numpy (idades, contagens, ...) viram os tipos do Python no JSON; o resto vira texto.
+    return valor.item() if hasattr( valor, 'item' ) else str( valor )
+
+
+def _gravar( objeto, caminho_base, formatos ):
+    """
+        Grava o resultado de um painel nos formatos pedidos e retorna a lista de arquivos gerados.
+    """
+    arquivos = []
+    if isinstance( objeto, dict ):
+        arquivos.append( caminho_base + '.json' )
+        with open( arquivos[ -1 ], 'w', encoding = 'utf-8' ) as arquivo:
+            json.dump( objeto, arquivo, indent = 2, default = _nativo )
+    elif isinstance( objeto, pd.DataFrame ):
+        if 'csv' in formatos:
+            arquivos.append( caminho_base + '.csv' )
+            objeto.to_csv( arquivos[ -1 ], index = False )
+        if 'html' in formatos:
+            arquivos.append( caminho_base + '.html' )
+            objeto.to_html( arquivos[ -1 ], index = False )
+    elif hasattr( objeto, 'write_image' ):
+        # Figura do plotly: o HTML carrega a biblioteca do CDN, para não repetir ~3 MB em cada arquivo.
+        if 'html' in formatos:
+            arquivos.append( caminho_base + '.html' )
+            objeto.write_html( arquivos[ -1 ], include_plotlyjs = 'cdn' )
+        if 'png' in formatos:
+            try:
+                objeto.write_image( caminho_base + '.png' )
+                arquivos.append( caminho_base + '.png' )
+            except ( ValueError, ImportError ):
+                # A exportação para PNG depende do 'kaleido', que não faz parte das dependências do dashboard.
+                pass
+    else:
+        # Mapa do folium: só existe em HTML.
+        arquivos.append( caminho_base + '.html' )
+        objeto.save( arquivos[ -1 ] )
+    return arquivos
+
+
+def _exportar_painel( indice, saida, formatos ):
+    """
+        Gera um painel (posição 'indice' de PAINEIS) com o contexto do processo e grava os arquivos em 'saida'.
+
+        Retorna:
+        - Dicionário com a página, o nome, o título, os arquivos gerados, o tempo gasto e o erro (se houver).
+    """
+    pagina, nome, titulo, funcao = PAINEIS[ indice ]
+    pasta = os.path.join( saida, pagina )
+    os.makedirs( pasta, exist_ok = True )
+    resultado = { 'pagina': pagina, 'nome': nome, 'titulo': titulo, 'arquivos': [], 'erro': None }
+    inicio = time.perf_counter()
+    try:
+        objeto = funcao( _contexto )
+        resultado[ 'arquivos' ] = [ os.path.relpath( caminho, saida )
+                                    for caminho in _gravar( objeto, os.path.join( pasta, nome ), formatos ) ]
+    except Exception as erro:
+        # Um painel com erro (por exemplo, sem dados nos filtros) não impede a exportação dos demais.
+        resultado[ 'erro' ] = f'{type( erro ).__name__}: {erro}'
+    resultado[ 'segundos' ] = round( time.perf_counter() - inicio, 3 )
+    return resultado
+
+
+def _gravar_indice( saida, filtros, resultados ):
+    linhas = [ '<html><head><meta charset="utf-8"><title>Relatório FTC</title></head><body>',
+               '<h1>Relatório FTC</h1>',
+               f"<p>Período: {filtros['inicio']} a {filtros['fim']} &mdash; tráfego: {', '.join( filtros['trafego'] )} "
+               f"&mdash; versão dos dados: {filtros['versao']}</p>" ]
+    for pagina in dict.fromkeys( r[ 'pagina' ] for r in resultados ):
+        linhas.append( f'<h2>Visão {pagina.capitalize()}</h2><ul>' )
+        for r in resultados:
+            if r[ 'pagina' ] != pagina:
+                continue
+            if r[ 'erro' ]:
+                linhas.append( f"<li>{html.escape( r['titulo'] )}: erro ({html.escape( r['erro'] )})</li>" )
+            else:
+                links = ' '.join( f'<a href="{a}">{os.path.splitext( a )[ 1 ][ 1: ]}</a>' for a in r[ 'arquivos' ] )
+                linhas.append( f"<li>{html.escape( r['titulo'] )}: {links}</li>" )
+        linhas.append( '</ul>' )
+    linhas.append( '</body></html>' )
+    with open( os.path.join( saida, 'index.html' ), 'w', encoding = 'utf-8' ) as arquivo:
+        arquivo.write( '\n'.join( linhas ) )
+
+
+def exportar( saida, inicio = INICIO_PADRAO, fim = FIM_PADRAO, trafego = None, formatos = ( 'html', 'csv' ),
+              processos = None, dados = None ):
+    """
+        Gera todos os painéis para um filtro de datas e de tráfego e grava os arquivos em 'saida'.
+
+        Parâmetros:
+        - saida: pasta de saída (criada se não existir).
+        - inicio, fim: período selecionado (fim exclusivo, como nas páginas).
+        - trafego: lista de tipos de tráfego (padrão: todos).
+        - formatos: formatos dos gráficos e tabelas ('html', 'png', 'csv'). Indicadores são sempre gravados em JSON.
+        - processos: quantidade de processos em paralelo (padrão: um por CPU). Com 1, tudo roda neste processo.
+        - dados: versão dos dados a usar. Se None, é carregada como no dashboard.
+
+        Retorna:
+        - Lista com o resultado de cada painel (ver '_exportar_painel'), também gravada em 'manifesto.json'.
+    """
+    trafego = list( trafego or TRAFEGOS )
+    os.makedirs( saida, exist_ok = True )
+    dados = dados or AtualizadorDados().atual( fim, inicio )
+
+    contexto = { 'df': filtrar( dados, inicio, fim, trafego ),
+                 'df_restaurantes': dados.df_restaurantes,
+                 'hierarquia': dados.hierarquia,
+                 'qualidade': dados.qualidade,
+                 'resumo': dados.prefixos.resumo( inicio, fim, trafego ),
+                 'modelo': carregar_ou_treinar( dados.df, dados.assinatura ) }
+
+    processos = processos or os.cpu_count() or 1
+    indices = range( len( PAINEIS ) )
+    if processos == 1:
+        _iniciar_processo( contexto )
+        resultados = [ _exportar_painel( i, saida, formatos ) for i in indices ]
+    else:
+        # Cada processo recebe os dados filtrados uma única vez, na inicialização, e gera vários painéis.
+        with ProcessPoolExecutor( max_workers = min( processos, len( PAINEIS ) ),
+                                  initializer = _iniciar_processo, initargs = ( contexto, ) ) as executor:
+            resultados = list( executor.map( _exportar_painel, indices,
+                                             [ saida ] * len( PAINEIS ), [ formatos ] * len( PAINEIS ) ) )
+
+    filtros = { 'inicio': inicio.strftime( '%d/%m/%Y' ), 'fim': fim.strftime( '%d/%m/%Y' ),
+                'trafego': trafego, 'versao': dados.versao }
+    with open( os.path.join( saida, 'manifesto.json' ), 'w', encoding = 'utf-8' ) as arquivo:
+        json.dump( { 'filtros': filtros, 'paineis': resultados }, arquivo, indent = 2 )
+    _gravar_indice( saida, filtros, resultados )
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser( description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter )
+    parser.add_argument( '--saida', required = True, help = 'pasta onde gravar o relatório' )
+    parser.add_argument( '--inicio', type = datetime.datetime.fromisoformat, default = INICIO_PADRAO,
+                         help = 'data inicial, inclusiva (padrão: 2022-02-11)' )
+    parser.add_argument( '--fim', type = datetime.datetime.fromisoformat, default = FIM_PADRAO,
+                         help = 'data final, exclusiva (padrão: 2022-04-13)' )
+    parser.add_argument( '--trafego', nargs = '+', choices = TRAFEGOS, default = TRAFEGOS,
+                         help = 'tipos de tráfego (padrão: todos)' )
+    parser.add_argument( '--formatos', default = 'html,csv',
+                         help = 'formatos separados por vírgula, entre ' + ', '.join( FORMATOS ) + ' (padrão: html,csv)' )
+    parser.add_argument( '--processos', type = int, help = 'processos em paralelo (padrão: um por CPU)' )
+    args = parser.parse_args()
+
+    formatos = tuple( f.strip() for f in args.formatos.split( ',' ) if f.strip() )
+    invalidos = set( formatos ) - set( FORMATOS )
+    if invalidos:
+        parser.error( f"formatos inválidos: {', '.join( sorted( invalidos ) )}" )
+
+    inicio = time.perf_counter()
+    resultados = exportar( args.saida, args.inicio, args.fim, args.trafego, formatos, args.processos )
+    erros = [ r for r in resultados if r[ 'erro' ] ]
+    for r in erros:
+        sys.stderr.write( f"{r['pagina']}/{r['nome']}: {r['erro']}\n" )
+    sys.stdout.write( f"{len( resultados ) - len( erros )} painéis exportados em {args.saida} "
+                      f"({time.perf_counter() - inicio:.1f} s)\n" )
+    sys.exit( 1 if erros else 0 )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+import os
+import re
+import json
+import datetime
+from pathlib import Path
+
+import pandas as pd
+
+#=====================================================================================================================
+
+# FONTE DE DADOS
+
+#=====================================================================================================================
+
+# Diretório raiz do projeto: caminhos relativos da configuração são resolvidos a partir daqui, e não do diretório
+# de onde o 'streamlit run' foi chamado.
+RAIZ_PROJETO = Path( __file__ ).resolve().parent.parent
+
+# Variável de ambiente e arquivo de configuração que apontam para os dados:
+VARIAVEL_AMBIENTE = 'FTC_FONTE_DADOS'
+ARQUIVO_CONFIG = RAIZ_PROJETO / 'fonte_dados.json'
+CAMINHO_PADRAO = 'train.csv'
+PADRAO_ARQUIVOS = '*.csv'
+
+# Nomes de partição aceitos: '2022-03-19' (um arquivo por dia) ou '2022-03' (um arquivo por mês), em qualquer
+# posição do nome do arquivo, por exemplo 'train_2022-03-19.csv' ou 'pedidos-2022-03.csv'.
+REGEX_PARTICAO = re.compile( r'(\d{4})-(\d{2})(?:-(\d{2}))?' )
+
+# Colunas tratadas como texto pela limpeza ('.str.strip()', comparação com 'NaN', extração do número do tempo). No
+# 'train.csv' inteiro elas já são lidas como texto por causa dos 'NaN ', mas uma partição pequena sem nenhum 'NaN '
+# teria, por exemplo, 'multiple_deliveries' e 'Delivery_person_Age' lidas como inteiros. O tipo é fixado na leitura
+# para que toda partição chegue à limpeza igual ao arquivo único.
+COLUNAS_TEXTO = [ 'ID', 'Delivery_person_ID', 'Delivery_person_Age', 'Delivery_person_Ratings', 'Order_Date',
+                  'Time_Orderd', 'Time_Order_picked', 'Weatherconditions', 'Road_traffic_density', 'Type_of_order',
+                  'Type_of_vehicle', 'multiple_deliveries', 'Festival', 'City', 'Time_taken(min)' ]
+
+
+def ler_configuracao():
+    """
+        Lê a configuração da fonte de dados. A variável de ambiente 'FTC_FONTE_DADOS' tem prioridade sobre o arquivo
+        'fonte_dados.json' na raiz do projeto, que por sua vez tem prioridade sobre o padrão 'train.csv'.
+
+        Retorna:
+        - Um dicionário com as chaves 'caminho' (Path absoluto) e 'padrao' (glob dos arquivos quando o caminho é
+          um diretório).
+    """
+    config = { 'caminho': CAMINHO_PADRAO, 'padrao': PADRAO_ARQUIVOS }
+
+    if ARQUIVO_CONFIG.exists():
+        with open( ARQUIVO_CONFIG, encoding = 'utf-8' ) as arquivo:
+            config.update( json.load( arquivo ) )
+
+    if os.environ.get( VARIAVEL_AMBIENTE ):
+        config[ 'caminho' ] = os.environ[ VARIAVEL_AMBIENTE ]
+
+    caminho = Path( config[ 'caminho' ] ).expanduser()
+    if not caminho.is_absolute():
+        caminho = RAIZ_PROJETO / caminho
+    config[ 'caminho' ] = caminho
+    return config
+
+
+def intervalo_particao( caminho ):
+    """
+        Extrai do nome do arquivo o intervalo de datas coberto pela partição.
+
+        Parâmetros:
+        - caminho: Path do arquivo.
+
+        Retorna:
+        - Uma tupla (inicio, fim) de datetime.date, com 'fim' exclusivo, ou None quando o nome não tem data.
+    """
+    achado = REGEX_PARTICAO.search( caminho.stem )
+    if achado is None:
+        return None
+
+    ano, mes, dia = achado.groups()
+    ano, mes = int( ano ), int( mes )
+    try:
+        if dia is not None:
+            inicio = datetime.date( ano, mes, int( dia ) )
+            return ( inicio, inicio + datetime.timedelta( days = 1 ) )
+        inicio = datetime.date( ano, mes, 1 )
+    except ValueError:
+        return None
+
+    if mes == 12:
+        fim = datetime.date( ano + 1, 1, 1 )
+    else:
+        fim = datetime.date( ano, mes + 1, 1 )
+    return ( inicio, fim )
+
+
+def listar_particoes( config = None ):
+    """
+        Lista os arquivos da fonte de dados com o intervalo de datas de cada um.
+
+        Parâmetros:
+        - config: configuração retornada por 'ler_configuracao'. Se None, a configuração é lida novamente.
+
+        Retorna:
+        - Lista de tuplas (caminho, intervalo), ordenada pelo nome do arquivo. O intervalo é None quando o arquivo
+          não é particionado por data (por exemplo o 'train.csv' único).
+    """
+    if config is None:
+        config = ler_configuracao()
+    caminho = config[ 'caminho' ]
+
+    if caminho.is_dir():
+        arquivos = sorted( caminho.glob( config[ 'padrao' ] ) )
+        return [ ( arquivo, intervalo_particao( arquivo ) ) for arquivo in arquivos ]
+
+    if not caminho.exists():
+        raise FileNotFoundError( f"A fonte de dados '{caminho}' não existe" )
+    return [ ( caminho, None ) ]
+
+
+def podar_particoes( particoes, ate = None, inicio = None ):
+    """
+        Descarta as partições que não podem ter pedidos no intervalo [inicio, ate).
+
+        Parâmetros:
+        - particoes: lista retornada por 'listar_particoes'.
+        - ate: data limite (exclusiva), datetime.date ou datetime.datetime. Se None, não há limite superior.
+        - inicio: data inicial (inclusiva), datetime.date ou datetime.datetime. Se None, não há limite inferior.
+
+        Retorna:
+        - A lista de partições que precisam ser lidas.
+    """
+    ate, inicio = dia_limite( ate ), dia_inicial( inicio )
+    if ate is None and inicio is None:
+        return list( particoes )
+
+    return [ ( caminho, intervalo ) for caminho, intervalo in particoes
+             if intervalo is None or ( ( ate is None or intervalo[ 0 ] < ate )
+                                       and ( inicio is None or intervalo[ 1 ] > inicio ) ) ]
+
+
+def dia_limite( ate ):
+    """
+        Converte a data limite (exclusiva) do filtro de datas no primeiro dia que não precisa ser lido.
+
+        Parâmetros:
+        - ate: datetime.date, datetime.datetime (ou pd.Timestamp) ou None.
+
+        Retorna:
+        - datetime.date, ou None quando não há limite.
+    """
+    if ate is None:
+        return None
+    if isinstance( ate, datetime.datetime ):
+        return ate.date() if ate.time() == datetime.time( 0 ) else ate.date() + datetime.timedelta( days = 1 )
+    return ate
+
+
+def dia_inicial( inicio ):
+    """
+        Converte a data inicial (inclusiva) do filtro de datas no primeiro dia que precisa ser lido.
+
+        Parâmetros:
+        - inicio: datetime.date, datetime.datetime (ou pd.Timestamp) ou None.
+
+        Retorna:
+        - datetime.date, ou None quando não há limite.
+    """
+    if isinstance( inicio, datetime.datetime ):
+        return inicio.date()
+    return inicio
+
+
+def ler_particao( caminho ):
+    """
+        Lê um arquivo da fonte de dados no formato bruto do 'train.csv', com as colunas de 'COLUNAS_TEXTO' sempre
+        como texto.
+
+        Parâmetros:
+        - caminho: caminho do arquivo (ou objeto de arquivo).
+
+        Retorna:
+        - DataFrame bruto, pronto para 'clear_dataframe'.
+    """
+    return pd.read_csv( caminho, dtype = { coluna: str for coluna in COLUNAS_TEXTO } )
@@ -0,0 +1,43 @@
+import numpy as np
+
+#=====================================================================================================================
+
+# FUNÇÕES GEOGRÁFICAS
+
+#=====================================================================================================================
+
+# Mesmo raio médio da Terra usado pela biblioteca 'haversine' (Unit.KILOMETERS), para que os resultados coincidam.
+RAIO_TERRA_KM = 6371.0088
+
+
+def haversine_km( lat1, lon1, lat2, lon2 ):
+    """
+        Distância haversine vetorizada, em quilômetros, entre dois conjuntos de pontos. Equivale a aplicar
+        'haversine( (lat1, lon1), (lat2, lon2), unit = Unit.KILOMETERS )' linha a linha, sem o custo do 'apply'.
+
+        Parâmetros:
+        - lat1, lon1: latitudes e longitudes de origem, em graus (arrays ou Series).
+        - lat2, lon2: latitudes e longitudes de destino, em graus.
+
+        Retorna:
+        - Array numpy com as distâncias em quilômetros.
+    """
+    lat1, lon1, lat2, lon2 = ( np.radians( np.asarray( valor, dtype = float ) ) for valor in ( lat1, lon1, lat2, lon2 ) )
+    d = ( np.sin( ( lat2 - lat1 ) * 0.5 ) ** 2
+          + np.cos( lat1 ) * np.cos( lat2 ) * np.sin( ( lon2 - lon1 ) * 0.5 ) ** 2 )
+    return 2 * RAIO_TERRA_KM * np.arcsin( np.sqrt( d ) )
+
+
+def distancia_entregas( df ):
+    """
+        Distância haversine entre o restaurante e o local de entrega de cada pedido.
+
+        Parâmetros:
+        - df: DataFrame com as colunas 'Restaurant_latitude', 'Restaurant_longitude', 'Delivery_location_latitude'
+          e 'Delivery_location_longitude'.
+
+        Retorna:
+        - Array numpy com as distâncias em quilômetros, alinhado com as linhas de df.
+    """
+    return haversine_km( df[ 'Restaurant_latitude' ], df[ 'Restaurant_longitude' ],
+                         df[ 'Delivery_location_latitude' ], df[ 'Delivery_location_longitude' ] )
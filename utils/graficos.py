@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+#=====================================================================================================================
+
+# REDUÇÃO DOS DADOS DOS GRÁFICOS
+
+#=====================================================================================================================
+
+# Quantidade máxima de pontos (ou barras) enviada ao navegador por figura.
+PONTOS_POR_FIGURA = 2000
+
+# Frequências testadas, da mais fina para a mais grossa, ao agregar séries diárias que passam do limite de pontos.
+FREQUENCIAS = [ ( 'W-SUN', 'semana' ), ( 'MS', 'mês' ), ( 'QS', 'trimestre' ), ( 'YS', 'ano' ) ]
+
+
+def lttb( x, y, n_pontos ):
+    """
+        Seleciona os pontos de uma série pelo algoritmo 'Largest-Triangle-Three-Buckets', que preserva o formato
+        visual da linha (picos e vales) usando apenas n_pontos.
+
+        Parâmetros:
+        - x, y: arrays numéricos da série, com x em ordem crescente e sem nulos.
+        - n_pontos: quantidade de pontos desejada.
+
+        Retorna:
+        - Array com as posições dos pontos escolhidos, em ordem crescente (sempre inclui o primeiro e o último).
+    """
+    x = np.asarray( x, dtype = float )
+    y = np.asarray( y, dtype = float )
+    n = len( x )
+    if n_pontos >= n or n_pontos < 3:
+        return np.arange( n )
+
+    # n_pontos - 2 baldes entre o primeiro e o último ponto:
+    limites = np.linspace( 1, n - 1, n_pontos - 1 ).astype( np.int64 )
+    indices = np.empty( n_pontos, dtype = np.int64 )
+    indices[ 0 ], indices[ -1 ] = 0, n - 1
+
+    a = 0
+    for i in range( n_pontos - 2 ):
+        inicio, fim = limites[ i ], limites[ i + 1 ]
+        prox_fim = limites[ i + 2 ] if i + 2 < len( limites ) else n
+        media_x = x[ fim:prox_fim ].mean()
+        media_y = y[ fim:prox_fim ].mean()
+
+        # Área do triângulo formado pelo ponto anterior escolhido, cada candidato do balde e a média do próximo:
+        area = np.abs( ( x[ a ] - media_x ) * ( y[ inicio:fim ] - y[ a ] )
+                       - ( x[ a ] - x[ inicio:fim ] ) * ( media_y - y[ a ] ) )
+        a = inicio + int( np.argmax( area ) )
+        indices[ i + 1 ] = a
+    return indices
+
+
+def reduzir_linha( df, x, y, limite = PONTOS_POR_FIGURA ):
+    """
+        Reduz uma série para no máximo 'limite' pontos com LTTB. Séries menores que o limite voltam inalteradas.
+
+        Parâmetros:
+        - df: DataFrame com a série, ordenado por x.
+        - x: coluna do eixo x (numérica, de datas ou de textos ordenáveis como 'week_of_year').
+        - y: coluna numérica do eixo y.
+        - limite: quantidade máxima de pontos.
+
+        Retorna:
+        - DataFrame com as linhas escolhidas.
+    """
+    df = df.loc[ df[ y ].notna(), : ]
+    if len( df ) <= limite:
+        return df
+
+    valores_x = df[ x ]
+    if pd.api.types.is_datetime64_any_dtype( valores_x ):
+        valores_x = valores_x.astype( 'int64' )
+    elif not pd.api.types.is_numeric_dtype( valores_x ):
+        valores_x = np.arange( len( df ) )
+    return df.iloc[ lttb( valores_x, df[ y ], limite ) ]
+
+
+def agregar_por_periodo( df, coluna_data, coluna_valor, limite = PONTOS_POR_FIGURA ):
+    """
+        Soma uma série diária em períodos cada vez maiores (semana, mês, trimestre, ano) até caber no limite de
+        barras. Séries que já cabem no limite voltam inalteradas.
+
+        Parâmetros:
+        - df: DataFrame com uma linha por data.
+        - coluna_data: coluna de datas.
+        - coluna_valor: coluna a ser somada.
+        - limite: quantidade máxima de barras.
+
+        Retorna:
+        - Tupla (DataFrame agregado, nome do período usado: 'dia', 'semana', 'mês', ...).
+    """
+    if len( df ) <= limite:
+        return df, 'dia'
+
+    serie = df.set_index( coluna_data )[ coluna_valor ]
+    for frequencia, nome in FREQUENCIAS:
+        df_aux = serie.resample( frequencia ).sum().reset_index()
+        if len( df_aux ) <= limite:
+            return df_aux, nome
+    return df_aux, nome
+
+
+def tipo_compacto( valores ):
+    """
+        Converte um array numérico para o menor tipo que representa os valores sem perda visível no gráfico:
+        inteiros no menor tipo inteiro que os comporta e reais em float32.
+
+        Retorna:
+        - O array convertido, ou None se os valores não forem numéricos.
+    """
+    try:
+        valores = np.asarray( valores )
+    except ( TypeError, ValueError ):
+        return None
+    if valores.dtype.kind in 'iu' and valores.size:
+        for tipo in ( np.int8, np.int16, np.int32 ):
+            if np.iinfo( tipo ).min <= valores.min() and valores.max() <= np.iinfo( tipo ).max:
+                return valores.astype( tipo )
+        return valores
+    if valores.dtype.kind == 'f':
+        return valores.astype( np.float32 )
+    return None
+
+
+def compactar_figura( fig ):
+    """
+        Troca os dados numéricos dos traços da figura por arrays numpy de tipo compacto. A partir do plotly 6 esses
+        arrays são enviados ao navegador como 'typed arrays' codificados em base64, em vez de listas JSON número a
+        número, o que reduz bastante o tamanho da figura.
+
+        Parâmetros:
+        - fig: figura plotly.
+
+        Retorna:
+        - A mesma figura, alterada.
+    """
+    for trace in fig.data:
+        for atributo in ( 'x', 'y', 'z', 'values' ):
+            if atributo in trace and trace[ atributo ] is not None:
+                compacto = tipo_compacto( trace[ atributo ] )
+                if compacto is not None:
+                    trace[ atributo ] = compacto
+        # Barras, pizzas e 'sunburst' têm 'marker' sem 'size': só os traços com tamanho por ponto são compactados.
+        if 'marker' in trace and 'size' in trace.marker and trace.marker.size is not None \
+           and not np.isscalar( trace.marker.size ):
+            compacto = tipo_compacto( trace.marker.size )
+            if compacto is not None:
+                trace.marker.size = compacto
+    return fig
@@ -0,0 +1,192 @@
+import numpy as np
+import pandas as pd
+
+from utils.geo import haversine_km
+
+#=====================================================================================================================
+
+# HIERARQUIA GEOGRÁFICA (REGIÃO METROPOLITANA -> ZONA -> RESTAURANTE)
+
+#=====================================================================================================================
+
+# Lado, em graus, das células da grade que dividem cada região metropolitana em zonas (~5,5 km na latitude).
+TAMANHO_ZONA_GRAUS = 0.05
+
+NIVEIS = ( 'metro', 'zona', 'restaurante' )
+
+# Colunas das somas por restaurante (ver 'HierarquiaGeografica.somas').
+_PEDIDOS, _TEMPO, _TEMPO2, _DISTANCIA = range( 4 )
+
+
+def metro_restaurante( codigos ):
+    """
+        Extrai a região metropolitana do código do restaurante: 'INDORES13' -> 'INDO', 'COIMBRES16' -> 'COIMB'.
+
+        Parâmetros:
+        - codigos: Series com os códigos dos restaurantes (coluna 'codigo' de 'indexar_restaurantes').
+
+        Retorna:
+        - Series com a região. Códigos fora do padrão são mantidos inteiros.
+    """
+    codigos = pd.Series( codigos )
+    return codigos.str.extract( r'^(.*?)RES', expand = False ).fillna( codigos )
+
+
+def zona_grade( metro, latitude, longitude, tamanho = TAMANHO_ZONA_GRAUS ):
+    """
+        Nomeia a célula da grade de cada restaurante pela região e pelo centro da célula, por exemplo
+        'BANG 12.975,77.625'. Restaurantes sem coordenada ficam na zona '<região> sem coordenada'.
+
+        Parâmetros:
+        - metro: Series com a região de cada restaurante.
+        - latitude, longitude: coordenadas normalizadas dos restaurantes (NaN quando desconhecidas).
+        - tamanho: lado da célula, em graus.
+
+        Retorna:
+        - Series com o nome da zona.
+    """
+    metro = pd.Series( metro ).reset_index( drop = True )
+    centro_lat = ( np.floor( np.asarray( latitude, dtype = float ) / tamanho ) + 0.5 ) * tamanho
+    centro_lon = ( np.floor( np.asarray( longitude, dtype = float ) / tamanho ) + 0.5 ) * tamanho
+    zona = ( metro + ' ' + pd.Series( centro_lat ).map( '{:.3f}'.format )
+                   + ',' + pd.Series( centro_lon ).map( '{:.3f}'.format ) )
+    return zona.mask( np.isnan( centro_lat ) | np.isnan( centro_lon ), metro + ' sem coordenada' )
+
+
+class HierarquiaGeografica:
+    """
+        Hierarquia região metropolitana -> zona (célula da grade) -> restaurante, montada uma única vez por versão
+        dos dados a partir do índice de restaurantes.
+
+        Os agregados de qualquer nível saem das somas por restaurante dos pedidos filtrados (pedidos, soma e soma
+        dos quadrados do tempo e soma da distância), que são somadas de novo para a zona e para a região: a média e
+        o desvio padrão de cada nível são exatos, e cada nível é montado sob demanda, apenas para os filhos do nó
+        selecionado. Assim as páginas mandam ao navegador só o nível que está sendo exibido.
+    """
+
+    def __init__( self, df_restaurantes, tamanho_zona = TAMANHO_ZONA_GRAUS ):
+        metro = metro_restaurante( df_restaurantes[ 'codigo' ].reset_index( drop = True ) )
+        zona = zona_grade( metro, df_restaurantes[ 'latitude' ], df_restaurantes[ 'longitude' ], tamanho_zona )
+
+        self.metros, self.metro_idx = np.unique( metro.to_numpy( dtype = str ), return_inverse = True )
+        self.zonas, self.zona_idx = np.unique( zona.to_numpy( dtype = str ), return_inverse = True )
+        # Região de cada zona (todas as linhas de uma zona têm a mesma região, porque o nome começa por ela):
+        self.zona_metro_idx = np.zeros( len( self.zonas ), dtype = np.int64 )
+        self.zona_metro_idx[ self.zona_idx ] = self.metro_idx
+
+        self.codigos = df_restaurantes[ 'codigo' ].to_numpy( dtype = str )
+        self.latitude = df_restaurantes[ 'latitude' ].to_numpy( dtype = float )
+        self.longitude = df_restaurantes[ 'longitude' ].to_numpy( dtype = float )
+
+    # Arrays que formam o estado da instância, gravados pelo publicador e mapeados em memória pelos demais processos
+    # (ver 'utils.memoria_compartilhada').
+    ESTADO = ( 'metros', 'metro_idx', 'zonas', 'zona_idx', 'zona_metro_idx', 'codigos', 'latitude', 'longitude' )
+
+    def estado( self ):
+        """
+            Retorna um dicionário com os arrays numpy de 'ESTADO', de onde 'de_estado' remonta a instância.
+        """
+        return { nome: getattr( self, nome ) for nome in self.ESTADO }
+
+    @classmethod
+    def de_estado( cls, estado ):
+        """
+            Remonta a instância a partir dos arrays de 'estado' (que podem ser somente leitura), sem passar pelo
+            índice de restaurantes.
+        """
+        hierarquia = cls.__new__( cls )
+        for nome in cls.ESTADO:
+            setattr( hierarquia, nome, estado[ nome ] )
+        return hierarquia
+
+    def zonas_do_metro( self, metro ):
+        """
+            Retorna a lista com o nome das zonas de uma região metropolitana.
+        """
+        return list( self.zonas[ self.zona_metro_idx == self._posicao( self.metros, metro ) ] )
+
+    def somas( self, df ):
+        """
+            Soma os pedidos filtrados por restaurante. É a única passada sobre os pedidos; os níveis são montados a
+            partir dela.
+
+            Parâmetros:
+            - df: DataFrame limpo e filtrado, com a coluna 'restaurant_id'.
+
+            Retorna:
+            - Array (n_restaurantes, 4) com pedidos, soma e soma dos quadrados de 'Time_taken(min)' e soma da
+              distância de entrega, em km.
+        """
+        restaurant_id = df[ 'restaurant_id' ].to_numpy()
+        tempo = df[ 'Time_taken(min)' ].to_numpy( dtype = float )
+        # Mesma distância (com as coordenadas normalizadas) usada nas estatísticas de 'indexar_restaurantes':
+        distancia = haversine_km( df[ 'Restaurant_latitude' ].abs(), df[ 'Restaurant_longitude' ].abs(),
+                                  df[ 'Delivery_location_latitude' ].abs(), df[ 'Delivery_location_longitude' ].abs() )
+        n = len( self.codigos )
+        return np.column_stack( [ np.bincount( restaurant_id, weights = pesos, minlength = n )
+                                  for pesos in ( np.ones_like( tempo ), tempo, tempo * tempo, distancia ) ] )
+
+    def nivel( self, somas, nivel = 'metro', metro = None, zona = None ):
+        """
+            Monta os agregados de um nível da hierarquia, apenas para os filhos do nó selecionado.
+
+            Parâmetros:
+            - somas: saída de 'somas' para os filtros atuais.
+            - nivel: 'metro' (todas as regiões), 'zona' (zonas de 'metro') ou 'restaurante' (restaurantes de 'zona').
+            - metro, zona: nomes do nó selecionado nos níveis acima.
+
+            Retorna:
+            - DataFrame com 'nome', 'pai', 'pedidos', 'restaurantes', 'avg_time', 'std_time', 'distancia_media',
+              'latitude' e 'longitude' (centro dos restaurantes, ponderado pelos pedidos), um nó por linha, só com
+              os nós que têm pedidos. No nível de restaurante, o índice é o 'restaurant_id'.
+        """
+        if nivel == 'metro':
+            grupo, nomes, pai = self.metro_idx, self.metros, 'Todas'
+            selecao = np.ones( len( self.codigos ), dtype = bool )
+        elif nivel == 'zona':
+            grupo, nomes, pai = self.zona_idx, self.zonas, metro
+            selecao = self.metro_idx == self._posicao( self.metros, metro )
+        elif nivel == 'restaurante':
+            grupo, nomes, pai = np.arange( len( self.codigos ) ), self.codigos, zona
+            selecao = self.zona_idx == self._posicao( self.zonas, zona )
+        else:
+            raise ValueError( f"O nível deve ser um de {', '.join( NIVEIS )}" )
+
+        selecao &= somas[ :, _PEDIDOS ] > 0
+        totais = np.zeros( ( len( nomes ), somas.shape[ 1 ] ) )
+        np.add.at( totais, grupo[ selecao ], somas[ selecao ] )
+        restaurantes = np.bincount( grupo[ selecao ], minlength = len( nomes ) )
+
+        # Centro ponderado pelos pedidos, só com os restaurantes de coordenada conhecida:
+        com_coordenada = selecao & ~np.isnan( self.latitude )
+        pesos = np.bincount( grupo[ com_coordenada ], weights = somas[ com_coordenada, _PEDIDOS ], minlength = len( nomes ) )
+        latitude, longitude = ( np.bincount( grupo[ com_coordenada ],
+                                             weights = coordenada[ com_coordenada ] * somas[ com_coordenada, _PEDIDOS ],
+                                             minlength = len( nomes ) )
+                                for coordenada in ( self.latitude, self.longitude ) )
+
+        mantidos = np.flatnonzero( totais[ :, _PEDIDOS ] > 0 )
+        totais, pesos = totais[ mantidos ], pesos[ mantidos ]
+        pedidos = totais[ :, _PEDIDOS ]
+        with np.errstate( invalid = 'ignore', divide = 'ignore' ):
+            # Desvio padrão amostral (como o 'std' do pandas), a partir da soma e da soma dos quadrados:
+            desvios = np.clip( totais[ :, _TEMPO2 ] - totais[ :, _TEMPO ] ** 2 / pedidos, 0, None )
+            variancia = desvios / np.where( pedidos > 1, pedidos - 1, np.nan )
+            df_nivel = pd.DataFrame( { 'nome': nomes[ mantidos ],
+                                       'pai': pai,
+                                       'pedidos': pedidos.astype( np.int64 ),
+                                       'restaurantes': restaurantes[ mantidos ],
+                                       'avg_time': totais[ :, _TEMPO ] / pedidos,
+                                       'std_time': np.sqrt( variancia ),
+                                       'distancia_media': totais[ :, _DISTANCIA ] / pedidos,
+                                       'latitude': latitude[ mantidos ] / pesos,
+                                       'longitude': longitude[ mantidos ] / pesos },
+                                     index = pd.Index( mantidos, name = 'restaurant_id' ) if nivel == 'restaurante' else None )
+        return df_nivel
+
+    @staticmethod
+    def _posicao( nomes, nome ):
+        posicao = int( np.searchsorted( nomes, nome ) )
+        if posicao >= len( nomes ) or nomes[ posicao ] != nome:
+            raise ValueError( f"'{nome}' não existe na hierarquia geográfica" )
+        return posicao
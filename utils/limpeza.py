@@ -0,0 +1,223 @@
+import numpy as np
+import pandas as pd
+
+#=====================================================================================================================
+
+# LIMPEZA DOS DADOS
+
+#=====================================================================================================================
+
+SEGUNDOS_POR_DIA = 24 * 60 * 60
+
+
+def horario_em_segundos( serie ):
+    """
+        Converte, de forma vetorizada, uma coluna de horários no formato 'HH:MM' ou 'HH:MM:SS' em segundos desde a
+        meia-noite. Valores 'NaN' ou em outro formato viram nulos.
+
+        Parâmetros:
+        - serie: Series de strings com os horários.
+
+        Retorna:
+        - Series do tipo 'Int32' (inteiro com nulos) com os segundos desde a meia-noite.
+    """
+    partes = ( serie.astype( str )
+                    .str.strip()
+                    .str.extract( r'^(\d{1,2}):(\d{2})(?::(\d{2}))?$' )
+                    .astype( float ) )
+    segundos = partes[ 0 ] * 3600 + partes[ 1 ] * 60 + partes[ 2 ].fillna( 0 )
+
+    # Horários impossíveis (por exemplo '25:70') também são tratados como nulos:
+    segundos = segundos.where( segundos < SEGUNDOS_POR_DIA )
+    return segundos.astype( 'Int32' )
+
+
+def time_features( df1 ):
+    """
+        Cria as colunas derivadas dos horários do pedido e da coleta, calculadas uma única vez na limpeza:
+
+        - 'order_time_s': horário do pedido em segundos desde a meia-noite.
+        - 'picked_time_s': horário da coleta em segundos desde a meia-noite.
+        - 'order_hour': hora do dia do pedido (0 a 23).
+        - 'prep_time_s': tempo de preparo do restaurante (coleta - pedido), em segundos. Quando a coleta acontece
+          depois da meia-noite de um pedido feito antes dela, soma-se um dia.
+
+        Parâmetros:
+        - df1: DataFrame com as colunas 'Time_Orderd' e 'Time_Order_picked'.
+
+        Retorna:
+        - O mesmo DataFrame com as novas colunas (inteiros com nulos quando algum dos horários é 'NaN').
+    """
+    df1[ 'order_time_s' ] = horario_em_segundos( df1[ 'Time_Orderd' ] )
+    df1[ 'picked_time_s' ] = horario_em_segundos( df1[ 'Time_Order_picked' ] )
+    df1[ 'order_hour' ] = ( df1[ 'order_time_s' ] // 3600 ).astype( 'Int8' )
+    df1[ 'prep_time_s' ] = ( ( df1[ 'picked_time_s' ] - df1[ 'order_time_s' ] ) % SEGUNDOS_POR_DIA ).astype( 'Int32' )
+    return( df1 )
+
+
+# Regras de descarte de linhas, na ordem em que são aplicadas: (nome da regra, coluna, valor que indica ausência).
+REGRAS_DESCARTE = [ ( 'Delivery_person_Ratings', 'Delivery_person_Ratings', 'NaN' ),
+                    ( 'multiple_deliveries', 'multiple_deliveries', 'NaN' ),
+                    ( 'Weatherconditions', 'Weatherconditions', 'conditions NaN' ),
+                    ( 'Road_traffic_density', 'Road_traffic_density', 'NaN' ),
+                    ( 'City', 'City', 'NaN' ),
+                    ( 'Festival', 'Festival', 'NaN' ),
+                    ( 'Delivery_person_Age', 'Delivery_person_Age', 'NaN' ) ]
+
+# Regra extra para o tempo de entrega sem número (por exemplo '(min) NaN'):
+REGRA_TEMPO = 'Time_taken(min)'
+
+
+def relatorio_vazio():
+    """
+        Retorna um relatório de qualidade zerado, com a mesma estrutura do produzido por 'clear_dataframe_com_relatorio'.
+    """
+    regras = [ regra for regra, _, _ in REGRAS_DESCARTE ] + [ REGRA_TEMPO ]
+    return { 'linhas_lidas': 0,
+             'linhas_validas': 0,
+             'linhas_descartadas': 0,
+             'regras': { regra: { 'falhas': 0, 'descartes': 0 } for regra in regras },
+             'coordenadas_invalidas': { 'restaurante_zeradas': 0, 'restaurante_negativas': 0,
+                                        'entrega_zeradas': 0, 'entrega_negativas': 0 },
+             'horarios_invalidos': { 'Time_Orderd': 0, 'Time_Order_picked': 0 } }
+
+
+def somar_relatorios( relatorios ):
+    """
+        Soma relatórios de qualidade de partes diferentes dos dados (por exemplo de cada partição).
+
+        Parâmetros:
+        - relatorios: lista de relatórios.
+
+        Retorna:
+        - Um novo relatório com a soma de todos os contadores.
+    """
+    def somar( destino, origem ):
+        for chave, valor in origem.items():
+            if isinstance( valor, dict ):
+                somar( destino.setdefault( chave, {} ), valor )
+            else:
+                destino[ chave ] = destino.get( chave, 0 ) + valor
+
+    total = relatorio_vazio()
+    for relatorio in relatorios:
+        somar( total, relatorio )
+    return total
+
+
+def clear_dataframe_com_relatorio( df1 ):
+    """
+        Faz a mesma limpeza de 'clear_dataframe' e, na mesma passada, monta o relatório de qualidade dos dados.
+
+        Cada regra de descarte é avaliada uma única vez sobre todas as linhas. O relatório traz, por regra, quantas
+        linhas falham nela ('falhas') e quantas foram descartadas por ela, isto é, cuja primeira regra com falha é
+        esta ('descartes'; a soma dos descartes é o total de linhas descartadas). Das linhas mantidas, conta as
+        coordenadas zeradas ou negativas e os horários de pedido e de coleta que não puderam ser lidos.
+
+        Parâmetros:
+        - df1: Nosso DataFrame bruto.
+
+        Retorna:
+        - Tupla (df, relatorio): o DataFrame limpo e um dicionário com os contadores (ver 'relatorio_vazio').
+    """
+    # Vamos retirar os espaços das strings:
+    df1.loc[:,'ID'] = df1.loc[:,'ID'].str.strip()
+    df1.loc[:,'Delivery_person_ID'] = df1.loc[:,'Delivery_person_ID'].str.strip()
+    df1.loc[:,'Road_traffic_density'] = df1.loc[:,'Road_traffic_density'].str.strip()
+    df1.loc[:,'Type_of_order'] = df1.loc[:,'Type_of_order'].str.strip()
+    df1.loc[:,'Type_of_vehicle'] = df1.loc[:,'Type_of_vehicle'].str.strip()
+    df1.loc[:,'Festival'] = df1.loc[:,'Festival'].str.strip()
+    df1.loc[:,'City'] = df1.loc[:,'City'].str.strip()
+    df1.loc[:,'multiple_deliveries'] = df1.loc[:,'multiple_deliveries'].str.strip()
+    df1.loc[:,'Delivery_person_Age'] = df1.loc[:,'Delivery_person_Age'].str.strip()
+
+    relatorio = relatorio_vazio()
+    relatorio[ 'linhas_lidas' ] = len( df1 )
+
+    # Extrai o número da coluna Time_taken(min), que vem como '(min) 24':
+    tempo = df1['Time_taken(min)'].astype(str).str.extract(r'(\d+)', expand = False)
+
+    # Agora vamos marcar as linhas em que não há informações. Todas as regras são avaliadas de uma vez, e cada
+    # linha descartada é atribuída à primeira regra em que falhou (a mesma ordem em que as linhas eram retiradas):
+    ja_descartadas = pd.Series( False, index = df1.index )
+    falhas_por_regra = [ ( regra, df1[ coluna ] == ausente ) for regra, coluna, ausente in REGRAS_DESCARTE ]
+    falhas_por_regra.append( ( REGRA_TEMPO, tempo.isna() ) )
+    for regra, falhas in falhas_por_regra:
+        relatorio[ 'regras' ][ regra ][ 'falhas' ] = int( falhas.sum() )
+        relatorio[ 'regras' ][ regra ][ 'descartes' ] = int( ( falhas & ~ja_descartadas ).sum() )
+        ja_descartadas |= falhas
+
+    df1 = df1.loc[ ~ja_descartadas, : ]
+    df1['Time_taken(min)'] = tempo[ ~ja_descartadas ].astype(int)
+
+    df1 = df1.reset_index( drop = True )
+    
+    # Vamos mudar os tipos de variáveis de algumas features que estão como 'object' e mudar a configuração da data da coluna 'Order_Date'
+    df1[ 'Delivery_person_Age' ] = df1[ 'Delivery_person_Age' ].astype( int )
+    df1[ 'Delivery_person_Ratings' ] = df1[ 'Delivery_person_Ratings' ].astype( float )
+    df1[ 'multiple_deliveries' ] = df1[ 'multiple_deliveries' ].astype( int )
+    df1[ 'Order_Date' ] = pd.to_datetime( df1[ 'Order_Date' ], format = '%d-%m-%Y' )
+
+    # Horários do pedido e da coleta, já convertidos para inteiros:
+    df1 = time_features( df1 )
+
+    # Contadores das linhas mantidas: coordenadas suspeitas e horários que não puderam ser lidos.
+    relatorio[ 'linhas_validas' ] = len( df1 )
+    relatorio[ 'linhas_descartadas' ] = relatorio[ 'linhas_lidas' ] - relatorio[ 'linhas_validas' ]
+    for ponto, latitude, longitude in [ ( 'restaurante', 'Restaurant_latitude', 'Restaurant_longitude' ),
+                                        ( 'entrega', 'Delivery_location_latitude', 'Delivery_location_longitude' ) ]:
+        relatorio[ 'coordenadas_invalidas' ][ f'{ponto}_zeradas' ] = int( ( ( df1[ latitude ] == 0 ) | ( df1[ longitude ] == 0 ) ).sum() )
+        relatorio[ 'coordenadas_invalidas' ][ f'{ponto}_negativas' ] = int( ( ( df1[ latitude ] < 0 ) | ( df1[ longitude ] < 0 ) ).sum() )
+    relatorio[ 'horarios_invalidos' ][ 'Time_Orderd' ] = int( df1[ 'order_time_s' ].isna().sum() )
+    relatorio[ 'horarios_invalidos' ][ 'Time_Order_picked' ] = int( df1[ 'picked_time_s' ].isna().sum() )
+
+    return df1, relatorio
+
+
+def clear_dataframe( df1 ):
+    """
+        Função que provoca uma limpeza de nosso DataFrame: tirando espaços, mudando os tipos de variáveis e dropando as linhas em que não há dados.
+
+        Parâmetros:
+        - df: Nosso DataFrame bruto.
+
+        Retorna:
+        - df: Novo DataFrame com todas as limpezas necessárias.        
+    """
+    df1, _ = clear_dataframe_com_relatorio( df1 )
+    return( df1 )
+
+
+# Colunas de texto que vêm com espaços sobrando no 'train.csv' (as mesmas limpas em 'clear_dataframe_com_relatorio'):
+COLUNAS_COM_ESPACOS = [ 'ID', 'Delivery_person_ID', 'Road_traffic_density', 'Type_of_order', 'Type_of_vehicle',
+                        'Festival', 'City', 'multiple_deliveries', 'Delivery_person_Age' ]
+
+
+def clear_dataframe_previsao( df1 ):
+    """
+        Limpeza para a previsão do tempo de entrega de pedidos novos, que ainda não têm 'Time_taken(min)'. Faz a
+        mesma limpeza das colunas usadas pelo modelo, mas não descarta nenhuma linha: os valores 'NaN' viram nulos
+        e o modelo trata categorias desconhecidas e numéricas nulas como neutras.
+
+        Parâmetros:
+        - df1: DataFrame bruto, no formato do 'train.csv' (com ou sem 'Time_taken(min)').
+
+        Retorna:
+        - Novo DataFrame com as mesmas linhas de df1, as colunas de horário de 'time_features' e, quando existir,
+          'Time_taken(min)' como inteiro com nulos.
+    """
+    df1 = df1.copy()
+    for coluna in COLUNAS_COM_ESPACOS:
+        if coluna in df1.columns:
+            df1[ coluna ] = df1[ coluna ].astype( str ).str.strip().replace( { 'NaN': np.nan, 'nan': np.nan } )
+    if 'Weatherconditions' in df1.columns:
+        df1[ 'Weatherconditions' ] = df1[ 'Weatherconditions' ].replace( 'conditions NaN', np.nan )
+    for coluna in ( 'multiple_deliveries', 'Time_Orderd', 'Time_Order_picked' ):
+        if coluna not in df1.columns:
+            df1[ coluna ] = np.nan
+
+    df1[ 'multiple_deliveries' ] = pd.to_numeric( df1[ 'multiple_deliveries' ], errors = 'coerce' )
+    if 'Time_taken(min)' in df1.columns:
+        df1[ 'Time_taken(min)' ] = ( df1[ 'Time_taken(min)' ].astype( str ).str.extract( r'(\d+)', expand = False )
+                                                              .astype( float ).astype( 'Int32' ) )
+    return( time_features( df1 ) )
@@ -0,0 +1,45 @@
+from functools import lru_cache
+from pathlib import Path
+
+#=====================================================================================================================
+
+# LOGOTIPO
+
+#=====================================================================================================================
+
+RAIZ_PROJETO = Path( __file__ ).resolve().parent.parent
+LOGO_ORIGINAL = RAIZ_PROJETO / 'logo.png'
+PASTA_CACHE = RAIZ_PROJETO / '.cache'
+
+# Largura com que o logotipo é exibido na barra lateral, em pixels.
+LARGURA_LOGO = 300
+
+
+@lru_cache( maxsize = None )
+def caminho_logo( largura = LARGURA_LOGO ):
+    """
+        Retorna o caminho de uma versão do logotipo já redimensionada para a largura da barra lateral. A versão
+        reduzida é gerada uma única vez em '.cache/' (e refeita apenas se o 'logo.png' original mudar), de modo que
+        as páginas não precisam decodificar o PNG original de 1,3 MB a cada execução.
+
+        Parâmetros:
+        - largura: largura final da imagem, em pixels.
+
+        Retorna:
+        - String com o caminho do PNG redimensionado (ou do original, se não for possível gerar a versão reduzida).
+    """
+    destino = PASTA_CACHE / f'logo_{largura}.png'
+    if destino.exists() and destino.stat().st_mtime >= LOGO_ORIGINAL.stat().st_mtime:
+        return str( destino )
+
+    # O Pillow só é importado quando a versão reduzida ainda não existe.
+    from PIL import Image
+
+    try:
+        PASTA_CACHE.mkdir( exist_ok = True )
+        with Image.open( LOGO_ORIGINAL ) as imagem:
+            altura = round( imagem.height * largura / imagem.width )
+            imagem.resize( ( largura, altura ), Image.LANCZOS ).save( destino, optimize = True )
+    except OSError:
+        return str( LOGO_ORIGINAL )
+    return str( destino )
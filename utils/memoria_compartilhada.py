@@ -0,0 +1,258 @@
+import os
+import json
+import time
+import shutil
+import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos o modo fica desligado e cada processo carrega os dados.
+    fcntl = None
+
+#=====================================================================================================================
+
+# DADOS COMPARTILHADOS ENTRE PROCESSOS
+
+#=====================================================================================================================
+
+# Pasta onde a versão atual dos dados é publicada. Para memória compartilhada de verdade, use uma pasta em um
+# sistema de arquivos em memória, por exemplo '/dev/shm/ftc_dashboard'. Sem a variável, o modo fica desligado.
+VARIAVEL_PASTA = 'FTC_DADOS_COMPARTILHADOS'
+
+ARQUIVO_TRAVA = '.publicador.lock'
+ARQUIVO_ATUAL = 'ATUAL'
+ARQUIVO_META = 'meta.json'
+ARQUIVO_RESTAURANTES = 'restaurantes.pkl'
+
+# Quantas versões antigas o publicador mantém na pasta, para processos que ainda estão terminando de trocar.
+VERSOES_MANTIDAS = 2
+
+# Colunas de texto com mais categorias que isso (como o 'ID', um valor por pedido) guardam as categorias em um
+# '.npy' próprio, mapeado em memória, e não no 'meta.json' que todo processo lê e decodifica.
+MAXIMO_CATEGORIAS_META = 1000
+
+# Intervalo, em segundos, entre duas verificações de quem espera o publicador gravar a primeira versão.
+INTERVALO_ESPERA = 0.5
+
+
+def pasta_compartilhada():
+    """
+        Retorna a pasta configurada em 'FTC_DADOS_COMPARTILHADOS' (criando-a se preciso), ou None se o modo de dados
+        compartilhados estiver desligado.
+    """
+    pasta = os.environ.get( VARIAVEL_PASTA )
+    if not pasta or fcntl is None:
+        return None
+    pasta = Path( pasta ).expanduser()
+    pasta.mkdir( parents = True, exist_ok = True )
+    return pasta
+
+
+def tentar_ser_publicador( pasta ):
+    """
+        Tenta pegar a trava de publicador da pasta. Só um processo por vez a consegue: ele carrega os dados e os
+        publica, e os demais apenas se anexam. A trava é liberada pelo sistema operacional quando o processo termina,
+        e outro processo pode assumir na próxima verificação.
+
+        Retorna:
+        - O arquivo da trava (que deve ser mantido aberto) ou None se outro processo já é o publicador.
+    """
+    if fcntl is None:
+        return None
+    arquivo = open( pasta / ARQUIVO_TRAVA, 'w' )
+    try:
+        fcntl.flock( arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB )
+    except OSError:
+        arquivo.close()
+        return None
+    return arquivo
+
+
+def versao_publicada( pasta ):
+    """
+        Retorna o nome da pasta da versão publicada mais recente, ou None se nada foi publicado ainda.
+    """
+    try:
+        return ( pasta / ARQUIVO_ATUAL ).read_text( encoding = 'utf-8' ).strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def esperar_publicacao( pasta, intervalo = INTERVALO_ESPERA ):
+    """
+        Espera o publicador gravar a primeira versão, em vez de carregar os dados neste processo também. Se o
+        publicador terminar antes de publicar, a trava é liberada e este processo assume o lugar dele.
+
+        Retorna:
+        - Tupla (nome, trava): o nome da versão publicada e None, ou None e a trava de publicador conseguida.
+    """
+    while True:
+        nome = versao_publicada( pasta )
+        if nome is not None:
+            return nome, None
+        trava = tentar_ser_publicador( pasta )
+        if trava is not None:
+            return None, trava
+        time.sleep( intervalo )
+
+
+def ler_meta( pasta, nome ):
+    with open( pasta / nome / ARQUIVO_META, encoding = 'utf-8' ) as arquivo:
+        return json.load( arquivo )
+
+
+def _codigos_compactos( codigos, n_categorias ):
+    # Menor tipo inteiro que comporta os códigos (-1 representa nulo).
+    for tipo in ( np.int8, np.int16, np.int32 ):
+        if n_categorias < np.iinfo( tipo ).max:
+            return codigos.astype( tipo )
+    return codigos.astype( np.int64 )
+
+
+def publicar( versao, pasta ):
+    """
+        Grava uma versão dos dados na pasta compartilhada, uma coluna por arquivo '.npy':
+
+        - colunas numéricas: o próprio array (inteiros com nulos viram valores + máscara);
+        - datas: inteiros int64 (nanossegundos);
+        - textos: codificados em dicionário (códigos inteiros + categorias em ordem alfabética, no 'meta.json' ou,
+          acima de 'MAXIMO_CATEGORIAS_META', em um '.npy' próprio).
+
+        Os agregados acumulados por dia e a hierarquia geográfica da versão também são gravados, um '.npy' por array
+        do estado de cada um (ver 'PrefixosDiarios.estado' e 'HierarquiaGeografica.estado'), para que quem se anexa
+        não precise refazê-los a partir dos pedidos.
+
+        A versão é escrita em uma pasta nova e só então o ponteiro 'ATUAL' é trocado (com os.replace, atômico), de
+        modo que nenhum processo enxerga uma versão pela metade.
+
+        Parâmetros:
+        - versao: VersaoDados a publicar.
+        - pasta: pasta compartilhada.
+
+        Retorna:
+        - Nome da pasta da versão publicada.
+    """
+    nome = f"v{versao.versao}-{datetime.datetime.now().strftime( '%Y%m%d%H%M%S%f' )}"
+    temporaria = pasta / f".{nome}.tmp"
+    temporaria.mkdir()
+
+    colunas = []
+    for i, coluna in enumerate( versao.df.columns ):
+        serie = versao.df[ coluna ]
+        info = { 'nome': coluna, 'arquivo': f"c{i}.npy" }
+
+        if isinstance( serie.dtype, pd.api.extensions.ExtensionDtype ) and pd.api.types.is_integer_dtype( serie.dtype ):
+            info[ 'tipo' ] = 'inteiro_nulo'
+            info[ 'dtype' ] = str( serie.dtype )
+            info[ 'mascara' ] = f"c{i}_nulos.npy"
+            np.save( temporaria / info[ 'mascara' ], serie.isna().to_numpy() )
+            np.save( temporaria / info[ 'arquivo' ], serie.to_numpy( dtype = serie.dtype.numpy_dtype, na_value = 0 ) )
+        elif pd.api.types.is_datetime64_any_dtype( serie.dtype ):
+            info[ 'tipo' ] = 'data'
+            info[ 'dtype' ] = str( serie.dtype )
+            np.save( temporaria / info[ 'arquivo' ], serie.to_numpy().view( np.int64 ) )
+        elif pd.api.types.is_numeric_dtype( serie.dtype ) or pd.api.types.is_bool_dtype( serie.dtype ):
+            info[ 'tipo' ] = 'numerico'
+            np.save( temporaria / info[ 'arquivo' ], serie.to_numpy() )
+        else:
+            info[ 'tipo' ] = 'dicionario'
+            # Categorias ordenadas: ordenar ou agrupar pela coluna categórica dá a mesma ordem que pelo texto.
+            codigos, categorias = pd.factorize( serie, sort = True, use_na_sentinel = True )
+            if len( categorias ) > MAXIMO_CATEGORIAS_META:
+                info[ 'categorias' ] = f"c{i}_categorias.npy"
+                np.save( temporaria / info[ 'categorias' ], np.asarray( categorias, dtype = str ) )
+            else:
+                info[ 'categorias' ] = [ str( categoria ) for categoria in categorias ]
+            np.save( temporaria / info[ 'arquivo' ], _codigos_compactos( codigos, len( categorias ) ) )
+        colunas.append( info )
+
+    versao.df_restaurantes.to_pickle( temporaria / ARQUIVO_RESTAURANTES )
+
+    estruturas = {}
+    for estrutura, objeto in ( ( 'prefixos', versao.prefixos ), ( 'hierarquia', versao.hierarquia ) ):
+        estruturas[ estrutura ] = {}
+        for chave, array in objeto.estado().items():
+            estruturas[ estrutura ][ chave ] = f"{estrutura}_{chave.lstrip( '_' )}.npy"
+            np.save( temporaria / estruturas[ estrutura ][ chave ], np.asarray( array ) )
+
+    meta = { 'versao': versao.versao,
+             'assinatura': [ list( chave ) for chave in versao.assinatura ],
+             'particoes': [ [ str( caminho ), intervalo and [ intervalo[ 0 ].isoformat(), intervalo[ 1 ].isoformat() ] ]
+                            for caminho, intervalo in versao.particoes ],
+             'fins': list( versao.fins ),
+             'linhas': len( versao.df ),
+             'colunas': colunas,
+             'estruturas': estruturas,
+             'qualidade': versao.qualidade,
+             'criada_em': versao.criada_em }
+    with open( temporaria / ARQUIVO_META, 'w', encoding = 'utf-8' ) as arquivo:
+        json.dump( meta, arquivo )
+
+    os.replace( temporaria, pasta / nome )
+    ponteiro = pasta / f".{ARQUIVO_ATUAL}.tmp"
+    ponteiro.write_text( nome, encoding = 'utf-8' )
+    os.replace( ponteiro, pasta / ARQUIVO_ATUAL )
+
+    _remover_versoes_antigas( pasta, nome )
+    return nome
+
+
+def _remover_versoes_antigas( pasta, atual ):
+    # Arquivos já mapeados por outros processos continuam válidos depois de apagados (POSIX), então basta manter
+    # algumas versões para quem ainda está lendo o 'meta.json' da anterior.
+    versoes = sorted( ( caminho for caminho in pasta.glob( 'v*' ) if caminho.is_dir() and caminho.name != atual ),
+                      key = lambda caminho: caminho.stat().st_mtime )
+    for caminho in versoes[ :max( len( versoes ) - VERSOES_MANTIDAS, 0 ) ]:
+        shutil.rmtree( caminho, ignore_errors = True )
+
+
+def anexar( pasta, nome ):
+    """
+        Abre uma versão publicada sem copiar os dados: as colunas numéricas e de datas são arquivos mapeados em
+        memória (np.load com mmap_mode = 'r'), compartilhados por todos os processos pelo cache de páginas do
+        sistema operacional. As colunas de texto viram categóricas sobre os próprios códigos mapeados
+        (pd.Categorical.from_codes): o processo só guarda as categorias, e não um objeto por linha. Os arrays dos
+        agregados acumulados e da hierarquia geográfica também são mapeados em memória.
+
+        Parâmetros:
+        - pasta: pasta compartilhada.
+        - nome: nome da versão (retornado por 'versao_publicada').
+
+        Retorna:
+        - Tupla (meta, df, df_restaurantes, estruturas). O DataFrame é somente leitura. 'estruturas' tem, para
+          'prefixos' e 'hierarquia', o dicionário de arrays que os remonta com 'de_estado'.
+    """
+    meta = ler_meta( pasta, nome )
+    origem = pasta / nome
+    meta[ 'particoes' ] = tuple( ( Path( caminho ), intervalo and tuple( datetime.date.fromisoformat( data )
+                                                                        for data in intervalo ) )
+                                 for caminho, intervalo in meta[ 'particoes' ] )
+    meta[ 'assinatura' ] = tuple( tuple( chave ) for chave in meta[ 'assinatura' ] )
+
+    colunas = {}
+    for info in meta[ 'colunas' ]:
+        valores = np.load( origem / info[ 'arquivo' ], mmap_mode = 'r' )
+        if info[ 'tipo' ] == 'inteiro_nulo':
+            mascara = np.load( origem / info[ 'mascara' ], mmap_mode = 'r' )
+            colunas[ info[ 'nome' ] ] = pd.arrays.IntegerArray( valores, mascara )
+        elif info[ 'tipo' ] == 'data':
+            colunas[ info[ 'nome' ] ] = valores.view( info[ 'dtype' ] )
+        elif info[ 'tipo' ] == 'numerico':
+            colunas[ info[ 'nome' ] ] = valores
+        else:
+            categorias = info[ 'categorias' ]
+            if isinstance( categorias, str ):
+                categorias = np.load( origem / categorias, mmap_mode = 'r' )
+            # Os códigos já estão no menor tipo inteiro, o mesmo que o pandas usa, então não são copiados (-1 é nulo).
+            colunas[ info[ 'nome' ] ] = pd.Categorical.from_codes( valores, categories = categorias )
+
+    # copy = False evita que o pandas junte as colunas em blocos (o que copiaria os arrays mapeados).
+    df = pd.DataFrame( colunas, copy = False )
+    df_restaurantes = pd.read_pickle( origem / ARQUIVO_RESTAURANTES )
+    estruturas = { estrutura: { chave: np.load( origem / arquivo, mmap_mode = 'r' ) for chave, arquivo in arquivos.items() }
+                   for estrutura, arquivos in meta[ 'estruturas' ].items() }
+    return meta, df, df_restaurantes, estruturas
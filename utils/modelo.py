@@ -0,0 +1,224 @@
+import json
+import hashlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.geo import haversine_km
+
+#=====================================================================================================================
+
+# MODELO DE PREVISÃO DO TEMPO DE ENTREGA
+
+#=====================================================================================================================
+
+RAIZ_PROJETO = Path( __file__ ).resolve().parent.parent
+PASTA_MODELOS = RAIZ_PROJETO / '.cache' / 'modelos'
+
+# Variáveis categóricas do modelo (cada valor vira um coeficiente) e variáveis numéricas.
+CATEGORICAS = [ 'Road_traffic_density', 'Weatherconditions', 'Type_of_vehicle', 'Festival', 'City', 'hora' ]
+NUMERICAS = [ 'distance', 'multiple_deliveries' ]
+
+# Versão do esquema das variáveis: deve ser incrementada sempre que 'variaveis_modelo' mudar a forma de calcular
+# alguma variável, para que os artefatos gravados com as variáveis antigas não sejam reaproveitados.
+VERSAO_VARIAVEIS = 1
+
+# Regularização da regressão (ridge) e fração dos pedidos separada para medir o erro do modelo.
+ALPHA = 1.0
+FRACAO_TESTE = 0.2
+SEMENTE = 42
+
+# Linhas da matriz de variáveis montadas de cada vez no treino.
+LINHAS_POR_BLOCO = 50_000
+
+
+def variaveis_modelo( df ):
+    """
+        Monta, de forma vetorizada, as variáveis usadas pelo modelo a partir do DataFrame limpo: a distância
+        haversine (com as coordenadas em valor absoluto, por causa das latitudes negativas da base) e a hora do
+        pedido (ou da coleta, quando o horário do pedido é inválido).
+
+        Parâmetros:
+        - df: DataFrame limpo (saída de 'clear_dataframe').
+
+        Retorna:
+        - DataFrame com as colunas de CATEGORICAS e NUMERICAS.
+    """
+    distancia = haversine_km( df[ 'Restaurant_latitude' ].abs(), df[ 'Restaurant_longitude' ].abs(),
+                              df[ 'Delivery_location_latitude' ].abs(), df[ 'Delivery_location_longitude' ].abs() )
+    hora = df[ 'order_hour' ].fillna( df[ 'picked_time_s' ] // 3600 )
+    return pd.DataFrame( { 'Road_traffic_density': df[ 'Road_traffic_density' ].to_numpy(),
+                           'Weatherconditions': df[ 'Weatherconditions' ].to_numpy(),
+                           'Type_of_vehicle': df[ 'Type_of_vehicle' ].to_numpy(),
+                           'Festival': df[ 'Festival' ].to_numpy(),
+                           'City': df[ 'City' ].to_numpy(),
+                           'hora': hora.astype( 'Int8' ).astype( str ).to_numpy(),
+                           'distance': distancia,
+                           'multiple_deliveries': df[ 'multiple_deliveries' ].to_numpy( dtype = float ) } )
+
+
+def _codigos( valores, categorias ):
+    # Posição de cada valor no vocabulário do modelo; valores desconhecidos recebem -1.
+    return pd.Categorical( valores, categories = categorias ).codes
+
+
+def _matriz( variaveis, artefato ):
+    # Matriz densa (uma coluna por categoria + numéricas padronizadas) de um bloco de linhas, usada apenas no treino.
+    blocos = []
+    for coluna in CATEGORICAS:
+        categorias = artefato[ 'categorias' ][ coluna ]
+        codigos = _codigos( variaveis[ coluna ], categorias )
+        bloco = np.zeros( ( len( variaveis ), len( categorias ) ) )
+        validos = codigos >= 0
+        bloco[ np.flatnonzero( validos ), codigos[ validos ] ] = 1.0
+        blocos.append( bloco )
+    numericas = ( variaveis[ NUMERICAS ].to_numpy( dtype = float ) - np.asarray( artefato[ 'media' ] ) ) / np.asarray( artefato[ 'escala' ] )
+    blocos.append( np.nan_to_num( numericas ) )
+    return np.hstack( blocos )
+
+
+def _ajustar( variaveis, alvo, artefato, alpha ):
+    # Regressão ridge pela forma fechada: (X'X + alpha I) b = X'y, com o intercepto fora da regularização. X'X e X'y
+    # são acumulados por blocos de linhas, e a matriz densa nunca tem mais que LINHAS_POR_BLOCO linhas.
+    n = len( alvo )
+    colunas = sum( len( artefato[ 'categorias' ][ coluna ] ) for coluna in CATEGORICAS ) + len( NUMERICAS )
+    XtX, Xty, soma_X = np.zeros( ( colunas, colunas ) ), np.zeros( colunas ), np.zeros( colunas )
+    for inicio in range( 0, n, LINHAS_POR_BLOCO ):
+        X = _matriz( variaveis.iloc[ inicio:inicio + LINHAS_POR_BLOCO ], artefato )
+        y = alvo[ inicio:inicio + LINHAS_POR_BLOCO ]
+        XtX += X.T @ X
+        Xty += X.T @ y
+        soma_X += X.sum( axis = 0 )
+
+    # Centraliza as somas: Xc'Xc = X'X - n m m' e Xc'(y - média) = X'y - n m média.
+    media_alvo = alvo.mean()
+    media_X = soma_X / n
+    coef = np.linalg.solve( XtX - n * np.outer( media_X, media_X ) + alpha * np.eye( colunas ),
+                            Xty - n * media_X * media_alvo )
+    intercepto = media_alvo - media_X @ coef
+
+    inicio = 0
+    for coluna in CATEGORICAS:
+        fim = inicio + len( artefato[ 'categorias' ][ coluna ] )
+        artefato[ 'coeficientes' ][ coluna ] = coef[ inicio:fim ].tolist()
+        inicio = fim
+    artefato[ 'coeficientes' ][ 'numericas' ] = coef[ inicio: ].tolist()
+    artefato[ 'intercepto' ] = float( intercepto )
+    return artefato
+
+
+def treinar_modelo( df, alpha = ALPHA ):
+    """
+        Treina o modelo linear (ridge) do tempo de entrega. O erro é medido em uma parte dos pedidos separada para
+        teste, e o modelo final é reajustado com todos os pedidos.
+
+        Parâmetros:
+        - df: DataFrame limpo (saída de 'clear_dataframe').
+        - alpha: regularização da regressão.
+
+        Retorna:
+        - Dicionário (serializável em JSON) com o vocabulário, os coeficientes e as métricas do modelo.
+    """
+    variaveis = variaveis_modelo( df )
+    alvo = df[ 'Time_taken(min)' ].to_numpy( dtype = float )
+
+    numericas = variaveis[ NUMERICAS ].to_numpy( dtype = float )
+    artefato = { 'versao_variaveis': VERSAO_VARIAVEIS,
+                 'categorias': { coluna: sorted( pd.unique( variaveis[ coluna ] ).tolist() ) for coluna in CATEGORICAS },
+                 'media': np.nanmean( numericas, axis = 0 ).tolist(),
+                 'escala': ( np.nanstd( numericas, axis = 0 ) + 1e-9 ).tolist(),
+                 'coeficientes': {},
+                 'alpha': alpha }
+
+    # Erro fora da amostra de treino:
+    teste = np.random.default_rng( SEMENTE ).random( len( df ) ) < FRACAO_TESTE
+    _ajustar( variaveis[ ~teste ], alvo[ ~teste ], artefato, alpha )
+    erro = prever_variaveis( variaveis[ teste ], artefato ) - alvo[ teste ]
+    variancia = alvo[ teste ].var()
+    artefato[ 'metricas' ] = { 'mae': float( np.abs( erro ).mean() ),
+                               'rmse': float( np.sqrt( ( erro ** 2 ).mean() ) ),
+                               'r2': float( 1 - ( erro ** 2 ).mean() / variancia ) if variancia > 0 else None,
+                               'pedidos_treino': int( ( ~teste ).sum() ),
+                               'pedidos_teste': int( teste.sum() ) }
+
+    _ajustar( variaveis, alvo, artefato, alpha )
+    return artefato
+
+
+def prever_variaveis( variaveis, artefato ):
+    """
+        Previsão vetorizada a partir das variáveis já montadas: soma o intercepto, o coeficiente de cada categoria
+        (procurado pelo código da categoria, sem montar a matriz de variáveis) e as numéricas padronizadas.
+        Categorias que o modelo não conhece contribuem com zero.
+
+        Retorna:
+        - Array com o tempo previsto, em minutos.
+    """
+    previsao = np.full( len( variaveis ), artefato[ 'intercepto' ], dtype = float )
+    for coluna in CATEGORICAS:
+        coeficientes = np.append( np.asarray( artefato[ 'coeficientes' ][ coluna ] ), 0.0 )
+        # O código -1 (categoria desconhecida) aponta para o 0 acrescentado no final.
+        previsao += coeficientes[ _codigos( variaveis[ coluna ], artefato[ 'categorias' ][ coluna ] ) ]
+    numericas = ( variaveis[ NUMERICAS ].to_numpy( dtype = float ) - np.asarray( artefato[ 'media' ] ) ) / np.asarray( artefato[ 'escala' ] )
+    previsao += np.nan_to_num( numericas ) @ np.asarray( artefato[ 'coeficientes' ][ 'numericas' ] )
+    return previsao
+
+
+def prever( df, artefato ):
+    """
+        Prevê o tempo de entrega, em minutos, de cada pedido de um DataFrame limpo. É toda vetorizada: um milhão de
+        pedidos são avaliados em poucos segundos.
+
+        Parâmetros:
+        - df: DataFrame limpo (saída de 'clear_dataframe' ou, para pedidos sem o tempo de entrega,
+          de 'clear_dataframe_previsao').
+        - artefato: modelo retornado por 'treinar_modelo' ou 'carregar_ou_treinar'.
+
+        Retorna:
+        - Array com o tempo previsto de cada pedido, alinhado com as linhas de df.
+    """
+    return prever_variaveis( variaveis_modelo( df ), artefato )
+
+
+def chave_modelo( assinatura, alpha = ALPHA ):
+    """
+        Chave estável do modelo para uma versão dos dados: depende só da assinatura dos arquivos, da regularização
+        e do esquema das variáveis (lista e versão), e não do número da versão (que recomeça a cada processo).
+    """
+    esquema = ( VERSAO_VARIAVEIS, tuple( CATEGORICAS ), tuple( NUMERICAS ) )
+    return hashlib.sha1( repr( ( tuple( assinatura ), alpha, esquema ) ).encode( 'utf-8' ) ).hexdigest()[ :16 ]
+
+
+def carregar_ou_treinar( df, assinatura, alpha = ALPHA, pasta = PASTA_MODELOS ):
+    """
+        Carrega o modelo já treinado para esta versão dos dados ou, se ele ainda não existe, treina e grava o
+        artefato em '.cache/modelos/', para que outros processos e reinícios do dashboard não treinem de novo.
+
+        Parâmetros:
+        - df: DataFrame limpo da versão dos dados.
+        - assinatura: assinatura dos arquivos que deram origem a df.
+        - alpha: regularização da regressão.
+        - pasta: pasta dos artefatos.
+
+        Retorna:
+        - O artefato do modelo.
+    """
+    chave = chave_modelo( assinatura, alpha )
+    caminho = Path( pasta ) / f'modelo_{chave}.json'
+    if caminho.exists():
+        with open( caminho, encoding = 'utf-8' ) as arquivo:
+            artefato = json.load( arquivo )
+        # Um artefato de outro esquema de variáveis (por exemplo gravado antes da chave incluir o esquema) é
+        # treinado de novo.
+        if artefato.get( 'versao_variaveis' ) == VERSAO_VARIAVEIS:
+            return artefato
+
+    artefato = treinar_modelo( df, alpha )
+    artefato[ 'chave' ] = chave
+    caminho.parent.mkdir( parents = True, exist_ok = True )
+    temporario = caminho.with_suffix( '.tmp' )
+    with open( temporario, 'w', encoding = 'utf-8' ) as arquivo:
+        json.dump( artefato, arquivo )
+    temporario.replace( caminho )
+    return artefato
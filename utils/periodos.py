@@ -0,0 +1,162 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+#=====================================================================================================================
+
+# COMPARAÇÃO DE PERÍODOS COM AGREGADOS ACUMULADOS
+
+#=====================================================================================================================
+
+MODOS_COMPARACAO = [ 'Sem comparação', 'Período anterior', 'Semana anterior', 'Período personalizado' ]
+
+
+class PrefixosDiarios:
+    """
+        Agregados acumulados por dia e por tipo de tráfego, calculados uma única vez por versão dos dados. Com eles,
+        o resumo de qualquer intervalo de datas é a diferença entre dois prefixos, sem refazer nenhum groupby:
+
+        - pedidos, soma e soma dos quadrados de 'Time_taken(min)' (para média e desvio padrão);
+        - para contar entregadores distintos, os pares (entregador, dia) com o dia anterior em que o mesmo
+          entregador trabalhou: um entregador está ativo em [inicio, fim) se tem um par nesse intervalo cujo dia
+          anterior é antes de 'inicio'.
+    """
+
+    def __init__( self, df ):
+        dias = df[ 'Order_Date' ].to_numpy().astype( 'datetime64[D]' )
+        self.dias, dia_idx = np.unique( dias, return_inverse = True )
+        self.trafegos, trafego_idx = np.unique( df[ 'Road_traffic_density' ].to_numpy( dtype = str ), return_inverse = True )
+
+        formato = ( len( self.dias ), len( self.trafegos ) )
+        tempo = df[ 'Time_taken(min)' ].to_numpy( dtype = float )
+        self.pedidos = self._acumular( dia_idx, trafego_idx, np.ones_like( tempo ), formato )
+        self.soma_tempo = self._acumular( dia_idx, trafego_idx, tempo, formato )
+        self.soma_tempo2 = self._acumular( dia_idx, trafego_idx, tempo * tempo, formato )
+
+        # Entregador, dia e tráfego de cada pedido, para montar os pares sob demanda para cada seleção de tráfego.
+        self._entregador_idx = pd.factorize( df[ 'Delivery_person_ID' ] )[ 0 ]
+        self._dia_idx = dia_idx
+        self._trafego_idx = trafego_idx
+        self._pares = {}
+
+    # Arrays que formam o estado da instância, gravados pelo publicador e mapeados em memória pelos demais processos
+    # (ver 'utils.memoria_compartilhada').
+    ESTADO = ( 'dias', 'trafegos', 'pedidos', 'soma_tempo', 'soma_tempo2', '_entregador_idx', '_dia_idx', '_trafego_idx' )
+
+    def estado( self ):
+        """
+            Retorna um dicionário com os arrays numpy de 'ESTADO', de onde 'de_estado' remonta a instância.
+        """
+        return { nome: getattr( self, nome ) for nome in self.ESTADO }
+
+    @classmethod
+    def de_estado( cls, estado ):
+        """
+            Remonta a instância a partir dos arrays de 'estado' (que podem ser somente leitura), sem passar pelos
+            pedidos.
+        """
+        prefixos = cls.__new__( cls )
+        for nome in cls.ESTADO:
+            setattr( prefixos, nome, estado[ nome ] )
+        prefixos._pares = {}
+        return prefixos
+
+    @staticmethod
+    def _acumular( dia_idx, trafego_idx, valores, formato ):
+        # Soma por (dia, tráfego) e acumula ao longo dos dias; a linha 0 é o prefixo vazio.
+        tabela = np.zeros( formato )
+        np.add.at( tabela, ( dia_idx, trafego_idx ), valores )
+        return np.vstack( [ np.zeros( ( 1, formato[ 1 ] ) ), np.cumsum( tabela, axis = 0 ) ] )
+
+    def _posicao( self, data ):
+        # Quantidade de dias (com pedidos) anteriores à data.
+        return int( np.searchsorted( self.dias, np.datetime64( pd.Timestamp( data ).normalize(), 'D' ), side = 'left' ) )
+
+    def _colunas( self, trafego ):
+        if trafego is None:
+            return np.ones( len( self.trafegos ), dtype = bool )
+        return np.isin( self.trafegos, list( trafego ) )
+
+    def _pares_entregador_dia( self, colunas ):
+        chave = tuple( colunas )
+        if chave not in self._pares:
+            selecionados = colunas[ self._trafego_idx ]
+            pares = np.unique( np.stack( [ self._entregador_idx[ selecionados ], self._dia_idx[ selecionados ] ] ), axis = 1 )
+            entregador, dia = pares
+            # np.unique ordena por entregador e depois por dia: o dia anterior é o do par anterior do mesmo entregador.
+            anterior = np.where( np.r_[ False, entregador[ 1: ] == entregador[ :-1 ] ], np.r_[ -1, dia[ :-1 ] ], -1 )
+            ordem = np.argsort( dia, kind = 'stable' )
+            self._pares[ chave ] = ( dia[ ordem ], anterior[ ordem ] )
+        return self._pares[ chave ]
+
+    def resumo( self, inicio, fim, trafego = None ):
+        """
+            Resume o intervalo [inicio, fim) a partir dos prefixos.
+
+            Parâmetros:
+            - inicio, fim: datas do intervalo (fim exclusivo, como o filtro 'Order_Date < data limite' das páginas).
+            - trafego: tipos de tráfego considerados. Se None, todos.
+
+            Retorna:
+            - Dicionário com 'pedidos', 'tempo_medio', 'tempo_std', 'entregadores', 'pedidos_por_entregador' e
+              'mix_trafego' (participação de cada tipo de tráfego nos pedidos).
+        """
+        a, b = self._posicao( inicio ), self._posicao( fim )
+        b = max( a, b )
+        colunas = self._colunas( trafego )
+
+        pedidos_trafego = self.pedidos[ b ] - self.pedidos[ a ]
+        n = pedidos_trafego[ colunas ].sum()
+        s = ( self.soma_tempo[ b ] - self.soma_tempo[ a ] )[ colunas ].sum()
+        s2 = ( self.soma_tempo2[ b ] - self.soma_tempo2[ a ] )[ colunas ].sum()
+
+        dias, anterior = self._pares_entregador_dia( colunas )
+        inicio_par, fim_par = np.searchsorted( dias, [ a, b ], side = 'left' )
+        entregadores = int( ( anterior[ inicio_par:fim_par ] < a ).sum() )
+
+        variancia = ( s2 - s * s / n ) / ( n - 1 ) if n > 1 else np.nan
+        return { 'pedidos': int( n ),
+                 'tempo_medio': s / n if n else np.nan,
+                 'tempo_std': float( np.sqrt( max( variancia, 0 ) ) ) if n > 1 else np.nan,
+                 'entregadores': entregadores,
+                 'pedidos_por_entregador': n / entregadores if entregadores else np.nan,
+                 'mix_trafego': { trafego: ( pedidos_trafego[ i ] / n if n else np.nan )
+                                  for i, trafego in enumerate( self.trafegos ) if colunas[ i ] } }
+
+
+def periodo_comparacao( inicio, fim, modo, personalizado = None ):
+    """
+        Calcula o período de comparação para o período selecionado.
+
+        Parâmetros:
+        - inicio, fim: período selecionado (fim exclusivo).
+        - modo: um dos valores de MODOS_COMPARACAO.
+        - personalizado: tupla (inicio, fim) usada no modo 'Período personalizado'.
+
+        Retorna:
+        - Tupla (inicio, fim) do período de comparação, ou None quando não há comparação.
+    """
+    if modo == 'Período anterior':
+        duracao = fim - inicio
+        return ( inicio - duracao, inicio )
+    if modo == 'Semana anterior':
+        semana = datetime.timedelta( days = 7 )
+        return ( inicio - semana, fim - semana )
+    if modo == 'Período personalizado' and personalizado is not None:
+        return tuple( personalizado )
+    return None
+
+
+def delta( atual, base, percentual = False ):
+    """
+        Diferença entre o valor do período selecionado e o de comparação, já formatada para o 'st.metric'.
+
+        Retorna:
+        - String com a diferença, ou None se não há comparação ou algum dos valores é indefinido.
+    """
+    if base is None or atual is None or pd.isna( atual ) or pd.isna( base ):
+        return None
+    if percentual:
+        return f"{( atual - base ) * 100:+.1f} p.p."
+    return f"{atual - base:+.2f}"
@@ -0,0 +1,65 @@
+"""
+Relatório de qualidade dos dados em JSON, para o monitoramento.
+
+Uso (a partir da raiz do projeto):
+    python -m utils.qualidade [--saida relatorio.json]
+
+Sem '--saida', o JSON é impresso na saída padrão. O dashboard grava o mesmo relatório a cada versão nova dos dados
+quando a variável 'FTC_RELATORIO_QUALIDADE' aponta para um arquivo.
+"""
+import sys
+import json
+import argparse
+
+import pandas as pd
+
+from utils.fonte_dados import ler_configuracao, listar_particoes, ler_particao
+from utils.limpeza import clear_dataframe_com_relatorio, somar_relatorios
+
+
+def relatorio_qualidade( config = None ):
+    """
+        Lê todas as partições da fonte de dados e monta o relatório de qualidade da limpeza, sem guardar os dados.
+
+        Parâmetros:
+        - config: configuração retornada por 'ler_configuracao'. Se None, a configuração é lida novamente.
+
+        Retorna:
+        - Dicionário com o relatório somado de todas as partições.
+    """
+    config = config or ler_configuracao()
+    relatorios = [ clear_dataframe_com_relatorio( ler_particao( caminho ) )[ 1 ]
+                   for caminho, _ in listar_particoes( config ) ]
+    return somar_relatorios( relatorios )
+
+
+def tabela_regras( qualidade ):
+    """
+        Converte a parte de regras do relatório em uma tabela, uma linha por regra de descarte.
+
+        Parâmetros:
+        - qualidade: relatório de qualidade.
+
+        Retorna:
+        - DataFrame com as colunas 'regra', 'falhas', 'descartes' e 'perc_descartes' (sobre as linhas lidas).
+    """
+    df_aux = pd.DataFrame( [ { 'regra': regra, **contadores } for regra, contadores in qualidade[ 'regras' ].items() ] )
+    df_aux[ 'perc_descartes' ] = df_aux[ 'descartes' ] / max( qualidade[ 'linhas_lidas' ], 1 )
+    return df_aux
+
+
+def main():
+    parser = argparse.ArgumentParser( description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter )
+    parser.add_argument( '--saida', help = 'arquivo onde gravar o JSON (padrão: saída padrão)' )
+    args = parser.parse_args()
+
+    texto = json.dumps( relatorio_qualidade(), indent = 2 )
+    if args.saida:
+        with open( args.saida, 'w', encoding = 'utf-8' ) as arquivo:
+            arquivo.write( texto )
+    else:
+        sys.stdout.write( texto + '\n' )
+
+
+if __name__ == '__main__':
+    main()
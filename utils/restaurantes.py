@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+from utils.geo import haversine_km
+
+#=====================================================================================================================
+
+# ÍNDICE DE RESTAURANTES
+
+#=====================================================================================================================
+
+# Casas decimais usadas para considerar duas coordenadas como o mesmo restaurante (~11 m).
+PRECISAO_COORDENADAS = 4
+
+
+def prefixo_restaurante( ids ):
+    """
+        Extrai o código do restaurante do ID do entregador: 'INDORES13DEL02' -> 'INDORES13'.
+
+        Parâmetros:
+        - ids: Series com os valores de 'Delivery_person_ID' (já sem espaços).
+
+        Retorna:
+        - Series com o código do restaurante. IDs fora do padrão são mantidos inteiros.
+    """
+    return ids.str.replace( r'DEL\d+$', '', regex = True )
+
+
+def coordenadas_restaurante( df ):
+    """
+        Normaliza as coordenadas dos restaurantes para identificação: usa o valor absoluto (há latitudes negativas
+        por erro de sinal na base) e arredonda. Coordenadas zeradas são consideradas desconhecidas (NaN).
+
+        Parâmetros:
+        - df: DataFrame com as colunas 'Restaurant_latitude' e 'Restaurant_longitude'.
+
+        Retorna:
+        - Tupla (latitude, longitude) de Series de float.
+    """
+    latitude = df[ 'Restaurant_latitude' ].abs().round( PRECISAO_COORDENADAS )
+    longitude = df[ 'Restaurant_longitude' ].abs().round( PRECISAO_COORDENADAS )
+    invalidas = ( latitude == 0 ) | ( longitude == 0 )
+    return latitude.mask( invalidas ), longitude.mask( invalidas )
+
+
+def indexar_restaurantes( df ):
+    """
+        Constrói o índice de restaurantes a partir do código no ID do entregador e das coordenadas. Um restaurante
+        é o par (código, coordenada); pedidos com coordenada desconhecida herdam a coordenada mais frequente do
+        mesmo código. Cada restaurante recebe um ID compacto (inteiro de 0 a n-1) e as estatísticas por restaurante
+        são calculadas uma única vez.
+
+        Parâmetros:
+        - df: DataFrame limpo (saída de 'clear_dataframe').
+
+        Retorna:
+        - Tupla (restaurant_id, df_restaurantes):
+            - restaurant_id: array int32 alinhado com as linhas de df.
+            - df_restaurantes: DataFrame indexado por 'restaurant_id' com 'codigo', 'City', 'latitude',
+              'longitude', 'pedidos', 'entregadores', 'distancia_media', 'avg_time', 'std_time' e 'avg_prep_min'.
+    """
+    codigo = prefixo_restaurante( df[ 'Delivery_person_ID' ] )
+    latitude, longitude = coordenadas_restaurante( df )
+
+    # Coordenada mais frequente de cada código, para preencher as coordenadas desconhecidas:
+    df_coord = pd.DataFrame( { 'codigo': codigo, 'latitude': latitude, 'longitude': longitude } )
+    moda = ( df_coord.dropna()
+                     .groupby( [ 'codigo', 'latitude', 'longitude' ] )
+                     .size()
+                     .reset_index( name = 'n' )
+                     .sort_values( [ 'codigo', 'n' ], ascending = [ True, False ] )
+                     .drop_duplicates( 'codigo' )
+                     .set_index( 'codigo' ) )
+    latitude = latitude.fillna( codigo.map( moda[ 'latitude' ] ) )
+    longitude = longitude.fillna( codigo.map( moda[ 'longitude' ] ) )
+
+    # IDs compactos: um inteiro por par (código, coordenada), na ordem de código.
+    chave = pd.MultiIndex.from_arrays( [ codigo, latitude.fillna( -1 ), longitude.fillna( -1 ) ] )
+    restaurant_id, chaves = chave.factorize( sort = True )
+    restaurant_id = restaurant_id.astype( np.int32 )
+
+    # Estatísticas por restaurante, com as coordenadas normalizadas dos dois pontos da entrega:
+    distancia = haversine_km( df[ 'Restaurant_latitude' ].abs(), df[ 'Restaurant_longitude' ].abs(),
+                              df[ 'Delivery_location_latitude' ].abs(), df[ 'Delivery_location_longitude' ].abs() )
+    df_aux = pd.DataFrame( { 'restaurant_id': restaurant_id,
+                             'City': df[ 'City' ].to_numpy(),
+                             'Delivery_person_ID': df[ 'Delivery_person_ID' ].to_numpy(),
+                             'distance': distancia,
+                             'Time_taken(min)': df[ 'Time_taken(min)' ].to_numpy(),
+                             'prep_time_s': df[ 'prep_time_s' ].to_numpy( dtype = float, na_value = np.nan ) } )
+    df_restaurantes = ( df_aux.groupby( 'restaurant_id' )
+                              .agg( City = ( 'City', lambda cidades: cidades.mode().iat[ 0 ] ),
+                                    pedidos = ( 'Time_taken(min)', 'size' ),
+                                    entregadores = ( 'Delivery_person_ID', 'nunique' ),
+                                    distancia_media = ( 'distance', 'mean' ),
+                                    avg_time = ( 'Time_taken(min)', 'mean' ),
+                                    std_time = ( 'Time_taken(min)', 'std' ),
+                                    avg_prep_s = ( 'prep_time_s', 'mean' ) ) )
+    df_restaurantes[ 'avg_prep_min' ] = df_restaurantes.pop( 'avg_prep_s' ) / 60
+
+    codigos = chaves.get_level_values( 0 )
+    df_restaurantes.insert( 0, 'codigo', np.asarray( codigos ) )
+    df_restaurantes.insert( 2, 'latitude', np.asarray( chaves.get_level_values( 1 ) ) )
+    df_restaurantes.insert( 3, 'longitude', np.asarray( chaves.get_level_values( 2 ) ) )
+    df_restaurantes[ [ 'latitude', 'longitude' ] ] = df_restaurantes[ [ 'latitude', 'longitude' ] ].replace( -1, np.nan )
+    return restaurant_id, df_restaurantes
+
+
+def posicoes_por_restaurante( restaurant_id ):
+    """
+        Prepara o acesso direto aos pedidos de cada restaurante: as linhas ordenadas por restaurante e o intervalo
+        ocupado por cada um, para que o detalhamento não precise percorrer todos os pedidos.
+
+        Parâmetros:
+        - restaurant_id: array com o ID do restaurante de cada pedido.
+
+        Retorna:
+        - Tupla (ordem, limites): 'ordem' são as posições das linhas ordenadas por restaurante e os pedidos do
+          restaurante r estão em ordem[ limites[r] : limites[r + 1] ].
+    """
+    restaurant_id = np.asarray( restaurant_id )
+    ordem = np.argsort( restaurant_id, kind = 'stable' )
+    n_restaurantes = int( restaurant_id.max() ) + 1 if len( restaurant_id ) else 0
+    limites = np.searchsorted( restaurant_id[ ordem ], np.arange( n_restaurantes + 1 ) )
+    return ordem, limites
+
+
+def pedidos_do_restaurante( df, ordem, limites, restaurant_id ):
+    """
+        Retorna os pedidos de um restaurante usando as posições pré-calculadas por 'posicoes_por_restaurante'.
+
+        Parâmetros:
+        - df: DataFrame alinhado com as posições (o mesmo usado para calculá-las).
+        - ordem, limites: saída de 'posicoes_por_restaurante'.
+        - restaurant_id: ID compacto do restaurante.
+
+        Retorna:
+        - DataFrame com os pedidos do restaurante.
+    """
+    if restaurant_id < 0 or restaurant_id + 1 >= len( limites ):
+        raise ValueError( f"O restaurante '{restaurant_id}' não existe no índice" )
+    return df.iloc[ ordem[ limites[ restaurant_id ] : limites[ restaurant_id + 1 ] ] ]
@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+from utils.graficos import reduzir_linha, agregar_por_periodo, compactar_figura
+
+#=====================================================================================================================
+
+# VISÃO EMPRESA
+
+#=====================================================================================================================
+
+# Funções de cálculo e de gráficos da página 'Visão Empresa', sem dependência do Streamlit: a página as chama com os
+# dados filtrados e o exportador ('python -m utils.exportar') gera os mesmos painéis fora do dashboard. As bibliotecas
+# de visualização continuam importadas dentro de cada função.
+
+def geo_map( df1 ):
+
+    ### É uma função que recebe a nossa base de dados e retorna um mapa com as medianas das entregas feitas pelos restaurantes.
+    ### A página mostra o mapa com o 'folium_static'; o exportador grava o mesmo mapa em HTML.
+        
+        import folium as fl
+
+        cols = ['Delivery_location_latitude', 'Delivery_location_longitude', 'City', 'Road_traffic_density']
+        df_aux = df1.loc[:, cols].groupby(['City', 'Road_traffic_density'], observed = True).median().reset_index()
+        map = fl.Map()
+        for index, location_info in df_aux.iterrows():
+            latitude = location_info['Delivery_location_latitude']
+            longitude = location_info['Delivery_location_longitude']
+            fl.Marker([latitude, longitude]).add_to(map)
+        return map
+
+def order_share_by_week( df1 ):
+    ### É uma função que recebe a nossa base de dados e retorna um gráfico de linhas em que mostra a quantidade média de entregas por entregador por 
+    ### semana
+    
+    # A coluna da semana é criada por 'order_by_week'; fora da página (exportador) esta função pode vir primeiro:
+    if 'week_of_year' not in df1.columns:
+        df1 = df1.assign( week_of_year = df1['Order_Date'].dt.strftime( '%U' ) )
+    df_aux01 = (df1.loc[:,['ID','week_of_year']]
+                   .groupby('week_of_year')
+                   .count()
+                   .reset_index())
+    df_aux02 = (df1.loc[:, ['Delivery_person_ID', 'week_of_year']]
+                   .groupby('week_of_year')
+                   .nunique()
+                   .reset_index())
+    df_aux = pd.merge( df_aux01, df_aux02, how = 'inner')
+    df_aux['order_by_deliver'] = df_aux['ID']/df_aux['Delivery_person_ID']
+    # Limita a quantidade de pontos enviada ao navegador:
+    df_aux = reduzir_linha( df_aux, 'week_of_year', 'order_by_deliver' )
+    import plotly.express as px
+    fig = px.line( df_aux, x = 'week_of_year', y = 'order_by_deliver')
+    return compactar_figura( fig )
+
+def order_by_week( df1 ):
+    ### É uma função que recebe o nossa base de dados e retorna um gráfico de linhas em que mostra a quantidade de entregas por entregador por semana.
+    
+    df1['week_of_year'] = df1['Order_Date'].dt.strftime( '%U' )
+    df_aux = (df1.loc[:, ['ID','week_of_year']]
+                 .groupby('week_of_year')
+                 .count()
+                 .reset_index())
+    # Limita a quantidade de pontos enviada ao navegador:
+    df_aux = reduzir_linha( df_aux, 'week_of_year', 'ID' )
+    import plotly.express as px
+    fig = px.line( df_aux, x = 'week_of_year', y = 'ID')
+    return compactar_figura( fig )
+
+def order_by_city_traffic( df1 ):
+    ### É uma função que recebe a nossa base de dados e retorna um gráfico de dispersão da quantidade de entregas por cidade e por tipo de tráfego.
+    
+    df_aux = (df1.loc[:, ['ID', 'City', 'Road_traffic_density']]
+                 .groupby(['City', 'Road_traffic_density'], observed = True)
+                 .count()
+                 .reset_index())
+    df_aux = df_aux.loc[ df_aux['City'] != 'NaN', : ]
+    df_aux = df_aux.loc[ df_aux['Road_traffic_density'] != 'NaN', : ]
+    import plotly.express as px
+    fig = px.scatter( df_aux, x = 'City', y = 'Road_traffic_density', size = 'ID', color = 'City')
+    return compactar_figura( fig )
+
+def deliver_by_traffic( df1 ):
+    ### Esta função recebe a nossa base de dados e retorna um gráfico de seção da quantidade de entregas por tipo de tráfego.
+    
+    df_aux = (df1.loc[:,['ID','Road_traffic_density']]
+                 .groupby('Road_traffic_density', observed = True)
+                 .count()
+                 .reset_index())
+    df_aux['entregas_perc'] = df_aux['ID']/df_aux['ID'].sum()
+    import plotly.express as px
+    fig = px.pie( df_aux, values = 'entregas_perc', names = 'Road_traffic_density' )
+    return compactar_figura( fig )
+
+def order_by_day( df1 ):
+    ### Esta função recebe a nossa base de dados e retorna um gráfico de barras que tras a quantidade de entregas por dia da semana.
+    
+    df_aux = df1.loc[:, ['ID', 'Order_Date']].groupby(['Order_Date']).count().reset_index()
+    # Com muitos dias, as barras passam a somar semanas, meses, ... para não passar do limite de barras por figura:
+    df_aux, periodo = agregar_por_periodo( df_aux, 'Order_Date', 'ID' )
+    import plotly.express as px
+    rotulos = {} if periodo == 'dia' else { 'Order_Date': f'Order_Date (por {periodo})' }
+    fig = px.bar(df_aux, x = 'Order_Date', y = 'ID', labels = rotulos )
+    return compactar_figura( fig )
+
+def eta_by_city_traffic( df1, previsao ):
+    ### Esta função recebe a nossa base de dados e as previsões do modelo e retorna o tempo médio previsto e o realizado por cidade e tráfego.
+
+    df_aux = df1.loc[:, ['City', 'Road_traffic_density', 'Time_taken(min)']].copy()
+    df_aux['previsto'] = previsao
+    df_aux['erro_abs'] = ( df_aux['previsto'] - df_aux['Time_taken(min)'] ).abs()
+    df_aux = (df_aux.groupby(['City', 'Road_traffic_density'], observed = True)
+                    .agg( pedidos = ('previsto', 'size'),
+                          realizado = ('Time_taken(min)', 'mean'),
+                          previsto = ('previsto', 'mean'),
+                          erro_medio_abs = ('erro_abs', 'mean') )
+                    .reset_index())
+    return df_aux
+
+def geo_drilldown( hierarquia, somas, metro = None, zona = None ):
+    ### Esta função recebe a hierarquia geográfica, as somas por restaurante dos pedidos filtrados e o nó escolhido, e
+    ### retorna o nível logo abaixo dele: sem região, todas as regiões metropolitanas; com região, as zonas dela; com
+    ### zona, os restaurantes dela.
+
+    nivel = 'metro' if metro is None else 'zona' if zona is None else 'restaurante'
+    return hierarquia.nivel( somas, nivel, metro, zona )
+
+def geo_level_map( df_nivel ):
+    ### Esta função recebe um nível da hierarquia geográfica e retorna um mapa com um círculo por nó (região, zona ou
+    ### restaurante), com o tamanho pela quantidade de pedidos. Só os nós do nível exibido vão para o navegador.
+
+    import folium as fl
+
+    df_aux = df_nivel.dropna( subset = [ 'latitude', 'longitude' ] )
+    map = fl.Map()
+    if len( df_aux ):
+        map.fit_bounds( [ [ df_aux['latitude'].min(), df_aux['longitude'].min() ],
+                          [ df_aux['latitude'].max(), df_aux['longitude'].max() ] ] )
+    raio = 30 * np.sqrt( df_aux['pedidos'] / max( df_aux['pedidos'].max(), 1 ) ) if len( df_aux ) else []
+    for ( index, info ), r in zip( df_aux.iterrows(), raio ):
+        fl.CircleMarker( [ info['latitude'], info['longitude'] ], radius = max( float( r ), 3 ), fill = True,
+                         tooltip = f"{info['nome']}: {info['pedidos']} pedidos, {info['avg_time']:.1f} min" ).add_to( map )
+    return map
@@ -0,0 +1,121 @@
+import pandas as pd
+
+#=====================================================================================================================
+
+# VISÃO ENTREGADORES
+
+#=====================================================================================================================
+
+# Funções de cálculo e de gráficos da página 'Visão Entregadores', sem dependência do Streamlit: a página as chama com os
+# dados filtrados e o exportador ('python -m utils.exportar') gera os mesmos painéis fora do dashboard. As bibliotecas
+# de visualização continuam importadas dentro de cada função.
+
+def rapidez_entregadores( df, high_speed = True ):
+    """
+        Agrupa os dados pelas colunas de agrupamento e ordena os entregadores mais rápidos por cidade.
+
+        Parâmetros:
+        - df: DataFrame de entrada
+        - high_speed (bool): Se 'True' calcula o tempo dos entregadores mais rápidos, por cidade. Se 'False' calcula o tempo dos entregadores mais lentos, por cidade 
+
+        Retorna: um DataFrame com os 10 entregadores mais rápidos agrupados por cidade ou com os 10 entregadores mais lentos, dependendo do valor do segundo parâmetro.
+        
+    """
+    if high_speed:
+        cols = ['Time_taken(min)', 'City', 'Delivery_person_ID']
+    
+        df2 = (df.loc[:, cols]
+                  .groupby(['City', 'Delivery_person_ID'], observed = True)
+                  .min()
+                  .sort_values( ['City', 'Time_taken(min)'] )
+                  .reset_index())
+        df_aux01 = df2.loc[df2['City'] == 'Metropolitian', :].head(10)
+        df_aux02 = df2.loc[df2['City'] == 'Semi-Urban', :].head(10)
+        df_aux03 = df2.loc[df2['City'] == 'Urban', :].head(10)
+        df_resultado = pd.concat( [df_aux01, df_aux02, df_aux03] ).reset_index()
+    
+    else:
+        cols = ['Time_taken(min)', 'City', 'Delivery_person_ID']
+
+        df2 = (df.loc[:, cols].groupby(['City', 'Delivery_person_ID'], observed = True)
+                  .max()
+                  .sort_values( ['City', 'Time_taken(min)'], ascending = False )
+                  .reset_index())
+        df_aux01 = df2.loc[df2['City'] == 'Metropolitian', :].head(10)
+        df_aux02 = df2.loc[df2['City'] == 'Semi-Urban', :].head(10)
+        df_aux03 = df2.loc[df2['City'] == 'Urban', :].head(10)
+        df_resultado = pd.concat( [df_aux01, df_aux02, df_aux03] ).reset_index()
+    return df_resultado
+
+def agrupar_media_std( df, col_ref, col_agrupamento ):
+    """
+        Agrupa os dados pela coluna de agrupamento e calcula a média e o desvio padrão
+        da coluna de referência.
+
+        Parâmetros:
+        - df: DataFrame de entrada
+        - col_ref: coluna de referência que terá a média e o desvio padrão calculados
+        - col_agrupamento: coluna para agrupar os dados
+
+        Retorna:
+        - DataFrame com índice col_agrupamento e colunas: 'media' e 'desvio_padrao'
+    """
+    df_resultado = ( df[[ col_ref, col_agrupamento]]
+                    .groupby( col_agrupamento, observed = True )
+                    .agg( media = ( col_ref, 'mean' ), desvio_padrao = ( col_ref, 'std' ) )
+                    .reset_index()
+                   )
+    return df_resultado
+
+def ratings_per_delivers( df ):
+    """
+        Retorna um Dataframe com a média das avaliações de cada entregador.
+
+        Parâmetros:
+        - df: Dataframe
+
+        Retorna: 
+        - df_avg_ratings_per_deliver: um novo Dataframe com as médias de todos os entregadores.
+
+    """
+        
+    df_avg_ratings_per_deliver = ( df.loc[:,['Delivery_person_Ratings', 'Delivery_person_ID']]
+                                      .groupby( ['Delivery_person_ID'], observed = True )
+                                      .mean()
+                                      .reset_index() )
+    return( df_avg_ratings_per_deliver )
+
+def buscar_extremo( df, coluna, funcao ):
+    """
+        Retorna o valor mínimo ou máximo de uma coluna, conforme a
+        função passada.
+
+        Parâmetros:
+        - df: DataFrame
+        - coluna: nome da coluna (str)
+        - funcao: função a ser usada (ex: min ou max)
+
+        Retorna:
+        - Valor extremo da coluna.
+    """
+    if coluna not in df.columns:
+        raise ValueError( f"A coluna '{coluna}' não existe no Dataframe" )
+    return funcao( df[ coluna ] )
+
+def peak_concurrency_chart( df_entregadores ):
+    """
+        Retorna um gráfico de barras com a quantidade de entregadores por pico de entregas simultâneas.
+
+        Parâmetros:
+        - df_entregadores: tabela por entregador retornada por 'workload_tables'.
+
+        Retorna:
+        - Gráfico de barras.
+    """
+    df_aux = ( df_entregadores.groupby( 'pico_concorrencia' )
+                              .size()
+                              .reset_index( name = 'entregadores' ) )
+    import plotly.express as px
+    fig = px.bar( df_aux, x = 'pico_concorrencia', y = 'entregadores',
+                  labels = { 'pico_concorrencia': 'Entregas simultâneas (pico)' } )
+    return fig
@@ -0,0 +1,206 @@
+import numpy as np
+import pandas as pd
+from utils.geo import distancia_entregas
+from utils.graficos import compactar_figura
+
+#=====================================================================================================================
+
+# VISÃO RESTAURANTES
+
+#=====================================================================================================================
+
+# Funções de cálculo e de gráficos da página 'Visão Restaurantes', sem dependência do Streamlit: a página as chama com os
+# dados filtrados e o exportador ('python -m utils.exportar') gera os mesmos painéis fora do dashboard. As bibliotecas
+# de visualização continuam importadas dentro de cada função.
+
+def distance_distribution( df ):
+    """
+    Esta função constrói um novo DataFrame com o tempo médio de entrega e o desvio padrão deste tempo, agrupados por cidade e por tipo de pedido.
+
+    Parâmetros:
+    - df: DataFrame com as colunas 'City', 'Time_taken(min)' e 'Type_of_order'.
+
+    Retorno:
+    _ df_aux: um novo DataFrame com o tempo médio e o desvio padrão do tempo das entregas.
+    """
+    df_aux = (df.loc[:, ['City', 'Time_taken(min)', 'Type_of_order']]
+                 .groupby(['City', 'Type_of_order'], observed = True)
+                 .agg({'Time_taken(min)':['mean', 'std']}))
+    
+    df_aux.columns = ['avg_time', 'std_time']
+    df_aux = df_aux.reset_index()
+    return( df_aux )
+
+def sunburst_chart( df ):
+    """
+    Esta função retorna um gráfico ao estilo 'sunburst' com a distribuição do tempo de entrega por cidade e densidade
+    de tráfego.
+
+    Parâmetros:
+    - df: DataFrame com as colunas 'City', 'Time_taken(min)' e 'Road_traffic_density'.
+
+    Retorno:
+    - Um gráfico ao estilo 'sunburst' com a distribuição do tempo de entrega por cidade e densidade de tráfego.
+    """
+    df_aux = ( df.loc[:, ['City', 'Time_taken(min)', 'Road_traffic_density']]
+                  .groupby(['City', 'Road_traffic_density'], observed = True)
+                  .agg({'Time_taken(min)' : ['mean', 'std']}) )
+
+    df_aux.columns = ['avg_time', 'std_time']
+    df_aux = df_aux.reset_index()
+
+    import plotly.express as px
+    fig = px.sunburst(df_aux, path = ['City', 'Road_traffic_density'], 
+                      values = 'avg_time', color = 'std_time', 
+                      color_continuous_scale = 'RdBu', 
+                      color_continuous_midpoint = np.average(df_aux['std_time']))
+    return( fig )
+
+def bar_chart( df ):
+    """
+    Esta função retorna um gráfico de barras com a distribuição do tempo, por cidade.
+
+    Parâmetros:
+    - df: DataFrame com as colunas 'City' e 'Time_taken(min)'.
+
+    Retorno:
+    - Um gráfico de barras com a distribuição do tempo de entrega por cidade.
+    """
+    df_aux = (df.loc[:, ['City', 'Time_taken(min)']]
+                 .groupby('City', observed = True)
+                 .agg({'Time_taken(min)':['mean', 'std']}))
+    df_aux.columns = ['avg_time', 'std_time']
+    df_aux = df_aux.reset_index()
+
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    fig.add_trace(go.Bar(name = 'control', 
+                         x = df_aux['City'], y = df_aux['avg_time'], 
+                         error_y = dict(type = 'data', 
+                                        array = df_aux['std_time'])))
+    fig.update_layout(barmode = 'group')
+    return( fig )
+
+def section_chart( df ):
+    """
+    Esta função retorna um gráfico de seção com o tempo médio de entrega por cidade.
+
+    Parâmetros:
+    - df: DataFrame com as colunas 'Restaurant_latitude', 'Restaurant_longitude', 'Delivery_location_latitude',      'Delivery_location_longitude'.
+
+    Retorno:
+    - Gráfico de seção com o tempo médio de entrega por cidade.
+    """
+    
+    # Distância haversine vetorizada (mesmo resultado do 'haversine' linha a linha, sem o custo do 'apply'):
+    df[ 'distance' ] = distancia_entregas( df )
+    avg_distance = df.loc[:, ['City', 'distance']].groupby('City', observed = True).mean().reset_index()
+    import plotly.graph_objects as go
+    fig = go.Figure(data = [go.Pie(labels = avg_distance['City'], 
+                                   values = avg_distance['distance'], 
+                                   pull = [0, 0.1, 0])])
+    return( fig )
+
+def mean_std_time_festival(df, funcao='mean', Festival=True):
+    """
+    Função que calcula o tempo médio ou o desvio padrão do tempo das entregas,
+    durante ou fora do período de festival.
+
+    Parâmetros:
+    - df: DataFrame com as colunas 'Time_taken(min)' e 'Festival'
+    - funcao: 'mean' para média ou 'std' para desvio padrão
+    - Festival: True para entregas durante o festival, False para fora dele
+
+    Retorno:
+    - Valor float com 2 casas decimais, de acordo com a função e condição escolhidas
+    """
+    
+    df_aux = (df.loc[:, ['Time_taken(min)', 'Festival']]
+                .groupby('Festival', observed = True)
+                .agg({'Time_taken(min)': ['mean', 'std']}))
+
+    df_aux.columns = ['avg_time', 'std_time']
+    df_aux = df_aux.reset_index()
+
+    # Define a linha do DataFrame com base na escolha do festival
+    if Festival:
+        condicao = 'Yes'
+    else:
+        condicao = 'No'
+
+    # Aplica a função escolhida
+    if funcao == 'mean':
+        resultado = np.round(df_aux.loc[df_aux['Festival'] == condicao, 'avg_time'], 2)
+    elif funcao == 'std':
+        resultado = np.round(df_aux.loc[df_aux['Festival'] == condicao, 'std_time'], 2)
+    else:
+        raise ValueError("A função deve ser 'mean' ou 'std'.")
+
+    return resultado.values[0]  # retorna apenas o número, não uma Series
+
+def distancia_media( df ):
+    """
+        Função que calcula a distância média das entregas tomando como referência a localização dos restaurantes e das entregas.
+
+        Parâmetros:
+        - df: DataFrame.
+
+        Retorna:
+        - A distância média das entregas em relação à localização dos restaurantes.
+    """
+    # Distância haversine vetorizada (mesmo resultado do 'haversine' linha a linha, sem o custo do 'apply'):
+    df[ 'distance' ] = distancia_entregas( df )
+    
+    # Cálculo da média da distância das cidades
+    distancia_media = df['distance'].mean()
+    return ( distancia_media )
+
+def prep_time_heatmap( df_aux ):
+    """
+    Esta função retorna um mapa de calor com o tempo médio de preparo dos restaurantes (coleta - pedido), por hora
+    do dia e por cidade.
+
+    Parâmetros:
+    - df_aux: DataFrame agregado retornado por 'hour_city_times'.
+
+    Retorno:
+    - Um mapa de calor com o tempo médio de preparo, em minutos.
+    """
+    df_pivot = df_aux.pivot( index = 'City', columns = 'order_hour', values = 'avg_prep_min' )
+    import plotly.express as px
+    fig = px.imshow( df_pivot, aspect = 'auto', color_continuous_scale = 'RdBu_r',
+                     labels = dict( x = 'Hora do pedido', y = 'Cidade', color = 'Preparo (min)' ) )
+    return( fig )
+
+def time_by_hour_chart( df_aux ):
+    """
+    Esta função retorna um gráfico de linhas com o tempo médio de entrega por hora do dia, uma linha por cidade.
+
+    Parâmetros:
+    - df_aux: DataFrame agregado retornado por 'hour_city_times'.
+
+    Retorno:
+    - Um gráfico de linhas com o tempo médio de entrega por hora do pedido.
+    """
+    import plotly.express as px
+    fig = px.line( df_aux, x = 'order_hour', y = 'avg_time', color = 'City', markers = True,
+                   labels = { 'order_hour': 'Hora do pedido', 'avg_time': 'Tempo médio (min)' } )
+    return( compactar_figura( fig ) )
+
+def geo_sunburst_chart( df_nivel ):
+    """
+    Esta função retorna um gráfico ao estilo 'sunburst' com um nível da hierarquia geográfica: o nó selecionado no
+    centro e os seus filhos em volta, com a quantidade de pedidos e a cor pelo tempo médio de entrega.
+
+    Parâmetros:
+    - df_nivel: DataFrame retornado por 'HierarquiaGeografica.nivel'.
+
+    Retorno:
+    - Um gráfico ao estilo 'sunburst' do nível exibido.
+    """
+    import plotly.express as px
+    fig = px.sunburst( df_nivel, path = [ 'pai', 'nome' ], values = 'pedidos', color = 'avg_time',
+                       hover_data = [ 'restaurantes', 'distancia_media' ],
+                       color_continuous_scale = 'RdBu_r',
+                       labels = { 'avg_time': 'Tempo médio (min)' } )
+    return( compactar_figura( fig ) )